@@ -1,38 +1,66 @@
+import time
+
+# Start of this script run, used to measure per-rerun bootstrap overhead
+rerun_started = time.perf_counter()
+
 import streamlit as st
 import google.generativeai as genai
 import random
 import math
-import plotly.graph_objects as go
-import plotly.express as px
-import networkx as nx
-import numpy as np
 import hashlib
-import sqlite3
-import json
 from datetime import datetime
-import pandas as pd
 import random
 import re
 import os
 import subprocess
-from manim import *
-from moviepy.editor import VideoFileClip, AudioFileClip
-from gtts import gTTS
-import numpy as np
-import sympy as sp
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+import shutil
 import io
-import pytesseract
-from PIL import Image
-from elevenlabs.client import ElevenLabs
-import openai
 from dotenv import load_dotenv
-from openai import OpenAI
 import time
+import concurrent.futures
+import queue
 import logging
+import atexit
+import collections
 import traceback
 from pathlib import Path
+from lazy_imports import cold_import_time, import_time_report, is_loaded, lazy_import, load_timings
+
+# Heavy optional dependencies are imported on first use by the feature that needs them;
+# manim itself is only ever imported inside the render worker processes
+go = lazy_import("plotly.graph_objects")
+px = lazy_import("plotly.express")
+moviepy_editor = lazy_import("moviepy.editor")
+gtts = lazy_import("gtts")
+pagesizes = lazy_import("reportlab.lib.pagesizes")
+canvas = lazy_import("reportlab.pdfgen.canvas")
+pytesseract = lazy_import("pytesseract")
+Image = lazy_import("PIL.Image")
+elevenlabs = lazy_import("elevenlabs.client")
+openai = lazy_import("openai")
+httpx = lazy_import("httpx")
+ocr = lazy_import("ocr")
+LAZY_MODULES = (go, px, moviepy_editor, gtts, pagesizes, canvas, pytesseract, Image, elevenlabs, openai, httpx, ocr)
+
+# Third-party modules every script start still imports, and the eager import list this app used
+# to start with; the diagnostics panel compares the cold import cost of the two
+STARTUP_IMPORTS = ("streamlit", "google.generativeai", "dotenv")
+EAGER_BASELINE_IMPORTS = STARTUP_IMPORTS + (
+    "plotly.graph_objects", "plotly.express", "networkx", "numpy", "pandas", "manim", "moviepy.editor", "gtts",
+    "sympy", "reportlab.lib.pagesizes", "reportlab.pdfgen.canvas", "pytesseract", "PIL.Image", "elevenlabs.client",
+    "openai",
+)
+
+from llm_cache import CachedChatClient, CachedGenerativeModel, get_llm_cache
+from media_cache import get_cache
+from render_worker import RenderWorkerError, get_render_pool, manim_quality_preset
+from render_scheduler import QueueFullError, RenderScheduler
+from workspaces import WorkspaceManager
+from narration import synthesize_narration
+from tts_engines import ElevenLabsEngine, EspeakEngine, GTTSEngine
+from storage import create_store, default_progress
+from progress_writer import ProgressWriter
+from jobs import ACTIVE_STATUSES, JobCancelled, JobRunner
 
 # ================================
 # LOGGING CONFIGURATION
@@ -104,16 +132,80 @@ def load_configuration():
         'sidebar_state': os.getenv("SIDEBAR_STATE", "expanded"),
         
         # Database Settings
+        'storage_backend': os.getenv("STORAGE_BACKEND", "sqlite").lower(),
         'database_name': os.getenv("DATABASE_NAME", "math_tutor.db"),
+        'database_url': os.getenv("DATABASE_URL"),
+        'db_pool_size': int(os.getenv("DB_POOL_SIZE", "8")),
+        'db_busy_timeout_ms': int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000")),
+        'db_synchronous': os.getenv("DB_SYNCHRONOUS", "NORMAL"),
+        'progress_write_mode': os.getenv("PROGRESS_WRITE_MODE", "behind").lower(),
+        'progress_flush_interval_ms': int(os.getenv("PROGRESS_FLUSH_INTERVAL_MS", "250")),
+        'progress_batch_size': int(os.getenv("PROGRESS_BATCH_SIZE", "50")),
+        
+        # Background Job Settings
+        'jobs_db_path': os.getenv("JOBS_DB_PATH", "jobs.db"),
+        'job_workers': int(os.getenv("JOB_WORKERS", "4")),
+        'job_retention_hours': float(os.getenv("JOB_RETENTION_HOURS", "24")),
+        'job_poll_interval': float(os.getenv("JOB_POLL_INTERVAL", "1.0")),
+        'job_recovery_minutes': float(os.getenv("JOB_RECOVERY_MINUTES", "30")),
         
         # Video Generation Settings
         'manim_quality': os.getenv("MANIM_QUALITY", "ql"),
         'video_fps': os.getenv("VIDEO_FPS", "15"),
         'video_resolution': os.getenv("VIDEO_RESOLUTION", "480p"),
+        'manim_render_workers': int(os.getenv("MANIM_RENDER_WORKERS", "2")),
+        'manim_worker_max_renders': int(os.getenv("MANIM_WORKER_MAX_RENDERS", "20")),
+        'render_timeout_seconds': float(os.getenv("RENDER_TIMEOUT_SECONDS", "300")),
+        'render_cpu_limit_seconds': int(os.getenv("RENDER_CPU_LIMIT_SECONDS", "240")),
+        'render_memory_limit_mb': int(os.getenv("RENDER_MEMORY_LIMIT_MB", "4096")),
+        'render_cache_dir': os.getenv("RENDER_CACHE_DIR", "media/cache/renders"),
+        'render_cache_max_mb': int(os.getenv("RENDER_CACHE_MAX_MB", "1024")),
+        'max_concurrent_renders': int(os.getenv("MAX_CONCURRENT_RENDERS", os.getenv("MANIM_RENDER_WORKERS", "2"))),
+        'render_queue_max': int(os.getenv("RENDER_QUEUE_MAX", "10")),
+        'render_queue_max_per_user': int(os.getenv("RENDER_QUEUE_MAX_PER_USER", "2")),
+        'render_time_estimate': float(os.getenv("RENDER_TIME_ESTIMATE", "60")),
+        'workspace_root': os.getenv("WORKSPACE_ROOT", "media/jobs"),
+        'workspace_max_age_hours': float(os.getenv("WORKSPACE_MAX_AGE_HOURS", "24")),
+        'workspace_max_mb': int(os.getenv("WORKSPACE_MAX_MB", "2048")),
+        'workspace_gc_interval': float(os.getenv("WORKSPACE_GC_INTERVAL", "600")),
+        
+        # OpenRouter Client Settings
+        'openrouter_max_connections': int(os.getenv("OPENROUTER_MAX_CONNECTIONS", "20")),
+        'openrouter_max_keepalive': int(os.getenv("OPENROUTER_MAX_KEEPALIVE", "10")),
+        'openrouter_keepalive_expiry': float(os.getenv("OPENROUTER_KEEPALIVE_EXPIRY", "60")),
+        'openrouter_connect_timeout': float(os.getenv("OPENROUTER_CONNECT_TIMEOUT", "10")),
+        'openrouter_read_timeout': float(os.getenv("OPENROUTER_READ_TIMEOUT", "120")),
+        'openrouter_max_concurrency': int(os.getenv("OPENROUTER_MAX_CONCURRENCY", "8")),
+        
+        # LLM Response Cache Settings
+        'llm_cache_enabled': os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true",
+        'llm_cache_path': os.getenv("LLM_CACHE_PATH", "llm_cache.db"),
+        'llm_cache_ttl_hours': float(os.getenv("LLM_CACHE_TTL_HOURS", "168")),
+        'llm_cache_max_entries': int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000")),
+        'llm_cache_bypass_features': [
+            feature.strip() for feature in os.getenv("LLM_CACHE_BYPASS_FEATURES", "quiz,practice_questions").split(",") if feature.strip()
+        ],
         
         # Audio Settings
         'audio_language': os.getenv("AUDIO_LANGUAGE", "en"),
         'audio_output_format': os.getenv("AUDIO_OUTPUT_FORMAT", "mp3"),
+        'tts_cache_dir': os.getenv("TTS_CACHE_DIR", "media/cache/tts"),
+        'tts_cache_max_mb': int(os.getenv("TTS_CACHE_MAX_MB", "256")),
+        'tts_workers': int(os.getenv("TTS_WORKERS", "4")),
+        'tts_chunk_chars': int(os.getenv("TTS_CHUNK_CHARS", "250")),
+        'ocr_cache_max_entries': int(os.getenv("OCR_CACHE_MAX_ENTRIES", "256")),
+        'ocr_preprocess': os.getenv("OCR_PREPROCESS", "true").lower() == "true",
+        'ocr_target_dpi': int(os.getenv("OCR_TARGET_DPI", "200")),
+        'ocr_psm': int(os.getenv("OCR_PSM", "6")),
+        'ocr_oem': int(os.getenv("OCR_OEM", "3")),
+        'ocr_extra_config': os.getenv("OCR_EXTRA_CONFIG", ""),
+        'tts_engines': [
+            engine.strip().lower() for engine in os.getenv("TTS_ENGINES", "gtts,espeak").split(",") if engine.strip()
+        ],
+        'elevenlabs_voice_id': os.getenv("ELEVENLABS_VOICE_ID", "21m00Tcm4TlvDq8ikWAM"),
+        'elevenlabs_model_id': os.getenv("ELEVENLABS_MODEL_ID", "eleven_multilingual_v2"),
+        'espeak_voice': os.getenv("ESPEAK_VOICE"),
+        'espeak_words_per_minute': int(os.getenv("ESPEAK_WORDS_PER_MINUTE", "160")),
         
         # Security Settings
         'password_hash_algorithm': os.getenv("PASSWORD_HASH_ALGORITHM", "sha256")
@@ -133,38 +225,201 @@ def load_configuration():
     
     return config
 
+# ================================
+# PROCESS-LEVEL RESOURCES
+# ================================
+# Streamlit re-executes this script on every interaction. Everything below is created once
+# per server process through st.cache_resource, so a rerun only pays for the UI code.
+
+@st.cache_resource(show_spinner=False)
+def get_configuration():
+    """Load configuration once per process"""
+    return load_configuration()
+
+@st.cache_resource(show_spinner=False)
+def get_logger():
+    """Configure logging once per process"""
+    return setup_logging()
+
+@st.cache_resource(show_spinner=False)
+def get_rerun_metrics():
+    """Process-wide record of how long the script bootstrap takes on each run"""
+    return {"first_run_ms": None, "rerun_ms": collections.deque(maxlen=200)}
+
+@st.cache_resource(show_spinner=False)
+def get_shutdown_hooks():
+    """Process-wide list of (name, callback) pairs run once when the server process exits"""
+    hooks = []
+    
+    def run_shutdown_hooks():
+        logger.info("Running shutdown hooks")
+        for name, hook in reversed(hooks):
+            try:
+                logger.info(f"Shutting down {name}")
+                hook()
+            except Exception as e:
+                logger.warning(f"Shutdown hook '{name}' failed: {str(e)}")
+        logger.info("Neo AI Tutor application shutdown complete")
+    
+    atexit.register(run_shutdown_hooks)
+    return hooks
+
 # Load configuration
-config = load_configuration()
+config = get_configuration()
 
 # Initialize logging after environment variables are loaded
-logger = setup_logging()
-
-# Test logging functionality
-logger.debug("DEBUG: This is a debug message")
-logger.info("INFO: This is an info message")
-logger.warning("WARNING: This is a warning message")
-logger.error("ERROR: This is an error message")
-
-# Configure Google Gemini
-logger.info("Configuring Google Gemini AI model")
-try:
-    genai.configure(api_key=config['google_gemini_api_key'])
-    model = genai.GenerativeModel('gemini-2.0-flash')
-    logger.info("Google Gemini model configured successfully")
-except Exception as e:
-    logger.error(f"Failed to configure Google Gemini: {str(e)}")
-    raise
-
-# Configure ElevenLabs (optional)
-if config['elevenlabs_api_key']:
+logger = get_logger()
+
+@st.cache_resource(show_spinner=False)
+def get_shared_llm_cache():
+    """Open the shared LLM response cache, or return None when it is disabled"""
+    if not config['llm_cache_enabled']:
+        logger.info("LLM response cache disabled")
+        return None
+    try:
+        cache = get_llm_cache(
+            config['llm_cache_path'],
+            config['llm_cache_ttl_hours'] * 3600,
+            config['llm_cache_max_entries']
+        )
+        get_shutdown_hooks().append(("LLM response cache", cache.close))
+        return cache
+    except Exception as e:
+        logger.warning(f"Failed to open LLM response cache, continuing without it: {str(e)}")
+        return None
+
+@st.cache_resource(show_spinner=False)
+def get_gemini_model():
+    """Configure Google Gemini once per process"""
+    logger.info("Configuring Google Gemini AI model")
+    try:
+        genai.configure(api_key=config['google_gemini_api_key'])
+        gemini_model = CachedGenerativeModel(
+            genai.GenerativeModel('gemini-2.0-flash'),
+            get_shared_llm_cache(),
+            'gemini-2.0-flash',
+            config['llm_cache_bypass_features']
+        )
+        logger.info("Google Gemini model configured successfully")
+        return gemini_model
+    except Exception as e:
+        logger.error(f"Failed to configure Google Gemini: {str(e)}")
+        raise
+
+@st.cache_resource(show_spinner=False)
+def get_openrouter_client():
+    """Create the process-wide OpenRouter client, reused by every session and pipeline run"""
+    logger.info("Creating shared OpenRouter client")
+    timeout = httpx.Timeout(
+        connect=config['openrouter_connect_timeout'],
+        read=config['openrouter_read_timeout'],
+        write=config['openrouter_connect_timeout'],
+        pool=config['openrouter_read_timeout']
+    )
+    # One pooled HTTP client keeps TLS sessions and keep-alive connections across requests
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=config['openrouter_max_connections'],
+            max_keepalive_connections=config['openrouter_max_keepalive'],
+            keepalive_expiry=config['openrouter_keepalive_expiry']
+        ),
+        timeout=timeout
+    )
+    get_shutdown_hooks().append(("OpenRouter HTTP client", http_client.close))
+    client = openai.OpenAI(
+        base_url="https://openrouter.ai/api/v1",
+        api_key=config['openrouter_api_key'],
+        http_client=http_client,
+        timeout=timeout
+    )
+    return CachedChatClient(
+        client,
+        get_shared_llm_cache(),
+        config['llm_cache_bypass_features'],
+        max_concurrency=config['openrouter_max_concurrency']
+    )
+
+@st.cache_resource(show_spinner=False)
+def get_elevenlabs_client():
+    """Configure the optional ElevenLabs client once per process, on first use"""
+    if not config['elevenlabs_api_key']:
+        logger.info("ElevenLabs API key not provided, skipping configuration")
+        return None
+    
     logger.info("ElevenLabs API key found, configuring client")
     try:
-        client = ElevenLabs(api_key=config['elevenlabs_api_key'])
+        elevenlabs_client = elevenlabs.ElevenLabs(api_key=config['elevenlabs_api_key'])
         logger.info("ElevenLabs client configured successfully")
+        return elevenlabs_client
     except Exception as e:
         logger.warning(f"Failed to configure ElevenLabs client: {str(e)}")
-else:
-    logger.info("ElevenLabs API key not provided, skipping configuration")
+        return None
+
+@st.cache_resource(show_spinner=False)
+def get_tts_engines():
+    """Build the configured text-to-speech engines in fallback order, skipping unavailable ones"""
+    engines = []
+    for name in config['tts_engines']:
+        if name == "gtts":
+            engines.append(GTTSEngine(gtts))
+        elif name == "elevenlabs":
+            elevenlabs_client = get_elevenlabs_client()
+            if elevenlabs_client is None:
+                continue
+            engines.append(ElevenLabsEngine(elevenlabs_client, config['elevenlabs_voice_id'], config['elevenlabs_model_id']))
+        elif name == "espeak":
+            espeak_path = shutil.which("espeak-ng") or shutil.which("espeak")
+            if not espeak_path:
+                logger.info("espeak-ng not installed, skipping the offline TTS engine")
+                continue
+            engines.append(EspeakEngine(espeak_path, find_ffmpeg(), config['espeak_voice'], config['espeak_words_per_minute']))
+        else:
+            logger.warning(f"Unknown TTS engine '{name}' in TTS_ENGINES, ignoring it")
+    
+    logger.info(f"TTS engines in fallback order: {', '.join(engine.name for engine in engines) or 'none'}")
+    return engines
+
+@st.cache_resource(show_spinner=False)
+def start_render_pool():
+    """Start the warm Manim render workers so manim is imported before the first video request"""
+    render_pool = get_render_pool(
+        config['manim_render_workers'],
+        config['manim_worker_max_renders'],
+        logger.getEffectiveLevel(),
+        config['render_timeout_seconds'],
+        config['render_cpu_limit_seconds'],
+        config['render_memory_limit_mb']
+    )
+    get_shutdown_hooks().append(("Manim render pool", render_pool.shutdown))
+    return render_pool
+
+@st.cache_resource(show_spinner=False)
+def get_render_scheduler():
+    """Create the process-wide render queue that caps concurrent renders across all sessions"""
+    return RenderScheduler(
+        config['max_concurrent_renders'],
+        config['render_queue_max'],
+        config['render_queue_max_per_user'],
+        config['render_time_estimate']
+    )
+
+@st.cache_resource(show_spinner=False)
+def get_workspace_manager():
+    """Create the per-job workspace root and start its background garbage collector"""
+    manager = WorkspaceManager(
+        config['workspace_root'],
+        config['workspace_max_age_hours'],
+        config['workspace_max_mb'] * 1024 * 1024,
+        config['workspace_gc_interval']
+    )
+    get_shutdown_hooks().append(("workspace garbage collector", manager.close))
+    return manager
+
+llm_cache = get_shared_llm_cache()
+model = get_gemini_model()
+start_render_pool()
+render_scheduler = get_render_scheduler()
+workspace_manager = get_workspace_manager()
 
 # Page configuration
 logger.info("Configuring Streamlit page settings")
@@ -705,23 +960,22 @@ def clean_manim_script(script: str) -> str:
         logger.error(f"Traceback: {traceback.format_exc()}")
         raise
 
-def generate_manim_video(manim_code, video_class_name="MathExplanation"):
-    """Generate Manim video from script"""
+def generate_manim_video(manim_code, video_class_name="MathExplanation", owner=None, on_queue=None, workspace=".",
+                         cancelled=None):
+    """Generate Manim video from script.
+    
+    The script and manim's media tree are written inside workspace.
+    Renders wait their turn in the render scheduler's queue for owner; on_queue(position, eta_seconds)
+    is called while waiting and may raise to give up. Once cancelled() returns True the render is not
+    started, or the worker running it is killed, and JobCancelled is raised. Raises QueueFullError if
+    the queue is full and RenderWorkerError, whose reason says why, if the sandboxed render fails or
+    breaches a limit.
+    """
     logger.info(f"Starting Manim video generation for class: {video_class_name}")
     
     try:
-        timestamp = int(time.time())
-        script_path = f"{video_class_name}_{timestamp}.py"
-        logger.debug(f"Script will be saved to: {script_path}")
-        
         cleaned_script = clean_manim_script(manim_code)
         
-        # Write script to file
-        logger.debug("Writing Manim script to file")
-        with open(script_path, "w", encoding="utf-8") as f:
-            f.write(cleaned_script)
-        logger.info(f"Manim script written to {script_path}")
-        
         # Use configuration for Manim settings
         manim_quality = config['manim_quality']
         video_fps = config['video_fps']
@@ -729,51 +983,77 @@ def generate_manim_video(manim_code, video_class_name="MathExplanation"):
         
         logger.info(f"Manim settings: quality={manim_quality}, fps={video_fps}, resolution={video_resolution}")
         
-        # Run Manim command
-        logger.info("Executing Manim command")
-        manim_command = ["manim", f"-{manim_quality}", script_path, video_class_name]
-        logger.debug(f"Manim command: {' '.join(manim_command)}")
-        
-        result = subprocess.run(manim_command, capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            logger.error(f"Manim command failed with return code {result.returncode}")
-            logger.error(f"Manim stderr: {result.stderr}")
-            logger.error(f"Manim stdout: {result.stdout}")
-            return None
+        # Identical scripts rendered with identical settings produce the same video
+        render_cache = get_cache(config['render_cache_dir'], config['render_cache_max_mb'] * 1024 * 1024, ".mp4")
+        cache_key = render_cache.make_key(cleaned_script, video_class_name, manim_quality, video_fps, video_resolution)
+        cached_video = render_cache.get(cache_key)
+        cache_stats = render_cache.stats()
+        logger.info(f"Render cache {'hit' if cached_video else 'miss'} (hits={cache_stats['hits']}, misses={cache_stats['misses']})")
+        if cached_video:
+            logger.info(f"Returning cached video: {cached_video}")
+            return cached_video
         
-        logger.info("Manim command executed successfully")
-        logger.debug(f"Manim stdout: {result.stdout}")
+        timestamp = int(time.time())
+        script_path = os.path.join(workspace, f"{video_class_name}_{timestamp}.py")
+        logger.debug(f"Script will be saved to: {script_path}")
         
-        # Find generated video
-        video_dir = f"media/videos/{video_class_name}_{timestamp}/{video_resolution}{video_fps}"
-        logger.debug(f"Looking for video in directory: {video_dir}")
+        # Write script to file
+        logger.debug("Writing Manim script to file")
+        with open(script_path, "w", encoding="utf-8") as f:
+            f.write(cleaned_script)
+        logger.info(f"Manim script written to {script_path}")
         
-        if not os.path.exists(video_dir):
-            logger.error(f"Video directory does not exist: {video_dir}")
-            return None
+        # Render on a warm worker that already has manim imported
+        logger.info("Submitting script to Manim render worker")
+        render_pool = get_render_pool(
+            config['manim_render_workers'],
+            config['manim_worker_max_renders'],
+            logger.getEffectiveLevel(),
+            config['render_timeout_seconds'],
+            config['render_cpu_limit_seconds'],
+            config['render_memory_limit_mb']
+        )
         
-        video_files = [f for f in os.listdir(video_dir) if f.endswith(".mp4")]
-        logger.debug(f"Found {len(video_files)} video files: {video_files}")
+        try:
+            # A job cancelled before its turn never takes a slot; checked again once the slot is ours
+            if cancelled is not None and cancelled():
+                raise JobCancelled("Video render cancelled before it started")
+            with render_scheduler.slot(owner, on_wait=on_queue):
+                if cancelled is not None and cancelled():
+                    raise JobCancelled("Video render cancelled before it started")
+                video_path = render_pool.render(script_path, video_class_name, manim_quality_preset(manim_quality),
+                                                cancelled=cancelled)
+        except RenderWorkerError as e:
+            if e.reason == "cancelled":
+                logger.info("Manim render cancelled, its worker was stopped")
+                raise JobCancelled("Video render cancelled") from e
+            logger.error(f"Manim render failed ({e.reason}): {str(e)}")
+            raise
+        
+        logger.info("Manim render completed successfully")
         
-        if not video_files:
-            logger.error("No video files found in output directory")
+        if not os.path.exists(video_path):
+            logger.error(f"Rendered video not found: {video_path}")
             return None
         
-        video_files.sort(key=lambda x: os.path.getmtime(os.path.join(video_dir, x)), reverse=True)
-        latest_video = video_files[0]
-        video_path = os.path.join(video_dir, latest_video)
+        render_cache.put(cache_key, video_path)
         
         logger.info(f"Video generated successfully: {video_path}")
         return video_path
         
+    except (QueueFullError, RenderWorkerError, JobCancelled):
+        raise
     except Exception as e:
         logger.error(f"Error generating Manim video: {str(e)}")
         logger.error(f"Traceback: {traceback.format_exc()}")
         return None
 
+def normalize_narration(text):
+    """Collapse whitespace so equivalent narration scripts share one cache entry"""
+    return " ".join(text.split())
+
 def synthesize_audio(text, audio_path="explanation_audio.mp3", lang=None):
-    """Generate audio using gTTS (Google Text-to-Speech), with error handling."""
+    """Generate audio with the configured TTS engines, falling back to the next engine on failure."""
     logger.info(f"Starting audio synthesis for text of length {len(text)} characters")
     
     try:
@@ -788,19 +1068,135 @@ def synthesize_audio(text, audio_path="explanation_audio.mp3", lang=None):
         logger.debug(f"Audio settings: language={lang}, format={audio_format}")
         logger.debug(f"Audio will be saved to: {audio_path}")
         
-        # Generate speech
-        logger.info("Generating speech using gTTS")
-        tts = gTTS(text=text, lang=lang)
-        tts.save(audio_path)
-
-        logger.info(f"✅ Audio saved to {audio_path}")
-        return audio_path
+        # Whitespace does not change the speech, so it is normalized before keying and synthesis
+        text = normalize_narration(text)
+        tts_cache = get_cache(config['tts_cache_dir'], config['tts_cache_max_mb'] * 1024 * 1024, f".{audio_format}")
+        
+        engines = get_tts_engines()
+        cache_keys = {engine.name: tts_cache.make_key(text, lang, engine.name, audio_format) for engine in engines}
+        
+        # Narration voiced earlier by any configured engine (e.g. a fallback, while the first one was down) is reused
+        for engine in engines:
+            cached_audio = tts_cache.get(cache_keys[engine.name])
+            if cached_audio:
+                logger.info(f"TTS cache hit ({engine.name}), reusing narration: {cached_audio}")
+                return cached_audio
+        
+        # A narration is voiced by a single engine; the next one is only tried if it fails
+        for engine in engines:
+            def synthesize_chunk(chunk_text, chunk_path):
+                engine.synthesize(chunk_text, chunk_path, lang)
+            
+            # Generate speech, a few sentences per request with the requests running in parallel
+            logger.info(f"Generating speech using {engine.name}")
+            try:
+                synthesize_narration(text, synthesize_chunk, audio_path, config['tts_workers'], config['tts_chunk_chars'], find_ffmpeg())
+            except Exception as e:
+                logger.warning(f"TTS engine '{engine.name}' failed, trying the next one: {str(e)}")
+                continue
+            tts_cache.put(cache_keys[engine.name], audio_path)
+            
+            logger.info(f"✅ Audio saved to {audio_path}")
+            return audio_path
+        
+        logger.error("❌ Every configured TTS engine failed")
+        return None
 
     except Exception as e:
         logger.error(f"❌ Error during TTS synthesis: {str(e)}")
         logger.error(f"Traceback: {traceback.format_exc()}")
         return None
 
+def find_ffmpeg():
+    """Locate an ffmpeg binary, preferring the system install over the imageio-ffmpeg bundle"""
+    ffmpeg_path = shutil.which("ffmpeg")
+    if ffmpeg_path:
+        return ffmpeg_path
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception as e:
+        logger.debug(f"imageio-ffmpeg binary not available: {str(e)}")
+        return None
+
+def probe_duration(media_path):
+    """Return the container duration of a media file in seconds using ffprobe, or None"""
+    ffprobe_path = shutil.which("ffprobe")
+    if not ffprobe_path:
+        return None
+    
+    result = subprocess.run(
+        [ffprobe_path, "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", media_path],
+        capture_output=True, text=True
+    )
+    try:
+        return float(result.stdout.strip())
+    except ValueError:
+        logger.debug(f"Could not probe duration of {media_path}: {result.stderr}")
+        return None
+
+def mux_video_audio(video_path, audio_path, output_video):
+    """Mux audio into the video with ffmpeg, copying the already encoded video stream"""
+    ffmpeg_path = find_ffmpeg()
+    if not ffmpeg_path:
+        logger.warning("ffmpeg not found, cannot stream-copy mux")
+        return False
+    
+    # AAC narration can be copied as-is; anything else is encoded to AAC for the mp4 container
+    audio_codec = ["-c:a", "copy"] if audio_path.lower().endswith((".aac", ".m4a")) else ["-c:a", "aac", "-b:a", "128k"]
+    
+    # Match the moviepy behaviour: keep the full video and cut the audio to the video length
+    video_duration = probe_duration(video_path)
+    if video_duration is not None:
+        logger.debug(f"Video duration: {video_duration}s")
+        length_args = ["-t", f"{video_duration:.3f}"]
+    else:
+        audio_codec = ["-c:a", "aac", "-b:a", "128k"]
+        length_args = ["-af", "apad", "-shortest"]
+    
+    mux_command = [
+        ffmpeg_path, "-y", "-loglevel", "error",
+        "-i", video_path, "-i", audio_path,
+        "-map", "0:v:0", "-map", "1:a:0",
+        "-c:v", "copy", *audio_codec, *length_args,
+        "-movflags", "+faststart",
+        output_video
+    ]
+    logger.debug(f"ffmpeg command: {' '.join(mux_command)}")
+    
+    start_time = time.perf_counter()
+    result = subprocess.run(mux_command, capture_output=True, text=True)
+    if result.returncode != 0:
+        logger.warning(f"ffmpeg mux failed with return code {result.returncode}: {result.stderr}")
+        return False
+    
+    logger.info(f"ffmpeg stream-copy mux finished in {(time.perf_counter() - start_time) * 1000:.0f} ms")
+    return True
+
+def combine_video_audio_moviepy(video_path, audio_path, output_video):
+    """Combine video and audio by re-encoding with moviepy"""
+    video = moviepy_editor.VideoFileClip(video_path)
+    audio = moviepy_editor.AudioFileClip(audio_path)
+    final_video = None
+    
+    try:
+        logger.debug(f"Video duration: {video.duration}s")
+        logger.debug(f"Audio duration: {audio.duration}s")
+        
+        # Trim audio to match video duration
+        trimmed_audio = audio.subclip(0, min(video.duration, audio.duration))
+        logger.debug(f"Audio trimmed to: {trimmed_audio.duration}s")
+        
+        final_video = video.set_audio(trimmed_audio)
+        logger.info(f"Writing final video to: {output_video}")
+        # moviepy puts its temporary audio track in the working directory unless told otherwise
+        final_video.write_videofile(output_video, codec="libx264", temp_audiofile=f"{os.path.splitext(output_video)[0]}_audio.mp3")
+    finally:
+        if final_video is not None:
+            final_video.close()
+        audio.close()
+        video.close()
+
 def combine_video_audio(video_path, audio_path, output_video="final_explanation.mp4"):
     """Combine video and audio"""
     logger.info(f"Starting video-audio combination")
@@ -818,22 +1214,10 @@ def combine_video_audio(video_path, audio_path, output_video="final_explanation.
             logger.error(f"Audio file not found: {audio_path}")
             raise FileNotFoundError(f"Audio file not found: {audio_path}")
         
-        logger.info("Loading video and audio files")
-        video = VideoFileClip(video_path)
-        audio = AudioFileClip(audio_path)
-        
-        logger.debug(f"Video duration: {video.duration}s")
-        logger.debug(f"Audio duration: {audio.duration}s")
-        
-        # Trim audio to match video duration
-        audio = audio.subclip(0, min(video.duration, audio.duration))
-        logger.debug(f"Audio trimmed to: {audio.duration}s")
-        
         logger.info("Combining video and audio")
-        final_video = video.set_audio(audio)
-        
-        logger.info(f"Writing final video to: {output_video}")
-        final_video.write_videofile(output_video, codec="libx264")
+        if not mux_video_audio(video_path, audio_path, output_video):
+            logger.info("Falling back to moviepy re-encode")
+            combine_video_audio_moviepy(video_path, audio_path, output_video)
         
         logger.info(f"✅ Video-audio combination completed: {output_video}")
         return output_video
@@ -866,11 +1250,39 @@ def hash_password(password):
         logger.error(f"Error hashing password: {str(e)}")
         raise
 
+def progress_version_this_run(username):
+    """Look up the user's progress version at most once per script run"""
+    # Keyed on the run's start time so the next rerun sees writes made by other sessions
+    memo = st.session_state.get('progress_version_memo')
+    if memo is None or memo[0] != rerun_started:
+        memo = (rerun_started, {})
+        st.session_state['progress_version_memo'] = memo
+    versions = memo[1]
+    if username not in versions:
+        versions[username] = store.progress_version(username)
+    return versions[username]
+
+def cached_user_read(name, loader, username):
+    """Serve a per-user read from this session's cache unless the user's progress changed since"""
+    # Read-your-writes: commit this user's queued progress events before comparing stamps
+    if progress_writer is not None and progress_writer.has_pending(username):
+        progress_writer.flush()
+        st.session_state.pop('progress_version_memo', None)
+    
+    version = (username, progress_version_this_run(username))
+    cache = st.session_state.setdefault('progress_cache', {})
+    entry = cache.get(name)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    
+    value = loader(username)
+    cache[name] = (version, value)
+    return value
+
 def check_user(username, password):
     logger.debug(f"Checking user authentication for username: {username}")
     try:
-        c.execute("SELECT * FROM users WHERE username=? AND password=?", (username, hash_password(password)))
-        result = c.fetchone() is not None
+        result = store.check_user(username, hash_password(password))
         logger.debug(f"User authentication result: {result}")
         return result
     except Exception as e:
@@ -880,15 +1292,11 @@ def check_user(username, password):
 def create_user(username, password):
     logger.info(f"Creating new user: {username}")
     try:
-        progress = json.dumps({"completed_topics": [], "quiz_scores": {}, "practice_sets": {}})
-        c.execute("INSERT INTO users (username, password, progress) VALUES (?, ?, ?)", 
-                 (username, hash_password(password), progress))
-        conn.commit()
+        if not store.create_user(username, hash_password(password)):
+            logger.warning(f"User '{username}' already exists")
+            return False
         logger.info(f"User '{username}' created successfully")
         return True
-    except sqlite3.IntegrityError as e:
-        logger.warning(f"User '{username}' already exists: {str(e)}")
-        return False
     except Exception as e:
         logger.error(f"Error creating user '{username}': {str(e)}")
         return False
@@ -896,54 +1304,57 @@ def create_user(username, password):
 def get_progress(username):
     logger.debug(f"Getting progress for user: {username}")
     try:
-        c.execute("SELECT progress FROM users WHERE username=?", (username,))
-        result = c.fetchone()
-        if result and result[0]:
-            progress = json.loads(result[0])
-            logger.debug(f"Retrieved progress for '{username}': {len(progress.get('completed_topics', []))} topics completed")
-            return progress
-        else:
-            logger.debug(f"No progress found for user '{username}', returning default")
-            return {"completed_topics": [], "quiz_scores": {}, "practice_sets": {}}
+        progress = cached_user_read('progress', store.get_progress, username)
+        logger.debug(f"Retrieved progress for '{username}': {len(progress.get('completed_topics', []))} topics completed")
+        return progress
     except Exception as e:
         logger.error(f"Error getting progress for user '{username}': {str(e)}")
-        return {"completed_topics": [], "quiz_scores": {}, "practice_sets": {}}
+        return default_progress()
 
-def update_progress(username, topic, score=None, practice_set=None):
+def update_progress(username, topic, score=None, practice_set=None, answers=None):
     logger.info(f"Updating progress for user '{username}', topic: '{topic}'")
-    logger.debug(f"Update details - score: {score}, practice_set: {practice_set is not None}")
+    logger.debug(f"Update details - score: {score}, practice_set: {practice_set is not None}, answers: {len(answers) if answers else 0}")
     
     try:
-        c.execute("SELECT progress FROM users WHERE username=?", (username,))
-        result = c.fetchone()
-        if result:
-            progress = json.loads(result[0] or '{"completed_topics": [], "quiz_scores": {}, "practice_sets": {}}')
+        if progress_writer is not None:
+            progress_writer.submit(username, topic, score, practice_set, answers)
+            logger.info(f"Progress update queued for user '{username}'")
         else:
-            progress = {"completed_topics": [], "quiz_scores": {}, "practice_sets": {}}
-        
-        if topic not in progress["completed_topics"]:
-            progress["completed_topics"].append(topic)
-            logger.debug(f"Added topic '{topic}' to completed topics")
-        
-        if score is not None:
-            progress["quiz_scores"][topic] = score
-            logger.debug(f"Updated quiz score for '{topic}': {score}")
-        
-        if practice_set is not None:
-            progress["practice_sets"][topic] = practice_set
-            logger.debug(f"Updated practice set for '{topic}'")
-        
-        c.execute("UPDATE users SET progress=? WHERE username=?", (json.dumps(progress), username))
-        conn.commit()
-        logger.info(f"Progress updated successfully for user '{username}'")
+            store.update_progress(username, topic, score, practice_set, answers)
+            st.session_state.pop('progress_version_memo', None)
+            logger.info(f"Progress updated successfully for user '{username}'")
         
     except Exception as e:
         logger.error(f"Error updating progress for user '{username}': {str(e)}")
         logger.error(f"Traceback: {traceback.format_exc()}")
 
+def get_quiz_stats(username):
+    """Return the user's precomputed quiz aggregates, or None if they have no attempts"""
+    try:
+        return cached_user_read('quiz_stats', store.get_quiz_stats, username)
+    except Exception as e:
+        logger.error(f"Error getting quiz stats for user '{username}': {str(e)}")
+        return None
+
+def get_topic_mastery(username):
+    """Return the user's precomputed per-topic quiz mastery rows"""
+    try:
+        return cached_user_read('topic_mastery', store.get_topic_mastery, username)
+    except Exception as e:
+        logger.error(f"Error getting topic mastery for user '{username}': {str(e)}")
+        return []
+
+def get_quiz_history(username, limit=50):
+    """Return the user's most recent quiz attempts, oldest first"""
+    try:
+        return cached_user_read(f'quiz_history_{limit}', lambda user: store.get_quiz_history(user, limit), username)
+    except Exception as e:
+        logger.error(f"Error getting quiz history for user '{username}': {str(e)}")
+        return []
+
 def save_practice_set_as_pdf(practice_set):
     pdf_buffer = io.BytesIO()
-    c = canvas.Canvas(pdf_buffer, pagesize=letter)
+    c = canvas.Canvas(pdf_buffer, pagesize=pagesizes.letter)
     c.setFont("Helvetica", 12)
     c.drawString(100, 750, "Practice Set")
     y = 730
@@ -977,42 +1388,49 @@ def save_practice_set_as_pdf(practice_set):
 # DATABASE SETUP
 # ================================
 
-logger.info(f"Initializing database: {config['database_name']}")
+@st.cache_resource(show_spinner=False)
+def get_store():
+    """Open the database and create/verify the schema once per process"""
+    logger.info(f"Initializing {config['storage_backend']} database")
+    
+    try:
+        db_store = create_store(
+            config['storage_backend'],
+            config['database_name'],
+            database_url=config['database_url'],
+            pool_size=config['db_pool_size'],
+            busy_timeout_ms=config['db_busy_timeout_ms'],
+            synchronous=config['db_synchronous']
+        )
+        get_shutdown_hooks().append(("database store", db_store.close))
+        return db_store
+    
+    except Exception as e:
+        logger.error(f"Database initialization failed: {str(e)}")
+        logger.error(f"Traceback: {traceback.format_exc()}")
+        raise
 
-try:
-    conn = sqlite3.connect(config['database_name'])
-    c = conn.cursor()
-    logger.info("Database connection established successfully")
+@st.cache_resource(show_spinner=False)
+def get_progress_writer():
+    """Start the write-behind progress writer, or return None when writes are synchronous"""
+    if config['progress_write_mode'] != "behind":
+        logger.info("Progress writes are synchronous")
+        return None
+    
+    writer = ProgressWriter(get_store(), config['progress_flush_interval_ms'], config['progress_batch_size'])
+    # Registered after the store, so it runs (and flushes) before the store closes
+    get_shutdown_hooks().append(("progress writer", writer.close))
+    return writer
 
-    # Create users table if it doesn't exist
-    logger.debug("Creating users table if it doesn't exist")
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            username TEXT PRIMARY KEY,
-            password TEXT,
-            progress TEXT
-        )
-    """)
-    conn.commit()
-    logger.info("Users table created/verified successfully")
-
-    # Check if progress column exists
-    c.execute("PRAGMA table_info(users)")
-    columns = [column[1] for column in c.fetchall()]
-    logger.debug(f"Current table columns: {columns}")
-    
-    if 'progress' not in columns:
-        logger.info("Adding progress column to users table")
-        c.execute("ALTER TABLE users ADD COLUMN progress TEXT")
-        conn.commit()
-        logger.info("Progress column added successfully")
-    else:
-        logger.debug("Progress column already exists")
+@st.cache_resource(show_spinner=False)
+def get_job_runner():
+    """Start the background job runner that executes the solve and video pipelines"""
+    # The runner cancels its own jobs at exit, before the interpreter joins their threads
+    return JobRunner(config['jobs_db_path'], config['job_workers'], config['job_retention_hours'])
 
-except Exception as e:
-    logger.error(f"Database initialization failed: {str(e)}")
-    logger.error(f"Traceback: {traceback.format_exc()}")
-    raise
+store = get_store()
+progress_writer = get_progress_writer()
+job_runner = get_job_runner()
 
 # ================================
 # SESSION STATE INITIALIZATION
@@ -1033,7 +1451,9 @@ def initialize_session_state():
         'generated_scenario': None,
         'selected_application': None,
         'generated_questions': None,
-        'messages': []
+        'messages': [],
+        'active_jobs': {},
+        'jobs_recovered': False
     }
     
     for key, value in defaults.items():
@@ -1060,6 +1480,143 @@ def display_status_message(message_type, message):
         st.markdown(f'<div class="status-error">❌ {message}</div>', unsafe_allow_html=True)
         logger.error(f"Status message (error): {message}")
 
+def format_duration(seconds):
+    """Format a duration estimate as a short human readable string"""
+    if seconds < 60:
+        return f"{max(1, round(seconds))} s"
+    return f"{round(seconds / 60)} min"
+
+def run_stage_graph(stages, on_stage_complete=None, max_workers=4, on_tick=None, poll_interval=0.1):
+    """Run a dependency graph of stages, starting each one as soon as its inputs are ready.
+    
+    stages maps a stage name to (dependency names, function); the function is called on a
+    worker thread with a dict of its dependencies' results. on_stage_complete is called on
+    the calling thread as each stage finishes, and on_tick every poll_interval seconds while
+    stages are running so the caller can render streamed output. Returns (results, timings) where timings maps
+    each stage to its (start, end) offsets in seconds from the start of the run.
+    """
+    results = {}
+    timings = {}
+    pending = dict(stages)
+    running = {}
+    run_start = time.perf_counter()
+    
+    def timed(function, inputs):
+        start = time.perf_counter() - run_start
+        value = function(inputs)
+        return value, start, time.perf_counter() - run_start
+    
+    def submit_ready_stages():
+        for name, (dependencies, function) in list(pending.items()):
+            if all(dependency in results for dependency in dependencies):
+                del pending[name]
+                inputs = {dependency: results[dependency] for dependency in dependencies}
+                running[executor.submit(timed, function, inputs)] = name
+    
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pipeline")
+    try:
+        submit_ready_stages()
+        while running:
+            done, _ = concurrent.futures.wait(
+                running,
+                timeout=poll_interval if on_tick else None,
+                return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            if on_tick:
+                on_tick()
+            for future in done:
+                name = running.pop(future)
+                value, start, end = future.result()
+                results[name] = value
+                timings[name] = (start, end)
+                logger.debug(f"Stage '{name}' finished in {end - start:.2f}s")
+                if on_stage_complete:
+                    on_stage_complete(name, value)
+            submit_ready_stages()
+        
+        if pending:
+            raise ValueError(f"Stages with unsatisfiable dependencies: {', '.join(pending)}")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    
+    return results, timings
+
+def critical_path(stages, timings):
+    """Return the chain of stages that determined the total run time, first stage first"""
+    if not timings:
+        return []
+    
+    path = [max(timings, key=lambda name: timings[name][1])]
+    while True:
+        dependencies = stages[path[-1]][0]
+        if not dependencies:
+            break
+        path.append(max(dependencies, key=lambda name: timings[name][1]))
+    return list(reversed(path))
+
+def stream_response(container, chunks, title=None):
+    """Render streamed text progressively inside container and return the full text.
+    
+    The live view is cleared once the stream ends so the page can render the final text
+    from session state as usual.
+    """
+    live_area = container.empty()
+    with live_area.container():
+        if title:
+            st.markdown(f'<div class="card-header"><h3 class="card-title">{title}</h3></div>', unsafe_allow_html=True)
+        text = st.write_stream(chunks)
+    live_area.empty()
+    return text if isinstance(text, str) else "".join(str(part) for part in text)
+
+@st.cache_data(show_spinner=False)
+def profile_heavy_imports():
+    """Measure the cold import cost of manim and every lazily imported dependency with -X importtime"""
+    module_names = ["manim"] + [module.__name__ for module in LAZY_MODULES]
+    reports = []
+    for module_name in module_names:
+        try:
+            reports.append(import_time_report(module_name, top=5))
+        except Exception as e:
+            logger.error(f"Import profiling failed for {module_name}: {str(e)}")
+            logger.error(f"Traceback: {traceback.format_exc()}")
+            reports.append({"module": module_name, "ok": False, "error": str(e)})
+    return sorted(reports, key=lambda report: report.get("total_ms", 0), reverse=True)
+
+@st.cache_data(show_spinner=False)
+def compare_cold_start_imports():
+    """Cold import cost of today's start-up imports against the original eager import list, each in a fresh interpreter"""
+    try:
+        return {"lazy": cold_import_time(STARTUP_IMPORTS), "eager": cold_import_time(EAGER_BASELINE_IMPORTS)}
+    except Exception as e:
+        logger.error(f"Cold start import measurement failed: {str(e)}")
+        logger.error(f"Traceback: {traceback.format_exc()}")
+        return None
+
+@st.cache_data(show_spinner=False, max_entries=config['ocr_cache_max_entries'])
+def recognize_image_text(content_hash, _image_bytes):
+    """Run Tesseract on an image; shared across sessions and keyed on the image's content hash only"""
+    started = time.perf_counter()
+    image = Image.open(io.BytesIO(_image_bytes))
+    if config['ocr_preprocess']:
+        # Downscaled, binarized, straightened and cropped pages are read faster and more accurately
+        image, _ = ocr.preprocess_image(image, config['ocr_target_dpi'])
+    tesseract_config = ocr.tesseract_config(config['ocr_psm'], config['ocr_oem'], config['ocr_extra_config'])
+    text = pytesseract.image_to_string(image, config=tesseract_config).strip()
+    logger.info(f"OCR of image {content_hash[:12]} took {(time.perf_counter() - started) * 1000:.0f} ms")
+    return text
+
+def extract_text_from_image(uploaded_file):
+    """Return the OCR text of an uploaded image, recognizing each distinct image only once"""
+    image_bytes = uploaded_file.getvalue()
+    content_hash = hashlib.sha256(image_bytes).hexdigest()
+    
+    # Reruns of this session hit the session dict; other sessions uploading the same image hit st.cache_data
+    session_results = st.session_state.setdefault('ocr_results', {})
+    if content_hash not in session_results:
+        with st.spinner("🔍 Reading your handwriting..."):
+            session_results[content_hash] = recognize_image_text(content_hash, image_bytes)
+    return session_results[content_hash]
+
 def create_nav_item(icon, text, key, is_active=False):
     """Create a navigation item"""
     active_class = "active" if is_active else ""
@@ -1070,6 +1627,105 @@ def create_nav_item(icon, text, key, is_active=False):
     </div>
     """
 
+# ================================
+# BACKGROUND JOBS
+# ================================
+# The solve and video pipelines run on the job runner's threads, not the script thread, so
+# they survive reruns and reconnects. The session keeps the ids of its jobs in
+# st.session_state.active_jobs (kind -> job id) and a fragment polls them until they finish.
+
+def start_job(kind, function, *args):
+    """Submit function(job, *args) to the job runner and track it in this session"""
+    job_id = job_runner.submit(kind, st.session_state.user, function, *args)
+    st.session_state.active_jobs[kind] = job_id
+    st.session_state.pop('job_notice', None)
+    return job_id
+
+def apply_solve_result(result):
+    """Copy a finished solve job into session state"""
+    st.session_state.solution_text = result["solution_text"]
+    st.session_state.manim_script = result["manim_script"]
+    st.session_state.audio_script = result["audio_script"]
+    st.session_state.pipeline_timings = {stage: tuple(span) for stage, span in result["timings"].items()}
+    st.session_state.pipeline_critical_path = result["critical_path"]
+    return "success", "Problem solved successfully! Click 'Generate Video Explanation' to create the video."
+
+def apply_video_result(result):
+    """Copy a finished video job into session state"""
+    st.session_state.final_video_path = result["final_video_path"]
+    st.session_state.video_generated = True
+    return "success", "Video generated successfully!"
+
+JOB_RESULT_HANDLERS = {
+    'solve': apply_solve_result,
+    'video': apply_video_result,
+}
+
+JOB_FAILURE_MESSAGES = {
+    'solve': "An error occurred",
+    'video': "Video generation failed",
+}
+
+def finish_job(kind, job):
+    """Stop tracking a finished job and turn its outcome into session state and a status message"""
+    st.session_state.active_jobs.pop(kind, None)
+    if job["status"] == "succeeded":
+        st.session_state.job_notice = JOB_RESULT_HANDLERS[kind](job["result"])
+    elif job["status"] == "cancelled":
+        st.session_state.job_notice = ("warning", "Cancelled.")
+    else:
+        st.session_state.job_notice = ("error", f"{JOB_FAILURE_MESSAGES[kind]}: {job['error']}")
+
+def recover_jobs():
+    """Reattach this user's running jobs, and recent results, once per login"""
+    if st.session_state.jobs_recovered:
+        return
+    st.session_state.jobs_recovered = True
+    
+    recovery_window = config['job_recovery_minutes'] * 60
+    for kind in JOB_RESULT_HANDLERS:
+        # A video result is only meaningful next to the solution it was rendered from
+        if kind == 'video' and not st.session_state.solution_text:
+            continue
+        try:
+            job = job_runner.latest_for(st.session_state.user, kind)
+        except Exception as e:
+            logger.warning(f"Could not look up previous {kind} job: {str(e)}")
+            continue
+        if job is None:
+            continue
+        if job["status"] in ACTIVE_STATUSES:
+            logger.info(f"Reattaching running {kind} job {job['id']} for '{st.session_state.user}'")
+            st.session_state.active_jobs[kind] = job["id"]
+        elif job["status"] == "succeeded" and time.time() - job["finished_at"] < recovery_window:
+            logger.info(f"Restoring result of {kind} job {job['id']} for '{st.session_state.user}'")
+            JOB_RESULT_HANDLERS[kind](job["result"])
+
+@st.fragment(run_every=config['job_poll_interval'])
+def show_job_progress(kind):
+    """Poll a background job, show its progress, and pick its result up when it finishes"""
+    job_id = st.session_state.active_jobs.get(kind)
+    job = job_runner.get(job_id) if job_id else None
+    if job is None:
+        st.session_state.active_jobs.pop(kind, None)
+        return
+    
+    if job["status"] not in ACTIVE_STATUSES:
+        finish_job(kind, job)
+        # Rerun the whole page so the result renders outside this fragment
+        st.rerun()
+    
+    st.progress(int(job["progress"] or 0))
+    if job["status"] == "queued":
+        st.markdown("⏳ Waiting for a free worker...")
+    else:
+        st.markdown(job["partial"].get("activity") or job["message"] or "⏳ Working...")
+    if job["partial"].get("solution"):
+        st.markdown(job["partial"]["solution"] + " ▌")
+    
+    if st.button("✖️ Cancel", key=f"cancel_{kind}_job", use_container_width=True):
+        job_runner.cancel(job_id)
+
 # ================================
 # MAIN APPLICATION
 # ================================
@@ -1219,16 +1875,87 @@ def show_main_interface():
         else:
             st.markdown("No completed topics yet")
         
-        if progress['quiz_scores']:
-            avg_score = sum(progress['quiz_scores'].values()) / len(progress['quiz_scores'])
-            st.markdown(f"**Average Quiz Score:** {avg_score:.1f}%")
+        quiz_stats = get_quiz_stats(st.session_state.user)
+        if quiz_stats:
+            st.markdown(f"**Average Quiz Score:** {quiz_stats['avg_score']:.1f}%")
         
         st.markdown('</div>', unsafe_allow_html=True)
         
+        # Diagnostics Section
+        with st.expander("🩺 Diagnostics"):
+            if llm_cache is not None:
+                llm_stats = llm_cache.stats()
+                st.markdown(f"**LLM Cache:** {llm_stats['hit_rate']:.0%} hit rate "
+                            f"({llm_stats['hits']} hits / {llm_stats['misses']} misses, {llm_stats['entries']} entries)")
+                for feature, counters in sorted(llm_stats['features'].items()):
+                    st.caption(f"{feature}: {counters['hits']} hits / {counters['misses']} misses")
+            else:
+                st.markdown("**LLM Cache:** disabled")
+            
+            rerun_metrics = get_rerun_metrics()
+            if rerun_metrics['first_run_ms'] is not None:
+                # The first run also creates the process-level resources; import savings are measured separately below
+                st.markdown(f"**Script Bootstrap:** {rerun_metrics['first_run_ms']:.1f} ms on the first run in this process")
+            if rerun_metrics['rerun_ms']:
+                rerun_times = list(rerun_metrics['rerun_ms'])
+                st.markdown(f"**Rerun Bootstrap:** {sum(rerun_times) / len(rerun_times):.1f} ms average over "
+                            f"the last {len(rerun_times)} reruns (max {max(rerun_times):.1f} ms)")
+            
+            render_stats = get_cache(config['render_cache_dir'], config['render_cache_max_mb'] * 1024 * 1024, ".mp4").stats()
+            st.markdown(f"**Render Cache:** {render_stats['hit_rate']:.0%} hit rate "
+                        f"({render_stats['hits']} hits / {render_stats['misses']} misses, "
+                        f"{render_stats['bytes'] / (1024 * 1024):.1f} MB)")
+            
+            tts_stats = get_cache(config['tts_cache_dir'], config['tts_cache_max_mb'] * 1024 * 1024, f".{config['audio_output_format']}").stats()
+            st.markdown(f"**TTS Cache:** {tts_stats['hit_rate']:.0%} hit rate "
+                        f"({tts_stats['hits']} hits / {tts_stats['misses']} misses, "
+                        f"{tts_stats['bytes'] / (1024 * 1024):.1f} MB)")
+            
+            workspace_stats = workspace_manager.stats()
+            st.markdown(f"**Job Workspaces:** {workspace_stats['workspaces']} ({workspace_stats['active']} in use), "
+                        f"{workspace_stats['bytes'] / (1024 * 1024):.1f} of {workspace_stats['max_bytes'] / (1024 * 1024):.0f} MB, "
+                        f"{workspace_stats['reclaimed_bytes'] / (1024 * 1024):.1f} MB reclaimed")
+            
+            scheduler_stats = render_scheduler.stats()
+            st.markdown(f"**Render Queue:** {scheduler_stats['running']} rendering, {scheduler_stats['queued']} waiting, "
+                        f"{scheduler_stats['rejected']} rejected (~{scheduler_stats['avg_duration']:.0f}s per render)")
+            
+            if progress_writer is not None:
+                writer_stats = progress_writer.stats()
+                st.markdown(f"**Progress Writer:** {writer_stats['events_written']} events in {writer_stats['batches']} batches, "
+                            f"{writer_stats['pending']} pending, {writer_stats['failures']} failed")
+            
+            loaded_modules = [module.__name__ for module in LAZY_MODULES if is_loaded(module)]
+            st.markdown(f"**Lazy Imports:** {len(loaded_modules)} of {len(LAZY_MODULES)} heavy modules loaded")
+            for module_name, seconds in sorted(load_timings.items(), key=lambda item: item[1], reverse=True):
+                st.caption(f"{module_name}: {seconds * 1000:.0f} ms on first use")
+            
+            if st.button("⏱️ Profile Import Times", use_container_width=True):
+                with st.spinner("Importing each module in a fresh interpreter..."):
+                    st.session_state.import_profile = profile_heavy_imports()
+                    st.session_state.cold_start_imports = compare_cold_start_imports()
+            cold_start = st.session_state.get('cold_start_imports')
+            if cold_start:
+                lazy_ms, eager_ms = cold_start['lazy']['ms'], cold_start['eager']['ms']
+                st.markdown(f"**Cold-Start Imports:** {lazy_ms:.0f} ms with lazy imports vs {eager_ms:.0f} ms "
+                            f"for the original eager imports ({eager_ms - lazy_ms:.0f} ms saved per process start)")
+                if cold_start['eager']['missing']:
+                    st.caption(f"Not installed, so not counted: {', '.join(cold_start['eager']['missing'])}")
+            for report in st.session_state.get('import_profile', []):
+                if not report['ok']:
+                    st.caption(f"{report['module']}: unavailable ({report['error']})")
+                    continue
+                heaviest = ", ".join(f"{name} {cumulative_ms:.0f} ms" for name, _, cumulative_ms, depth in report['heaviest'] if depth > 0)
+                st.caption(f"{report['module']}: {report['total_ms']:.0f} ms cold ({report['count']} modules)"
+                           + (f" — {heaviest}" if heaviest else ""))
+        
         # Logout Button
         if st.button("🚪 Logout", use_container_width=True):
             logger.info(f"User '{st.session_state.user}' logging out")
             st.session_state.user = None
+            st.session_state.pop('progress_cache', None)
+            st.session_state.active_jobs = {}
+            st.session_state.jobs_recovered = False
             st.rerun()
     
     # Main Content Area
@@ -1265,6 +1992,7 @@ def execute_function(option, skill_level, topic):
 
 def show_problem_solver(skill_level, topic):
     """Modern problem solver interface"""
+    recover_jobs()
     st.markdown('<div class="card-header"><span class="card-icon">🧮</span><h2 class="card-title">AI Problem Solver</h2></div>', unsafe_allow_html=True)
     
     # Two-column layout
@@ -1283,32 +2011,62 @@ def show_problem_solver(skill_level, topic):
         )
         
         # Solve button
-        if st.button("🚀 Solve Problem", disabled=not problem.strip(), use_container_width=True):
+        solving = 'solve' in st.session_state.active_jobs
+        if st.button("🚀 Solve Problem", disabled=solving or not problem.strip(), use_container_width=True):
             if problem.strip():
-                solve_problem_pipeline(problem, skill_level, topic)
+                start_job('solve', solve_problem_pipeline, problem, skill_level, topic)
+                st.rerun()
             else:
                 display_status_message("warning", "Please enter a math problem first!")
         
+        if solving:
+            show_job_progress('solve')
+        
         st.markdown('</div>', unsafe_allow_html=True)
     
     with col2:
         # st.markdown('<div class="custom-card">', unsafe_allow_html=True)
         st.markdown('<div class="card-header"><span class="card-icon">📋</span><h3 class="card-title">Solution & Results</h3></div>', unsafe_allow_html=True)
         
+        # Outcome of a background job that finished since the last run
+        if 'job_notice' in st.session_state:
+            display_status_message(*st.session_state.pop('job_notice'))
+        
         if st.session_state.solution_text:
             st.markdown("**Step-by-Step Solution:**")
             st.markdown(st.session_state.solution_text)
             
             # Video generation section
             if st.session_state.manim_script and st.session_state.audio_script:
-                if st.button("🎬 Generate Video Explanation", use_container_width=True):
-                    generate_video_explanation()
+                rendering = 'video' in st.session_state.active_jobs
+                if st.button("🎬 Generate Video Explanation", disabled=rendering, use_container_width=True):
+                    try:
+                        render_scheduler.check_admission(st.session_state.user)
+                        start_job('video', generate_video_explanation, st.session_state.manim_script, st.session_state.audio_script)
+                        st.rerun()
+                    except QueueFullError as e:
+                        display_status_message("warning", str(e))
+                if rendering:
+                    show_job_progress('video')
+            
+            # Pipeline stage timings
+            if st.session_state.get('pipeline_timings'):
+                with st.expander("⏱️ Pipeline Timings"):
+                    critical_stages = st.session_state.get('pipeline_critical_path', [])
+                    for stage, (start, end) in st.session_state.pipeline_timings.items():
+                        marker = " ⭐" if stage in critical_stages else ""
+                        st.markdown(f"**{stage}**{marker}: {end - start:.2f}s (started at {start:.2f}s)")
+                    st.caption("⭐ marks the critical path")
             
             # Display video if generated
             if st.session_state.video_generated and 'final_video_path' in st.session_state:
-                st.markdown('<div class="video-container">', unsafe_allow_html=True)
-                st.video(st.session_state.final_video_path)
-                st.markdown('</div>', unsafe_allow_html=True)
+                if os.path.exists(st.session_state.final_video_path):
+                    st.markdown('<div class="video-container">', unsafe_allow_html=True)
+                    st.video(st.session_state.final_video_path)
+                    st.markdown('</div>', unsafe_allow_html=True)
+                else:
+                    # Old workspaces are garbage-collected
+                    st.info("This video has expired. Click 'Generate Video Explanation' to create it again.")
         else:
             st.markdown("""
             <div style="text-align: center; padding: 2rem; color: var(--text-muted);">
@@ -1320,36 +2078,17 @@ def show_problem_solver(skill_level, topic):
         
         st.markdown('</div>', unsafe_allow_html=True)
 
-def solve_problem_pipeline(problem, skill_level, topic):
-    """Execute the complete problem solving pipeline with progress tracking"""
+def solve_problem_pipeline(job, problem, skill_level, topic):
+    """Execute the complete problem solving pipeline as a background job, reporting progress through job"""
     logger.info(f"Starting problem solving pipeline")
     logger.info(f"Problem: {problem[:100]}...")  # Log first 100 chars
     logger.info(f"Skill level: {skill_level}, Topic: {topic}")
     
-    progress_placeholder = st.empty()
-    status_placeholder = st.empty()
-    
     try:
-        # Stage 1: Generate solution
-        logger.info("Stage 1: Generating step-by-step solution")
-        with st.spinner("🧠 Generating step-by-step solution..."):
-            progress_placeholder.progress(20)
-            prompt = f"Solve this {skill_level.lower()} level {topic.lower()} problem step by step, providing detailed explanations for each step. Problem: {problem}"
-            logger.debug(f"Solution prompt length: {len(prompt)} characters")
-            
-            try:
-                response = model.generate_content(prompt)
-                st.session_state.solution_text = response.text
-                logger.info(f"Solution generated successfully, length: {len(response.text)} characters")
-            except Exception as e:
-                logger.error(f"Error generating solution: {str(e)}")
-                raise
+        prompt = f"Solve this {skill_level.lower()} level {topic.lower()} problem step by step, providing detailed explanations for each step. Problem: {problem}"
+        logger.debug(f"Solution prompt length: {len(prompt)} characters")
         
-        # Stage 2: Generate Manim script
-        logger.info("Stage 2: Generating Manim animation script")
-        with st.spinner("🎨 Creating animation script..."):
-            progress_placeholder.progress(50)
-            manim_prompt = f"""
+        manim_prompt = f"""
             ->Generate a Manim animation script that visually explains the given mathematical problem step by step.
                     The animation should include text explanations, dynamic equation transformations, relevant geometrical 
                     or graphical representations (if applicable), and smooth transitions using animations like FadeIn, Transform, 
@@ -1572,29 +2311,49 @@ NOTE!!!: Make sure the objects or text in the generated code are not overlapping
                     
                     Remember, provide ONLY executable code with NO explanatory text or markdown formatting. {problem}
             """
-            
-            logger.debug(f"Manim prompt length: {len(manim_prompt)} characters")
-            
+        
+        logger.debug(f"Manim prompt length: {len(manim_prompt)} characters")
+        
+        # DeepSeek enhancement
+        client_openrouter = get_openrouter_client()
+        
+        # Streamed text is handed from the stage threads to the job thread through this queue
+        stream_events = queue.Queue()
+        
+        def stream_stage(stage, chunks):
+            streamed = []
+            for chunk in chunks:
+                streamed.append(chunk)
+                stream_events.put((stage, chunk))
+            return "".join(streamed)
+        
+        def generate_solution(inputs):
+            """Stage 1: Generate the step-by-step solution"""
+            logger.info("Stage 1: Generating step-by-step solution")
+            try:
+                solution_text = stream_stage("solution", model.stream_content(prompt, feature="problem_solution"))
+                logger.info(f"Solution generated successfully, length: {len(solution_text)} characters")
+                return solution_text
+            except Exception as e:
+                logger.error(f"Error generating solution: {str(e)}")
+                raise
+        
+        def generate_manim_draft(inputs):
+            """Stage 2: Generate the first Manim animation script"""
+            logger.info("Stage 2: Generating Manim animation script")
             try:
-                solution_response = model.generate_content(manim_prompt)
-                st.session_state.manim_script = solution_response.text
+                solution_response = model.generate_content(manim_prompt, feature="manim_draft")
                 logger.info(f"Manim script generated successfully, length: {len(solution_response.text)} characters")
+                return solution_response.text
             except Exception as e:
                 logger.error(f"Error generating Manim script: {str(e)}")
                 raise
         
-        # Stage 3: Enhance with multi-stage AI
-        logger.info("Stage 3: Enhancing with advanced AI models")
-        with st.spinner("🔧 Enhancing with advanced AI models..."):
-            progress_placeholder.progress(80)
-            
-            # DeepSeek enhancement
-            client_openrouter = OpenAI(
-                base_url="https://openrouter.ai/api/v1",
-                api_key=config['openrouter_api_key'],
-            )
-            
-            completion = client_openrouter.chat.completions.create(
+        def enhance_manim_script(inputs):
+            """Stage 3: Enhance the draft script with advanced AI models"""
+            logger.info("Stage 3: Enhancing with advanced AI models")
+            enhanced_script = stream_stage("enhanced_script", client_openrouter.stream_chat_completion(
+                feature="manim_enhance",
                 extra_headers={
                     "HTTP-Referer": "https://neo-ai-tutor.streamlit.app/",
                     "X-Title": "Neo - AI Tutor",
@@ -1619,20 +2378,22 @@ NOTE!!!: Make sure the objects or text in the generated code are not overlapping
                     {
                         "role": "user",
                         "content": f"""enhance the following Manim code in the clean, mathematical style of 3Blue1Brown. The scene should last more than 30 seconds with smooth pacing and no flashy effects. Extend the code with more meaningful lines to make the video longer, while keeping it minimal and elegant. Ensure all brackets are properly opened and closed. Do not exceed the screen space with lines or shapes, and fade out any unnecessary objects smoothly when transitioning between scenes. Output only the corrected and improved Manim code—exclude all explanations and formatting like backticks or \boxed.
-                         Note : If the code creates 3-dimension animation, then the text created for the animation should be in 2-dimension in the animated video {st.session_state.manim_script}"""
+                         Note : If the code creates 3-dimension animation, then the text created for the animation should be in 2-dimension in the animated video {inputs["manim_draft"]}"""
                     }
                 ],
                 max_tokens=4000,
                 temperature=0.3
-            )
-            
-            enhanced_script = completion.choices[0].message.content
-            print(enhanced_script)
-        # Stage 4: Final enhancement with GPT-4 and voiceover
-        with st.spinner("🎙️ Generating audio and video content..."):
-            progress_placeholder.progress(100)
+            ))
             
-            final_completion = client_openrouter.chat.completions.create(
+            logger.debug(f"Enhanced Manim script ({len(enhanced_script)} chars):\n{enhanced_script}")
+            return enhanced_script
+        
+        def polish_manim_script(inputs):
+            """Stage 4: Final enhancement with GPT-4 and voiceover"""
+            logger.info("Stage 4: Final enhancement and voiceover script")
+            enhanced_script = inputs["enhanced_script"]
+            content = stream_stage("final_script", client_openrouter.stream_chat_completion(
+                feature="manim_polish",
                 model="openai/gpt-4o-mini",#openai/gpt-4o-mini
                 messages=[
                     {
@@ -1709,73 +2470,177 @@ Text should not overwrite
                 ],
                 max_tokens=4000,
                 temperature=0.3
-            )
-            
-            content = final_completion.choices[0].message.content
-            print(content)
+            ))
             
-            # Extract Manim code and voiceover script
-            parts = re.split(r'(?i)Voiceover Script:', content, maxsplit=1)
-            if len(parts) == 2:
-                st.session_state.manim_script = parts[0].strip()
-                st.session_state.audio_script = parts[1].strip()
-            else:
-                st.session_state.manim_script = content.strip()
-                st.session_state.audio_script = "No voiceover script generated. Please try again."
-        
-        progress_placeholder.empty()
+            logger.debug(f"Polished Manim script and voiceover ({len(content)} chars):\n{content}")
+            return content
+        
+        # Stages 1 and 2 only need the problem, so they run side by side;
+        # each OpenRouter stage starts as soon as the script it refines is ready
+        pipeline_stages = {
+            "solution": ((), generate_solution),
+            "manim_draft": ((), generate_manim_draft),
+            "enhanced_script": (("manim_draft",), enhance_manim_script),
+            "final_script": (("enhanced_script",), polish_manim_script),
+        }
+        stage_messages = {
+            "solution": "🧠 Step-by-step solution ready",
+            "manim_draft": "🎨 Animation script drafted",
+            "enhanced_script": "🔧 Animation script enhanced",
+            "final_script": "🎙️ Voiceover script written",
+        }
+        stage_activity = {
+            "enhanced_script": "🔧 Enhancing with advanced AI models...",
+            "final_script": "🎙️ Generating audio and video content...",
+        }
+        completed_stages = []
+        streamed_text = {}
+        
+        def on_stage_complete(stage, result):
+            completed_stages.append(stage)
+            job.update(progress=int(100 * len(completed_stages) / len(pipeline_stages)), stage=stage, message=stage_messages[stage])
+            job.set_partial("activity", None)
+        
+        def on_tick():
+            # Publish whatever the stages streamed since the last tick; pollers render it
+            while True:
+                try:
+                    stage, chunk = stream_events.get_nowait()
+                except queue.Empty:
+                    break
+                streamed_text[stage] = streamed_text.get(stage, "") + chunk
+                if stage == "solution":
+                    job.set_partial("solution", streamed_text[stage])
+                elif stage not in completed_stages:
+                    job.set_partial("activity", f"{stage_activity[stage]} ({len(streamed_text[stage]):,} characters received)")
+            # Raising here stops the graph; stages still streaming finish on their own threads
+            job.check_cancelled()
+        
+        job.update(progress=5, message="🧠 Solving the problem and 🎨 creating the animation script...")
+        results, timings = run_stage_graph(pipeline_stages, on_stage_complete, on_tick=on_tick)
+        
+        content = results["final_script"]
+        
+        # Extract Manim code and voiceover script
+        parts = re.split(r'(?i)Voiceover Script:', content, maxsplit=1)
+        if len(parts) == 2:
+            manim_script = parts[0].strip()
+            audio_script = parts[1].strip()
+        else:
+            manim_script = content.strip()
+            audio_script = "No voiceover script generated. Please try again."
+        
+        pipeline_critical_path = critical_path(pipeline_stages, timings)
+        logger.info("Pipeline stage timings: " + ", ".join(
+            f"{stage}={end - start:.2f}s" for stage, (start, end) in timings.items()
+        ))
+        logger.info(f"Pipeline critical path: {' -> '.join(pipeline_critical_path)}")
         logger.info("Problem solving pipeline completed successfully")
-        display_status_message("success", "Problem solved successfully! Click 'Generate Video Explanation' to create the video.")
         
+        return {
+            "solution_text": results["solution"],
+            "manim_script": manim_script,
+            "audio_script": audio_script,
+            "timings": timings,
+            "critical_path": pipeline_critical_path,
+        }
+        
+    except JobCancelled:
+        logger.info("Problem solving pipeline cancelled")
+        raise
     except Exception as e:
-        progress_placeholder.empty()
         logger.error(f"Error in problem solving pipeline: {str(e)}")
-        logger.error(f"Traceback: {traceback.format_exc()}")
-        display_status_message("error", f"An error occurred: {str(e)}")
+        raise
 
-def generate_video_explanation():
-    """Generate the complete video explanation with progress tracking"""
+def release_workspace_when_done(workspace, futures):
+    """Hand a workspace back to the garbage collector once no stage thread is still writing into it"""
+    in_flight = [future for future in futures if not future.done()]
+    if not in_flight:
+        workspace_manager.release(workspace)
+        return
+    
+    logger.info(f"Keeping workspace {workspace} until {len(in_flight)} running stage(s) finish")
+    
+    def on_done(_):
+        # Release is idempotent, so two stages finishing together may both release
+        if all(future.done() for future in in_flight):
+            workspace_manager.release(workspace)
+    
+    for future in in_flight:
+        future.add_done_callback(on_done)
+
+def generate_video_explanation(job, manim_script, audio_script):
+    """Generate the complete video explanation as a background job, reporting progress through job"""
     logger.info("Starting video explanation generation")
     
+    def on_queue(position, eta):
+        job.set_partial("activity", f"🕒 Waiting for a render slot: #{position} in the queue, "
+                                    f"video ready in about {format_duration(eta)}")
+        job.check_cancelled()
+    
+    # Everything this job writes goes into its own workspace, reclaimed later by the garbage collector
+    workspace = workspace_manager.create("video")
+    logger.info(f"Video job workspace: {workspace}")
+    stage_futures = {}
+    
     try:
-        progress_placeholder = st.empty()
-        
-        logger.info("Stage 1: Generating Manim animation")
-        with st.spinner("🎨 Generating Manim animation..."):
-            progress_placeholder.progress(33)
-            video_path = generate_manim_video(st.session_state.manim_script)
-            if not video_path:
-                logger.error("Failed to generate Manim video")
-                raise Exception("Failed to generate Manim video")
-            logger.info(f"Manim video generated: {video_path}")
-        
-        logger.info("Stage 2: Synthesizing audio narration")
-        with st.spinner("🎙️ Synthesizing audio narration..."):
-            progress_placeholder.progress(66)
-            audio_path = synthesize_audio(st.session_state.audio_script)
-            if not audio_path:
-                logger.error("Failed to synthesize audio")
-                raise Exception("Failed to synthesize audio")
-            logger.info(f"Audio synthesized: {audio_path}")
-        
-        logger.info("Stage 3: Combining video and audio")
-        with st.spinner("🎬 Combining video and audio..."):
-            progress_placeholder.progress(100)
-            final_video_path = combine_video_audio(video_path, audio_path)
-            logger.info(f"Final video created: {final_video_path}")
-        
-        st.session_state.final_video_path = final_video_path
-        st.session_state.video_generated = True
-        
-        progress_placeholder.empty()
+        # The narration only depends on the audio script, so it is voiced while the video renders
+        logger.info("Stage 1: Generating Manim animation and synthesizing audio narration in parallel")
+        job.update(progress=10, message="🎨 Generating Manim animation and 🎙️ synthesizing audio narration...")
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix="video-explanation")
+        try:
+            stage_futures = {
+                executor.submit(generate_manim_video, manim_script, owner=job.owner, on_queue=on_queue, workspace=workspace,
+                                cancelled=lambda: job.cancelled): "video",
+                executor.submit(synthesize_audio, audio_script, os.path.join(workspace, "explanation_audio.mp3")): "audio",
+            }
+            results = {}
+            pending = set(stage_futures)
+            while pending:
+                # Wake up periodically so a cancellation is noticed while both branches are busy
+                done, pending = concurrent.futures.wait(pending, timeout=0.5, return_when=concurrent.futures.FIRST_COMPLETED)
+                job.check_cancelled()
+                for future in done:
+                    stage = stage_futures[future]
+                    results[stage] = future.result()
+                    
+                    if stage == "video":
+                        if not results[stage]:
+                            logger.error("Failed to generate Manim video")
+                            raise Exception("Failed to generate Manim video")
+                        logger.info(f"Manim video generated: {results[stage]}")
+                        job.set_partial("activity", None)
+                        job.update(progress=10 + 30 * len(results), stage=stage, message="✅ Manim animation rendered")
+                    else:
+                        if not results[stage]:
+                            logger.error("Failed to synthesize audio")
+                            raise Exception("Failed to synthesize audio")
+                        logger.info(f"Audio synthesized: {results[stage]}")
+                        job.update(progress=10 + 30 * len(results), stage=stage, message="✅ Audio narration synthesized")
+        finally:
+            # Do not wait on the other branch once one of them has failed or the job was cancelled;
+            # it keeps the workspace in use until it returns (see release_workspace_when_done)
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        video_path = results["video"]
+        audio_path = results["audio"]
+        
+        logger.info("Stage 2: Combining video and audio")
+        job.update(progress=90, stage="combine", message="🎬 Combining video and audio...")
+        final_video_path = combine_video_audio(video_path, audio_path, os.path.join(workspace, "final_explanation.mp4"))
+        logger.info(f"Final video created: {final_video_path}")
+        
         logger.info("Video explanation generation completed successfully")
-        display_status_message("success", "Video generated successfully!")
-        st.rerun()
+        return {"final_video_path": final_video_path}
         
+    except JobCancelled:
+        logger.info("Video explanation generation cancelled")
+        raise
     except Exception as e:
         logger.error(f"Video generation failed: {str(e)}")
-        logger.error(f"Traceback: {traceback.format_exc()}")
-        display_status_message("error", f"Video generation failed: {str(e)}")
+        raise
+    finally:
+        release_workspace_when_done(workspace, stage_futures)
 
 def show_handwritten_solver(skill_level, topic):
     """Handwritten problem solver interface"""
@@ -1788,11 +2653,6 @@ def show_handwritten_solver(skill_level, topic):
         help="Take a clear photo of your handwritten math problem"
     )
     
-    def extract_text_from_image(uploaded_file):
-        image = Image.open(uploaded_file)
-        text = pytesseract.image_to_string(image)
-        return text.strip()
-
     if uploaded_file is not None:
         col1, col2 = st.columns([1, 1])
         
@@ -1806,7 +2666,7 @@ def show_handwritten_solver(skill_level, topic):
             
             if extracted_text and st.button("🚀 Solve Problem", use_container_width=True):
                 prompt = f"""Solve this {skill_level.lower()} level {topic.lower()} problem step by step, providing detailed explanations for each step. Problem: {extracted_text}"""
-                response = model.generate_content(prompt)
+                response = model.generate_content(prompt, feature="handwritten_solution")
                 
                 st.markdown("**Step-by-Step Solution:**")
                 render_math(response.text)
@@ -1831,7 +2691,7 @@ def show_practice_questions(skill_level, topic):
             Q: [question]\nS: [solution]\nSeparate each question-answer pair with a blank line."""
             
             try:
-                response = model.generate_content(prompt)
+                response = model.generate_content(prompt, feature="practice_questions")
                 if not response or not hasattr(response, 'text'):
                     display_status_message("error", "API response blocked or invalid. Please try again.")
                     return
@@ -1875,7 +2735,7 @@ def show_practice_questions(skill_level, topic):
                             User's Solution: {user_solution.strip()}
                             Provide constructive feedback and suggestions for improvement."""
                             try:
-                                feedback = model.generate_content(feedback_prompt)
+                                feedback = model.generate_content(feedback_prompt, feature="practice_feedback")
                                 st.write("**Feedback:**")
                                 st.write(feedback.text)
                             except Exception as e:
@@ -1915,11 +2775,11 @@ def show_concept_explorer(skill_level):
                 7. Advanced implications (if applicable)"""
                 
                 try:
-                    response = model.generate_content(prompt)
-                    if not response or not hasattr(response, 'text'):
+                    explanation = stream_response(col2, model.stream_content(prompt, feature="concept_explorer"), "Concept Explanation")
+                    if not explanation:
                         display_status_message("error", "API response blocked or invalid. Please try again.")
                         return
-                    st.session_state.concept_explanation = response.text
+                    st.session_state.concept_explanation = explanation
                     update_progress(st.session_state.user, concept)
                     display_status_message("success", f"Concept '{concept}' explored successfully!")
                 except Exception as e:
@@ -1967,7 +2827,7 @@ def show_formula_generator(skill_level):
                 5. Any important conditions or limitations"""
                 
                 try:
-                    response = model.generate_content(prompt)
+                    response = model.generate_content(prompt, feature="formula_generator")
                     if not response or not hasattr(response, 'text'):
                         display_status_message("error", "API response blocked or invalid. Please try again.")
                         return
@@ -2027,7 +2887,7 @@ def show_quiz(skill_level, topic):
 
                 Separate each question with a blank line.
                 """
-                response = model.generate_content(prompt)
+                response = model.generate_content(prompt, feature="quiz")
                 quiz_text = response.text.strip()
 
                 try:
@@ -2096,10 +2956,18 @@ def show_quiz(skill_level, topic):
             
             if st.button("📝 Submit Quiz", use_container_width=True):
                 correct_count = 0
+                answers = []
                 
                 for i, question_data in enumerate(st.session_state.quiz_data):
+                    is_correct = bool(question_data["user_answer"]) and question_data["user_answer"].startswith(question_data["correct_answer"])
+                    answers.append({
+                        "question": question_data["question"],
+                        "answer": question_data["user_answer"],
+                        "correct_answer": question_data["correct_answer"],
+                        "correct": is_correct
+                    })
                     if question_data["user_answer"]:
-                        if question_data["user_answer"].startswith(question_data["correct_answer"]):
+                        if is_correct:
                             display_status_message("success", f"Q{i+1}: Correct!")
                             correct_count += 1
                         else:
@@ -2108,7 +2976,7 @@ def show_quiz(skill_level, topic):
 
                 score = (correct_count / len(st.session_state.quiz_data)) * 100
                 st.markdown(f'<div class="metric-card"><div class="metric-value">{score:.0f}%</div><div class="metric-label">Your Score</div></div>', unsafe_allow_html=True)
-                update_progress(st.session_state.user, topic, score)
+                update_progress(st.session_state.user, topic, score, answers=answers)
             
             st.markdown('</div>', unsafe_allow_html=True)
         else:
@@ -2146,7 +3014,7 @@ def show_video_recommendations():
                 Don't generate the script in json format"""
                 
                 try:
-                    interpretation = model.generate_content(prompt)
+                    interpretation = model.generate_content(prompt, feature="video_recommendations")
                     st.session_state.video_recommendations = interpretation.text
                     display_status_message("success", f"Found video recommendations for '{search_topic}'!")
                 except Exception as e:
@@ -2316,13 +3184,13 @@ def show_historical_context():
                 4. Interesting anecdotes or lesser-known facts"""
 
                 try:
-                    historical_context = model.generate_content(prompt)
-                    if historical_context and hasattr(historical_context, 'text'):
-                        st.session_state.historical_context = historical_context.text
+                    historical_context = stream_response(col2, model.stream_content(prompt, feature="historical_context"), "Historical Insights")
+                    if historical_context:
+                        st.session_state.historical_context = historical_context
                         
                         # Fun fact section
                         fun_fact_prompt = f"Give an unusual or fun fact about '{historical_topic}' in mathematics."
-                        fun_fact = model.generate_content(fun_fact_prompt)
+                        fun_fact = model.generate_content(fun_fact_prompt, feature="historical_fun_fact")
                         if fun_fact and hasattr(fun_fact, 'text'):
                             st.session_state.fun_fact = fun_fact.text
                         
@@ -2378,7 +3246,7 @@ def show_real_world_applications(skill_level, topic):
             4. Practical takeaways for students or professionals in {application_area}.
             5. A historical or fun fact related to {topic} in {application_area} to make learning interesting."""
             
-            scenario = model.generate_content(prompt)
+            scenario = model.generate_content(prompt, feature="real_world_scenario")
             
             if scenario and hasattr(scenario, 'text'):
                 st.session_state.generated_scenario = scenario.text
@@ -2389,7 +3257,7 @@ def show_real_world_applications(skill_level, topic):
                 {st.session_state.generated_scenario}
                 Ensure the questions test the mathematical concepts applied in the scenario."""
                 
-                questions = model.generate_content(question_prompt)
+                questions = model.generate_content(question_prompt, feature="real_world_questions")
                 
                 if questions and hasattr(questions, 'text'):
                     st.session_state.generated_questions = questions.text
@@ -2420,7 +3288,7 @@ def show_real_world_applications(skill_level, topic):
             sample_question_prompt = f"""Generate a worked-out example based on the following real-world scenario:
             {st.session_state.generated_scenario}
             Provide a step-by-step solution explaining the mathematical concepts applied."""
-            sample_solution = model.generate_content(sample_question_prompt)
+            sample_solution = model.generate_content(sample_question_prompt, feature="real_world_sample")
             
             if sample_solution and hasattr(sample_solution, 'text'):
                 st.write(sample_solution.text)
@@ -2471,8 +3339,8 @@ def show_study_plan_generator(skill_level):
                 - Define clear checkpoints to measure progress, with mini-tests or self-assessments."""
                 
                 try:
-                    study_plan = model.generate_content(prompt)
-                    st.session_state.study_plan = study_plan.text
+                    study_plan = stream_response(col2, model.stream_content(prompt, feature="study_plan"), "Your Personalized Study Plan")
+                    st.session_state.study_plan = study_plan
                     display_status_message("success", f"Study plan for '{study_goal}' generated!")
                 except Exception as e:
                     display_status_message("error", f"Error generating study plan: {e}")
@@ -2502,6 +3370,8 @@ def show_performance_analytics():
     st.markdown('<div class="card-header"><span class="card-icon">📈</span><h2 class="card-title">Performance Analytics</h2></div>', unsafe_allow_html=True)
     
     progress = get_progress(st.session_state.user)
+    quiz_stats = get_quiz_stats(st.session_state.user)
+    topic_mastery = get_topic_mastery(st.session_state.user)
     
     # Metrics Row
     col1, col2, col3, col4 = st.columns(4)
@@ -2511,14 +3381,14 @@ def show_performance_analytics():
         st.markdown(f'<div class="metric-card"><div class="metric-value">{topics_completed}</div><div class="metric-label">Topics Completed</div></div>', unsafe_allow_html=True)
     
     with col2:
-        if progress['quiz_scores']:
-            avg_score = sum(progress['quiz_scores'].values()) / len(progress['quiz_scores'])
-            st.markdown(f'<div class="metric-card"><div class="metric-value">{avg_score:.1f}%</div><div class="metric-label">Avg Quiz Score</div></div>', unsafe_allow_html=True)
+        if quiz_stats:
+            trend_arrow = "▲" if quiz_stats['trend'] > 0.5 else "▼" if quiz_stats['trend'] < -0.5 else "▶"
+            st.markdown(f'<div class="metric-card"><div class="metric-value">{quiz_stats["avg_score"]:.1f}% {trend_arrow}</div><div class="metric-label">Avg Quiz Score</div></div>', unsafe_allow_html=True)
         else:
             st.markdown('<div class="metric-card"><div class="metric-value">-</div><div class="metric-label">Avg Quiz Score</div></div>', unsafe_allow_html=True)
     
     with col3:
-        quiz_count = len(progress['quiz_scores'])
+        quiz_count = quiz_stats['attempts'] if quiz_stats else 0
         st.markdown(f'<div class="metric-card"><div class="metric-value">{quiz_count}</div><div class="metric-label">Quizzes Taken</div></div>', unsafe_allow_html=True)
     
     with col4:
@@ -2533,15 +3403,10 @@ def show_performance_analytics():
         st.markdown('<div class="card-header"><h3 class="card-title">Topic Completion</h3></div>', unsafe_allow_html=True)
         
         if progress['completed_topics']:
-            topic_completion = pd.DataFrame({
-                'Topic': progress['completed_topics'],
-                'Completed': [1] * len(progress['completed_topics'])
-            })
-            
             fig_completion = px.bar(
-                topic_completion, 
-                x='Topic', 
-                y='Completed', 
+                x=progress['completed_topics'], 
+                y=[1] * len(progress['completed_topics']), 
+                labels={'x': 'Topic', 'y': 'Completed'},
                 title='Completed Topics',
                 color_discrete_sequence=['#2563eb']
             )
@@ -2565,16 +3430,13 @@ def show_performance_analytics():
       #  st.markdown('<div class="custom-card">', unsafe_allow_html=True)
         st.markdown('<div class="card-header"><h3 class="card-title">Quiz Performance</h3></div>', unsafe_allow_html=True)
         
-        if progress['quiz_scores']:
-            quiz_scores = pd.DataFrame({
-                'Topic': list(progress['quiz_scores'].keys()),
-                'Score': list(progress['quiz_scores'].values())
-            })
-            
+        if topic_mastery:
+            quiz_history = get_quiz_history(st.session_state.user)
             fig_scores = px.line(
-                quiz_scores, 
-                x='Topic', 
-                y='Score', 
+                x=[datetime.fromtimestamp(attempt['attempted_at']) for attempt in quiz_history], 
+                y=[attempt['score'] for attempt in quiz_history], 
+                hover_name=[attempt['topic'] for attempt in quiz_history],
+                labels={'x': 'Attempt', 'y': 'Score'},
                 title='Quiz Scores Trend', 
                 markers=True,
                 color_discrete_sequence=['#10b981']
@@ -2586,9 +3448,10 @@ def show_performance_analytics():
             st.plotly_chart(fig_scores, use_container_width=True)
             
             # Strengths and weaknesses
+            # Mastery is a recency-weighted score per topic, maintained on every quiz submit
             strength_threshold = 70
-            weaknesses = quiz_scores[quiz_scores['Score'] < strength_threshold]['Topic'].tolist()
-            strengths = quiz_scores[quiz_scores['Score'] >= strength_threshold]['Topic'].tolist()
+            weaknesses = [row['topic'] for row in topic_mastery if row['mastery'] < strength_threshold]
+            strengths = [row['topic'] for row in topic_mastery if row['mastery'] >= strength_threshold]
             
             if strengths:
                 st.markdown("**🎯 Strengths:**")
@@ -2613,10 +3476,15 @@ def show_performance_analytics():
 # RUN APPLICATION
 # ================================
 
+# Everything above this point is bootstrap; record its cost for the diagnostics panel
+rerun_metrics = get_rerun_metrics()
+bootstrap_ms = (time.perf_counter() - rerun_started) * 1000
+if rerun_metrics["first_run_ms"] is None:
+    rerun_metrics["first_run_ms"] = bootstrap_ms
+    logger.info(f"First run bootstrap took {bootstrap_ms:.1f} ms")
+else:
+    rerun_metrics["rerun_ms"].append(bootstrap_ms)
+    logger.debug(f"Rerun bootstrap took {bootstrap_ms:.1f} ms")
+
 if __name__ == "__main__":
     main()
-
-# Close database connection
-logger.info("Closing database connection")
-conn.close()
-logger.info("Neo AI Tutor application shutdown complete")
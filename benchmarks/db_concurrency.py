@@ -0,0 +1,152 @@
+"""Concurrency benchmark for the user/progress store.
+
+Simulates N Streamlit sessions, each on its own thread, issuing a mix of
+logins, progress reads and progress writes against a scratch database, and
+reports throughput, latency percentiles and errors. `--mode legacy` replays
+the same workload through a single shared connection and cursor, the way the
+app accessed SQLite before storage.py, serialized behind one lock (sharing the
+cursor across threads without it can crash the interpreter).
+
+    python benchmarks/db_concurrency.py --sessions 16 --ops 500 --write-ratio 0.3
+    python benchmarks/db_concurrency.py --backend postgres --database-url postgresql://localhost/neo_bench
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from storage import create_store, default_progress  # noqa: E402
+
+TOPICS = ["Algebra", "Geometry", "Calculus", "Trigonometry", "Statistics", "Probability"]
+
+
+class LegacyStore:
+    """The pre-storage.py access pattern: one connection and one cursor shared by every thread"""
+
+    def __init__(self, db_path):
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.c = self.conn.cursor()
+        self.c.execute("CREATE TABLE IF NOT EXISTS users (username TEXT PRIMARY KEY, password TEXT, progress TEXT)")
+        self.conn.commit()
+
+    def check_user(self, username, password_hash):
+        with self.lock:
+            self.c.execute("SELECT * FROM users WHERE username=? AND password=?", (username, password_hash))
+            return self.c.fetchone() is not None
+
+    def create_user(self, username, password_hash):
+        with self.lock:
+            self.c.execute("INSERT INTO users (username, password, progress) VALUES (?, ?, ?)",
+                           (username, password_hash, json.dumps(default_progress())))
+            self.conn.commit()
+            return True
+
+    def get_progress(self, username):
+        with self.lock:
+            self.c.execute("SELECT progress FROM users WHERE username=?", (username,))
+            row = self.c.fetchone()
+            return json.loads(row[0]) if row and row[0] else default_progress()
+
+    def update_progress(self, username, topic, score=None, practice_set=None):
+        with self.lock:
+            progress = self.get_progress(username)
+            if topic not in progress["completed_topics"]:
+                progress["completed_topics"].append(topic)
+            if score is not None:
+                progress["quiz_scores"][topic] = score
+            self.c.execute("UPDATE users SET progress=? WHERE username=?", (json.dumps(progress), username))
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def run_session(store, username, ops, write_ratio, seed, latencies, errors):
+    rng = random.Random(seed)
+    password_hash = hashlib.sha256(username.encode()).hexdigest()
+    for _ in range(ops):
+        roll = rng.random()
+        started = time.perf_counter()
+        try:
+            if roll < write_ratio:
+                score = rng.randint(0, 100) if rng.random() < 0.5 else None
+                store.update_progress(username, rng.choice(TOPICS), score)
+                kind = "write"
+            elif roll < write_ratio + (1 - write_ratio) / 4:
+                store.check_user(username, password_hash)
+                kind = "login"
+            else:
+                store.get_progress(username)
+                kind = "read"
+            latencies.append((kind, time.perf_counter() - started))
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=16, help="concurrent sessions (threads)")
+    parser.add_argument("--ops", type=int, default=500, help="operations per session")
+    parser.add_argument("--write-ratio", type=float, default=0.3, help="fraction of operations that write")
+    parser.add_argument("--mode", choices=["store", "legacy"], default="store")
+    parser.add_argument("--backend", choices=["sqlite", "postgres"], default="sqlite")
+    parser.add_argument("--database-url", help="PostgreSQL DSN for --backend postgres (use a scratch database)")
+    parser.add_argument("--pool-size", type=int, default=8)
+    parser.add_argument("--busy-timeout-ms", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db_path = os.path.join(workdir, "bench.db")
+        if args.mode == "store":
+            store = create_store(args.backend, db_path, args.database_url, args.pool_size, args.busy_timeout_ms)
+        else:
+            store = LegacyStore(db_path)
+
+        # A per-run prefix keeps repeated runs against a persistent PostgreSQL database independent
+        run_id = os.urandom(4).hex()
+        usernames = [f"bench_{run_id}_{i}" for i in range(args.sessions)]
+        for username in usernames:
+            store.create_user(username, hashlib.sha256(username.encode()).hexdigest())
+
+        latencies, errors = [], []
+        threads = [
+            threading.Thread(target=run_session, args=(store, username, args.ops, args.write_ratio, i, latencies, errors))
+            for i, username in enumerate(usernames)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        store.close()
+
+    print(f"mode={args.mode} backend={args.backend if args.mode == 'store' else 'sqlite'} sessions={args.sessions} ops/session={args.ops} write_ratio={args.write_ratio}")
+    print(f"completed {len(latencies)} ops in {elapsed:.2f}s -> {len(latencies) / elapsed:.0f} ops/s, {len(errors)} errors")
+    for kind in ("login", "read", "write"):
+        samples = [seconds * 1000 for op, seconds in latencies if op == kind]
+        if samples:
+            print(f"  {kind:<5} n={len(samples):<6} p50={statistics.median(samples):.2f}ms "
+                  f"p95={percentile(samples, 0.95):.2f}ms p99={percentile(samples, 0.99):.2f}ms max={max(samples):.2f}ms")
+    for error in sorted(set(errors))[:5]:
+        print(f"  error: {error}")
+
+
+if __name__ == "__main__":
+    main()
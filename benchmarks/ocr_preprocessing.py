@@ -0,0 +1,158 @@
+"""OCR latency and accuracy: Tesseract on raw uploads vs on preprocessed pages.
+
+Reads every image in a fixture directory that has a ground-truth transcript next
+to it (photo.jpg + photo.txt). Each image goes through Tesseract once as
+uploaded and once after ocr.preprocess_image. For both, the script reports the
+mean time per image and the character error rate (CER), which is the edit
+distance between the OCR output and the transcript, divided by the transcript
+length. Whitespace is collapsed before comparing. The preprocessing time is
+also broken down step by step.
+
+If you have no fixtures, `--synthetic N` writes N phone-photo-like pages into a
+temporary directory. They are rendered math problems that are shaded, rotated
+and framed by the edge of the page. They are printed, not handwritten, so use
+real photos for accuracy numbers and the synthetic set for timing and smoke
+tests. Needs the tesseract binary on PATH.
+
+    python benchmarks/ocr_preprocessing.py --fixtures path/to/photos
+    python benchmarks/ocr_preprocessing.py --synthetic 10 --psm 6 --dpi 150 200 300
+"""
+import argparse
+import random
+import re
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+import pytesseract  # noqa: E402
+from PIL import Image, ImageDraw, ImageFont  # noqa: E402
+
+import ocr  # noqa: E402
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp", ".tif", ".tiff", ".bmp"}
+
+PROBLEMS = [
+    "Solve 2x + 5 = 13 for x",
+    "Find the derivative of x^2 sin x",
+    "Integrate 3x^2 from 0 to 2",
+    "A train travels 120 km in 1.5 hours",
+    "What is its average speed?",
+    "Factor x^2 - 5x + 6",
+    "Simplify (3a + 2b) - (a - 4b)",
+    "The area of a circle is 50 cm^2",
+    "Find its radius to two decimal places",
+]
+
+
+def edit_distance(a, b):
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def normalize(text):
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def character_error_rate(recognized, reference):
+    reference = normalize(reference)
+    return edit_distance(normalize(recognized), reference) / max(1, len(reference))
+
+
+def load_font(size):
+    try:
+        return ImageFont.truetype("DejaVuSans.ttf", size)
+    except OSError:
+        return ImageFont.load_default(size=size)
+
+
+def synthetic_page(rng, path):
+    """Render a few problem lines onto a shaded, rotated 'photo' and write the transcript next to it"""
+    lines = rng.sample(PROBLEMS, rng.randint(2, 4))
+    width, height = 3000, 2000
+    page = Image.new("RGB", (width, height), (225, 218, 195))
+    draw = ImageDraw.Draw(page)
+    font = load_font(rng.randint(50, 70))
+    left, top = rng.randint(150, 900), rng.randint(200, 900)
+    for index, line in enumerate(lines):
+        draw.text((left, top + index * 110), line, fill=(30, 30, 70), font=font)
+
+    # Uneven lighting: darken one side, as a phone held at an angle does
+    shading = np.linspace(rng.uniform(0.55, 0.8), 1.0, width)
+    if rng.random() < 0.5:
+        shading = shading[::-1]
+    pixels = np.asarray(page, dtype=np.float64) * shading[None, :, None]
+    photo = Image.fromarray(pixels.clip(0, 255).astype(np.uint8))
+    photo = photo.rotate(rng.uniform(-6, 6), resample=Image.Resampling.BICUBIC, expand=True, fillcolor=(80, 80, 80))
+    photo.save(path, quality=85)
+    path.with_suffix(".txt").write_text("\n".join(lines), encoding="utf-8")
+
+
+def fixtures(directory):
+    for path in sorted(Path(directory).iterdir()):
+        transcript = path.with_suffix(".txt")
+        if path.suffix.lower() in IMAGE_SUFFIXES and transcript.exists():
+            yield path, transcript.read_text(encoding="utf-8")
+
+
+def run(label, images, prepare, tesseract_config):
+    seconds, errors, steps = [], [], {}
+    for image, reference in images:
+        started = time.perf_counter()
+        prepared, timings = prepare(image)
+        recognized = pytesseract.image_to_string(prepared, config=tesseract_config)
+        seconds.append(time.perf_counter() - started)
+        errors.append(character_error_rate(recognized, reference))
+        for step, duration in timings.items():
+            steps.setdefault(step, []).append(duration)
+    breakdown = " ".join(f"{step}={statistics.mean(durations) * 1000:.0f}ms" for step, durations in steps.items())
+    print(f"{label:<17} {statistics.mean(seconds):>8.2f}s {statistics.mean(errors):>7.1%}  {breakdown}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--fixtures", help="directory of images with same-named .txt transcripts")
+    source.add_argument("--synthetic", type=int, metavar="N", help="generate N synthetic photos instead")
+    parser.add_argument("--dpi", type=int, nargs="+", default=[200], help="target DPIs to compare")
+    parser.add_argument("--psm", type=int, default=6)
+    parser.add_argument("--oem", type=int, default=3)
+    parser.add_argument("--extra-config", default="")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tesseract_config = ocr.tesseract_config(args.psm, args.oem, args.extra_config)
+    with tempfile.TemporaryDirectory() as workdir:
+        directory = args.fixtures
+        if args.synthetic:
+            rng = random.Random(args.seed)
+            for index in range(args.synthetic):
+                synthetic_page(rng, Path(workdir) / f"page_{index:03d}.jpg")
+            directory = workdir
+
+        images = []
+        for path, reference in fixtures(directory):
+            with Image.open(path) as image:
+                image.load()
+                images.append((image, reference))
+        if not images:
+            parser.error(f"no images with .txt transcripts in {directory}")
+
+        print(f"images={len(images)} tesseract_config='{tesseract_config}'")
+        print(f"{'pipeline':<17} {'mean time':>9} {'CER':>7}")
+        run("raw", images, lambda image: (image, {}), tesseract_config)
+        for dpi in args.dpi:
+            run(f"preprocessed@{dpi}", images, lambda image: ocr.preprocess_image(image, dpi), tesseract_config)
+
+
+if __name__ == "__main__":
+    main()
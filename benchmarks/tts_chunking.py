@@ -0,0 +1,105 @@
+"""Narration synthesis latency: one sequential request chain vs sentence-chunked parallel synthesis.
+
+For each script length, voices the same narration once as a single synthesis
+call and once through narration.synthesize_narration, and reports wall-clock
+latency and speed-up. `--engine simulated` (the default) models gTTS, which
+splits text into ~100 character requests and sends them one after another, with
+a fixed per-request latency, so runs are repeatable offline. `--engine espeak`
+runs the local espeak-ng engine (hermetic, needs espeak-ng and ffmpeg) and
+`--engine gtts` calls the real service.
+
+    python benchmarks/tts_chunking.py --lengths 250 1000 2000 4000 --workers 4
+    python benchmarks/tts_chunking.py --engine espeak --lengths 500 2000
+    python benchmarks/tts_chunking.py --engine gtts --lengths 500 2000 --repeat 1
+"""
+import argparse
+import importlib
+import math
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from narration import synthesize_narration  # noqa: E402
+from tts_engines import EspeakEngine, GTTSEngine  # noqa: E402
+
+SENTENCES = [
+    "We start with the equation two x plus five equals thirteen.",
+    "To isolate the term with x, we subtract five from both sides.",
+    "This leaves two x equals eight.",
+    "Dividing both sides by two gives x equals four.",
+    "We can check the answer by substituting four back into the original equation.",
+    "Two times four is eight, and eight plus five is thirteen, so the solution is correct.",
+]
+
+
+def narration_of_length(length):
+    sentences = []
+    while len(" ".join(sentences)) < length:
+        sentences.append(SENTENCES[len(sentences) % len(SENTENCES)])
+    return " ".join(sentences)
+
+
+def simulated_engine(request_latency):
+    def synthesize(text, path):
+        # gTTS sends one request per ~100 characters, sequentially
+        time.sleep(request_latency * math.ceil(len(text) / 100))
+        with open(path, "wb") as output:
+            output.write(b"\xff\xfb\x90\x00" * len(text))
+    return synthesize
+
+
+def engine_function(engine, lang):
+    def synthesize(text, path):
+        engine.synthesize(text, path, lang)
+    return synthesize
+
+
+def timed(function):
+    started = time.perf_counter()
+    function()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[250, 1000, 2000, 4000], help="narration lengths in characters")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--chunk-chars", type=int, default=250)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per length; the median is reported")
+    parser.add_argument("--engine", choices=["simulated", "espeak", "gtts"], default="simulated")
+    parser.add_argument("--request-latency", type=float, default=0.3, help="seconds per ~100 character request (simulated engine)")
+    parser.add_argument("--lang", default="en")
+    args = parser.parse_args()
+
+    if args.engine == "simulated":
+        synthesize = simulated_engine(args.request_latency)
+    elif args.engine == "espeak":
+        espeak_path = shutil.which("espeak-ng") or shutil.which("espeak")
+        if not espeak_path or not shutil.which("ffmpeg"):
+            parser.error("--engine espeak needs espeak-ng and ffmpeg on PATH")
+        synthesize = engine_function(EspeakEngine(espeak_path, shutil.which("ffmpeg")), args.lang)
+    else:
+        synthesize = engine_function(GTTSEngine(importlib.import_module("gtts")), args.lang)
+
+    print(f"engine={args.engine} workers={args.workers} chunk_chars={args.chunk_chars} repeat={args.repeat}")
+    print(f"{'chars':>6} {'sequential':>11} {'chunked':>9} {'speed-up':>9}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for length in args.lengths:
+            text = narration_of_length(length)
+            output_path = os.path.join(workdir, f"narration_{length}.mp3")
+            sequential = statistics.median(timed(lambda: synthesize(text, output_path)) for _ in range(args.repeat))
+            chunked = statistics.median(
+                timed(lambda: synthesize_narration(text, synthesize, output_path, args.workers, args.chunk_chars))
+                for _ in range(args.repeat)
+            )
+            print(f"{len(text):>6} {sequential:>10.2f}s {chunked:>8.2f}s {sequential / chunked:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""Background job runner for long pipelines.
+
+Jobs run on a process-wide thread pool instead of the Streamlit script thread,
+so they keep going across reruns and websocket reconnects while the session
+polls for their state. Each job's status, progress, stage, result and error are
+persisted in SQLite, which lets a new session find the user's latest job and
+pick up its result. Jobs stop cooperatively: cancel() sets a flag that the job
+checks through JobContext.check_cancelled().
+"""
+import concurrent.futures
+import json
+import logging
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+
+logger = logging.getLogger("NeoAITutor")
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when the user cancelled it"""
+
+
+class JobContext:
+    """Handle a running job uses to report progress and check for cancellation"""
+
+    def __init__(self, runner, job_id, owner):
+        self.runner = runner
+        self.job_id = job_id
+        self.owner = owner
+        self._cancel_event = threading.Event()
+        self.partial = {}
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise JobCancelled(f"Job {self.job_id} was cancelled")
+
+    def update(self, progress=None, stage=None, message=None):
+        """Record progress (0-100), the current stage and a status message"""
+        self.runner._update(self.job_id, progress=progress, stage=stage, message=message)
+
+    def set_partial(self, key, value):
+        """Publish intermediate output, such as streamed text, to pollers (kept in memory only)"""
+        self.partial[key] = value
+
+
+class JobRunner:
+    """Runs jobs on a thread pool and persists their state"""
+
+    def __init__(self, db_path, max_workers=4, retention_hours=24):
+        self.db_path = db_path
+        self.retention_seconds = retention_hours * 3600
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._contexts = {}
+        self._closed = False
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                owner TEXT,
+                status TEXT NOT NULL,
+                progress REAL DEFAULT 0,
+                stage TEXT,
+                message TEXT,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_owner_kind ON jobs (owner, kind, created_at)")
+        # Jobs from a previous process cannot be resumed; mark them so pollers stop waiting
+        interrupted = self._conn.execute(
+            "UPDATE jobs SET status='interrupted', error='The server restarted while this job was running', "
+            "finished_at=? WHERE status IN ('queued', 'running')", (time.time(),)
+        ).rowcount
+        self._conn.execute("DELETE FROM jobs WHERE created_at < ?", (time.time() - self.retention_seconds,))
+        self._conn.commit()
+        logger.info(f"Job runner ready with {max_workers} worker(s), {interrupted} interrupted job(s) from a previous run")
+        # concurrent.futures joins its worker threads before atexit hooks run, so a plain atexit hook
+        # would only cancel jobs after the process had already waited for them to finish
+        threading._register_atexit(self.shutdown)
+
+    def _update(self, job_id, **fields):
+        fields = {name: value for name, value in fields.items() if value is not None}
+        if not fields:
+            return
+        assignments = ", ".join(f"{name}=?" for name in fields)
+        with self._lock:
+            # Jobs still unwinding after shutdown have nowhere to record their state
+            if self._closed:
+                return
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id=?", (*fields.values(), job_id))
+            self._conn.commit()
+
+    def submit(self, kind, owner, function, *args):
+        """Queue function(context, *args) as a job and return its id"""
+        job_id = uuid.uuid4().hex
+        context = JobContext(self, job_id, owner)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, owner, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+                (job_id, kind, owner, time.time())
+            )
+            self._conn.commit()
+            self._contexts[job_id] = context
+        self._executor.submit(self._run, job_id, kind, context, function, args)
+        logger.info(f"Queued {kind} job {job_id} for '{owner}'")
+        return job_id
+
+    def _run(self, job_id, kind, context, function, args):
+        if context.cancelled:
+            self._finish(job_id, "cancelled")
+            return
+
+        self._update(job_id, status="running", started_at=time.time())
+        started = time.perf_counter()
+        try:
+            result = function(context, *args)
+            self._finish(job_id, "succeeded", progress=100, result=json.dumps(result))
+            logger.info(f"{kind} job {job_id} succeeded in {time.perf_counter() - started:.2f}s")
+        except JobCancelled:
+            self._finish(job_id, "cancelled")
+            logger.info(f"{kind} job {job_id} cancelled after {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            self._finish(job_id, "failed", error=str(e))
+            logger.error(f"{kind} job {job_id} failed: {str(e)}")
+            logger.error(f"Traceback: {traceback.format_exc()}")
+
+    def _finish(self, job_id, status, **fields):
+        self._update(job_id, status=status, finished_at=time.time(), **fields)
+        with self._lock:
+            self._contexts.pop(job_id, None)
+
+    def cancel(self, job_id):
+        """Ask a queued or running job to stop; returns False if it already finished"""
+        with self._lock:
+            context = self._contexts.get(job_id)
+        if context is None:
+            return False
+        context._cancel_event.set()
+        self._update(job_id, message="Cancelling...")
+        logger.info(f"Cancellation requested for job {job_id}")
+        return True
+
+    def _row_to_job(self, row):
+        if row is None:
+            return None
+        columns = ("id", "kind", "owner", "status", "progress", "stage", "message", "result", "error",
+                   "created_at", "started_at", "finished_at")
+        job = dict(zip(columns, row))
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        with self._lock:
+            context = self._contexts.get(job["id"])
+        job["partial"] = dict(context.partial) if context is not None else {}
+        return job
+
+    def get(self, job_id):
+        """Return a snapshot of a job, or None if it is unknown"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, kind, owner, status, progress, stage, message, result, error, created_at, started_at, finished_at "
+                "FROM jobs WHERE id=?", (job_id,)
+            ).fetchone()
+        return self._row_to_job(row)
+
+    def latest_for(self, owner, kind):
+        """Return the owner's most recent job of this kind, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, kind, owner, status, progress, stage, message, result, error, created_at, started_at, finished_at "
+                "FROM jobs WHERE owner=? AND kind=? ORDER BY created_at DESC LIMIT 1", (owner, kind)
+            ).fetchone()
+        return self._row_to_job(row)
+
+    def shutdown(self):
+        """Cancel outstanding jobs and stop the worker threads without waiting for them"""
+        with self._lock:
+            if self._closed:
+                return
+            contexts = list(self._contexts.values())
+        for context in contexts:
+            context._cancel_event.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            # Queued jobs never start and running ones can no longer record how they ended
+            cancelled = self._conn.execute(
+                "UPDATE jobs SET status='cancelled', message='The server shut down', finished_at=? "
+                "WHERE status IN ('queued', 'running')", (time.time(),)
+            ).rowcount
+            self._conn.commit()
+            self._closed = True
+            self._conn.close()
+        logger.info(f"Job runner shut down, {cancelled} job(s) cancelled")
@@ -0,0 +1,140 @@
+"""Deferred imports for heavy optional dependencies.
+
+lazy_import() returns a module proxy that performs the real import on first
+attribute access, so libraries such as moviepy, reportlab or pytesseract are
+only loaded by the pages and pipeline stages that actually use them. The first
+load of every proxy is timed, and import_time_report() gives a `-X importtime`
+breakdown of a module measured in a fresh interpreter. cold_import_time()
+measures what a set of imports costs a fresh process, which is how the app's
+start-up imports are compared with the eager import list it used to have.
+"""
+import importlib
+import json
+import logging
+import re
+import subprocess
+import sys
+import threading
+import time
+import types
+
+logger = logging.getLogger("NeoAITutor")
+
+# Module name -> seconds spent on its first (lazy) import in this process
+load_timings = {}
+_load_lock = threading.Lock()
+
+
+class LazyModule(types.ModuleType):
+    """Module stand-in that imports the real module the first time it is used"""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_lazy_module"]
+        if module is not None:
+            return module
+
+        with _load_lock:
+            module = self.__dict__["_lazy_module"]
+            if module is None:
+                started = time.perf_counter()
+                module = importlib.import_module(self.__name__)
+                elapsed = time.perf_counter() - started
+                load_timings[self.__name__] = elapsed
+                logger.info(f"Lazily imported {self.__name__} in {elapsed * 1000:.0f} ms")
+                self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_lazy_module"] is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name):
+    """Return the module if it is already imported, otherwise a proxy that imports it on first use"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
+
+
+def is_loaded(module):
+    """Tell whether a module returned by lazy_import has been imported yet"""
+    if isinstance(module, LazyModule):
+        return module.__dict__["_lazy_module"] is not None
+    return True
+
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S.*)$")
+
+
+def import_time_report(module_name, top=15, timeout=120):
+    """Import module_name in a fresh interpreter with -X importtime and summarize the cost.
+
+    Returns a dict with the total cumulative time in milliseconds and the
+    heaviest imports, each as (name, self_ms, cumulative_ms, depth).
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module_name}"],
+        capture_output=True, text=True, timeout=timeout
+    )
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "unknown error"
+        return {"module": module_name, "ok": False, "error": error}
+
+    root_package = module_name.split(".")[0]
+    entries = []
+    total_ms = 0.0
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        # Nesting is encoded as two spaces per level after the '|'
+        depth = max(0, (len(indent) - 1) // 2)
+        entry = (name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000, depth)
+        entries.append(entry)
+        # Interpreter start-up imports also show up at depth 0; only count the requested package
+        if depth == 0 and (entry[0] == root_package or entry[0].startswith(f"{root_package}.")):
+            total_ms += entry[2]
+
+    heaviest = sorted(entries, key=lambda entry: entry[2], reverse=True)[:top]
+    return {"module": module_name, "ok": True, "total_ms": total_ms, "count": len(entries), "heaviest": heaviest}
+
+
+_COLD_IMPORT_SCRIPT = """
+import importlib, json, sys, time
+missing = []
+started = time.perf_counter()
+for name in sys.argv[1:]:
+    try:
+        importlib.import_module(name)
+    except Exception as e:
+        missing.append(f"{name} ({type(e).__name__})")
+print(json.dumps({"ms": (time.perf_counter() - started) * 1000, "missing": missing}))
+"""
+
+
+def cold_import_time(module_names, timeout=300):
+    """Import module_names in order in a fresh interpreter and return the wall-clock cost.
+
+    Returns a dict with the total milliseconds and the modules that could not be imported
+    (their failed attempt is included in the time).
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", _COLD_IMPORT_SCRIPT, *module_names],
+        capture_output=True, text=True, timeout=timeout
+    )
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "unknown error"
+        raise RuntimeError(f"Cold import measurement failed: {error}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
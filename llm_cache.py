@@ -0,0 +1,297 @@
+"""Persistent response cache for the Gemini and OpenRouter call sites.
+
+Responses are keyed on the model name, the whitespace-normalized prompt and
+the generation parameters, stored in SQLite, expired after a TTL and evicted
+least-recently-used first once the cache holds more than max_entries rows.
+"""
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from types import SimpleNamespace
+
+logger = logging.getLogger("NeoAITutor")
+
+
+def normalize_prompt(prompt):
+    """Collapse whitespace so prompts that only differ in indentation share an entry"""
+    return re.sub(r"\s+", " ", str(prompt)).strip()
+
+
+class LLMResponseCache:
+    """SQLite-backed response cache with TTL, max-size eviction and hit-rate metrics"""
+
+    def __init__(self, db_path, ttl_seconds, max_entries):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.feature_stats = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                cache_key TEXT PRIMARY KEY,
+                model TEXT,
+                feature TEXT,
+                response TEXT,
+                created_at REAL,
+                last_used_at REAL,
+                hits INTEGER DEFAULT 0
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_last_used ON llm_responses (last_used_at)")
+        self._conn.commit()
+        logger.info(f"LLM response cache ready at {db_path} (ttl={ttl_seconds}s, max_entries={max_entries})")
+
+    @staticmethod
+    def make_key(model_name, prompt, params=None):
+        payload = json.dumps(
+            [model_name, normalize_prompt(prompt), params or {}],
+            sort_keys=True, ensure_ascii=False, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _record(self, feature, hit):
+        counters = self.feature_stats.setdefault(feature or "default", {"hits": 0, "misses": 0})
+        if hit:
+            self.hits += 1
+            counters["hits"] += 1
+        else:
+            self.misses += 1
+            counters["misses"] += 1
+
+    def get(self, key, feature=None):
+        """Return the cached response text for key, or None on a miss or expiry"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM llm_responses WHERE cache_key=?", (key,)
+            ).fetchone()
+
+            if row and now - row[1] <= self.ttl_seconds:
+                self._conn.execute(
+                    "UPDATE llm_responses SET last_used_at=?, hits=hits+1 WHERE cache_key=?", (now, key)
+                )
+                self._conn.commit()
+                self._record(feature, True)
+                return row[0]
+
+            if row:
+                self._conn.execute("DELETE FROM llm_responses WHERE cache_key=?", (key,))
+                self._conn.commit()
+            self._record(feature, False)
+            return None
+
+    def put(self, key, model_name, feature, response_text):
+        """Store a response and evict expired and least recently used entries"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (cache_key, model, feature, response, created_at, last_used_at, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (key, model_name, feature, response_text, now, now)
+            )
+            self._conn.execute("DELETE FROM llm_responses WHERE created_at < ?", (now - self.ttl_seconds,))
+            self._conn.execute(
+                "DELETE FROM llm_responses WHERE cache_key IN ("
+                "SELECT cache_key FROM llm_responses ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def stats(self):
+        """Return hit/miss counters overall and per feature"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": entries,
+                "features": {name: dict(counters) for name, counters in self.feature_stats.items()},
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _finish_reason(chunk):
+    """Return the name of a Gemini stream chunk's finish reason, or None while the stream is still running"""
+    candidates = getattr(chunk, "candidates", None)
+    if not candidates:
+        return None
+    reason = getattr(candidates[0], "finish_reason", None)
+    if not reason:
+        # FINISH_REASON_UNSPECIFIED (0) is what every chunk but the last one carries
+        return None
+    return getattr(reason, "name", str(reason))
+
+
+class CachedGenerativeModel:
+    """Wraps a Gemini GenerativeModel so generate_content is served from the cache when possible"""
+
+    def __init__(self, model, cache, model_name, bypass_features=()):
+        self.model = model
+        self.cache = cache
+        self.model_name = model_name
+        self.bypass_features = set(bypass_features)
+
+    def generate_content(self, prompt, feature=None, **kwargs):
+        if self.cache is None or feature in self.bypass_features:
+            return self.model.generate_content(prompt, **kwargs)
+
+        key = self.cache.make_key(self.model_name, prompt, kwargs)
+        cached_text = self.cache.get(key, feature)
+        if cached_text is not None:
+            logger.debug(f"LLM cache hit for feature '{feature}'")
+            return SimpleNamespace(text=cached_text)
+
+        response = self.model.generate_content(prompt, **kwargs)
+        try:
+            response_text = response.text
+        except Exception as e:
+            # Blocked or empty responses are returned as-is and never cached
+            logger.debug(f"Not caching response for feature '{feature}': {str(e)}")
+            return response
+
+        self.cache.put(key, self.model_name, feature, response_text)
+        return response
+
+    def stream_content(self, prompt, feature=None, **kwargs):
+        """Yield response text as it arrives; a cache hit yields the stored text in one piece"""
+        use_cache = self.cache is not None and feature not in self.bypass_features
+        if use_cache:
+            key = self.cache.make_key(self.model_name, prompt, kwargs)
+            cached_text = self.cache.get(key, feature)
+            if cached_text is not None:
+                logger.debug(f"LLM cache hit for feature '{feature}'")
+                yield cached_text
+                return
+
+        chunks = []
+        finish_reason = None
+        for chunk in self.model.generate_content(prompt, stream=True, **kwargs):
+            finish_reason = _finish_reason(chunk) or finish_reason
+            try:
+                text = chunk.text
+            except ValueError:
+                # Finish-reason-only and safety-blocked chunks have no parts, hence no text
+                continue
+            if text:
+                chunks.append(text)
+                yield text
+
+        # Only a stream that ran to a normal stop is complete; blocked or truncated output is not cached
+        if use_cache and chunks and finish_reason == "STOP":
+            self.cache.put(key, self.model_name, feature, "".join(chunks))
+        elif use_cache and chunks:
+            logger.debug(f"Not caching streamed response for feature '{feature}' (finish reason {finish_reason})")
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+
+class CachedChatClient:
+    """Wraps an OpenAI-compatible client so chat.completions.create is served from the cache"""
+
+    def __init__(self, client, cache, bypass_features=(), max_concurrency=None):
+        self.client = client
+        self.cache = cache
+        self.bypass_features = set(bypass_features)
+        # Caps in-flight upstream requests; cache hits never wait on it
+        self._slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_chat_completion))
+
+    def _upstream_create(self, **kwargs):
+        if self._slots is None:
+            return self.client.chat.completions.create(**kwargs)
+        with self._slots:
+            return self.client.chat.completions.create(**kwargs)
+
+    def _make_key(self, kwargs):
+        params = {name: value for name, value in kwargs.items() if name not in ("model", "messages", "extra_headers")}
+        messages = [
+            {**message, "content": normalize_prompt(message.get("content", ""))}
+            for message in kwargs.get("messages", [])
+        ]
+        return self.cache.make_key(kwargs.get("model"), json.dumps(messages, ensure_ascii=False), params)
+
+    def _create_chat_completion(self, feature=None, **kwargs):
+        if self.cache is None or feature in self.bypass_features:
+            return self._upstream_create(**kwargs)
+
+        model_name = kwargs.get("model")
+        key = self._make_key(kwargs)
+        cached_text = self.cache.get(key, feature)
+        if cached_text is not None:
+            logger.debug(f"LLM cache hit for feature '{feature}'")
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=cached_text), finish_reason="stop")])
+
+        completion = self._upstream_create(**kwargs)
+        choice = completion.choices[0] if completion.choices else None
+        response_text = choice.message.content if choice else None
+        # A completion cut off at max_tokens ("length") or filtered is returned but never cached
+        if response_text and getattr(choice, "finish_reason", None) == "stop":
+            self.cache.put(key, model_name, feature, response_text)
+        elif response_text:
+            logger.debug(f"Not caching completion for feature '{feature}' (finish reason {choice.finish_reason})")
+        return completion
+
+    def stream_chat_completion(self, feature=None, **kwargs):
+        """Yield completion text deltas as they arrive; a cache hit yields the stored text in one piece"""
+        use_cache = self.cache is not None and feature not in self.bypass_features
+        if use_cache:
+            key = self._make_key(kwargs)
+            cached_text = self.cache.get(key, feature)
+            if cached_text is not None:
+                logger.debug(f"LLM cache hit for feature '{feature}'")
+                yield cached_text
+                return
+
+        chunks = []
+        finish_reason = None
+        if self._slots is not None:
+            self._slots.acquire()
+        try:
+            for chunk in self.client.chat.completions.create(stream=True, **kwargs):
+                if not chunk.choices:
+                    continue
+                finish_reason = chunk.choices[0].finish_reason or finish_reason
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    chunks.append(delta)
+                    yield delta
+        finally:
+            if self._slots is not None:
+                self._slots.release()
+
+        # Same rule as the Gemini path: only a stream that stopped normally is complete
+        if use_cache and chunks and finish_reason == "stop":
+            self.cache.put(key, kwargs.get("model"), feature, "".join(chunks))
+        elif use_cache and chunks:
+            logger.debug(f"Not caching streamed completion for feature '{feature}' (finish reason {finish_reason})")
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_llm_cache(db_path, ttl_seconds, max_entries):
+    """Return the process-wide response cache for db_path, opening it on first use"""
+    with _caches_lock:
+        cache = _caches.get(db_path)
+        if cache is None:
+            cache = LLMResponseCache(db_path, ttl_seconds, max_entries)
+            _caches[db_path] = cache
+        return cache
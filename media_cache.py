@@ -0,0 +1,121 @@
+"""Content-addressed on-disk cache for generated media files.
+
+Entries are stored as <root>/<sha256 key><suffix>. A hit refreshes the file's
+mtime, and once the cache grows past its size budget the least recently used
+files are evicted first.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+
+logger = logging.getLogger("NeoAITutor")
+
+
+class DiskLRUCache:
+    """Size-bounded LRU file cache with hit/miss counters"""
+
+    def __init__(self, root, max_bytes, suffix=""):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def make_key(*parts):
+        """Hash the given parts into a stable cache key"""
+        payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.root, f"{key}{self.suffix}")
+
+    def get(self, key):
+        """Return the cached file path for key, or None on a miss"""
+        path = self.path_for(key)
+        with self._lock:
+            if os.path.exists(path):
+                self.hits += 1
+                os.utime(path)
+                logger.debug(f"Cache hit in {self.root}: {key[:12]}")
+                return path
+            self.misses += 1
+            logger.debug(f"Cache miss in {self.root}: {key[:12]}")
+            return None
+
+    def put(self, key, source_path):
+        """Store a copy of source_path under key and return the cached path"""
+        path = self.path_for(key)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            os.link(source_path, temp_path)
+        except OSError:
+            shutil.copyfile(source_path, temp_path)
+        os.replace(temp_path, path)
+        logger.debug(f"Stored {source_path} in cache {self.root} as {key[:12]}")
+        self.evict()
+        return path
+
+    def _entries(self):
+        entries = []
+        with os.scandir(self.root) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(self.suffix) and not entry.name.endswith(".tmp"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits its size budget"""
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            if total <= self.max_bytes:
+                return
+
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                    self.evictions += 1
+                    logger.info(f"Evicted {path} from cache ({size} bytes)")
+                except FileNotFoundError:
+                    total -= size
+
+    def stats(self):
+        """Return hit/miss counters and current disk usage"""
+        with self._lock:
+            entries = self._entries()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(entries),
+                "bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_bytes,
+            }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(root, max_bytes, suffix=""):
+    """Return the process-wide cache for root, creating it on first use"""
+    with _caches_lock:
+        cache = _caches.get(root)
+        if cache is None:
+            cache = DiskLRUCache(root, max_bytes, suffix)
+            _caches[root] = cache
+        return cache
@@ -0,0 +1,128 @@
+"""Sentence-chunked, parallel narration synthesis.
+
+Long voiceover scripts are split at sentence boundaries into chunks of at most
+max_chunk_chars. The chunks are synthesized concurrently on a bounded thread
+pool and joined back together in order without re-encoding. MP3 chunks are
+concatenated frame by frame, since MP3 streams can be appended to each other.
+Any other format goes through ffmpeg's concat demuxer with stream copy.
+"""
+import concurrent.futures
+import logging
+import os
+import re
+import subprocess
+import time
+
+logger = logging.getLogger("NeoAITutor")
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?;:])\s+")
+WORD_BOUNDARY = re.compile(r"\s+")
+# Words whose trailing period does not end a sentence; a decimal point is never followed by a space
+ABBREVIATIONS = {"e.g.", "i.e.", "etc.", "vs.", "cf.", "approx.", "fig.", "eq.", "no.", "dr.", "mr.", "mrs.", "ms.", "prof.", "st."}
+
+
+def _pack(pieces, max_chars, separator=" "):
+    """Greedily join consecutive pieces into chunks no longer than max_chars"""
+    chunks = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(separator) + len(piece) > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current}{separator}{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _sentences(text):
+    """Split text at sentence boundaries, but not after abbreviations such as e.g. or Dr."""
+    sentences = []
+    for piece in SENTENCE_BOUNDARY.split(text.strip()):
+        if not piece:
+            continue
+        if sentences and sentences[-1].split()[-1].lstrip("(\"'").lower() in ABBREVIATIONS:
+            sentences[-1] = f"{sentences[-1]} {piece}"
+        else:
+            sentences.append(piece)
+    return sentences
+
+
+def split_sentences(text, max_chars=250):
+    """Split narration into chunks of whole sentences, each at most max_chars long where possible"""
+    pieces = []
+    for sentence in _sentences(text):
+        if len(sentence) <= max_chars:
+            pieces.append(sentence)
+        else:
+            # A run-on sentence is packed word by word instead
+            pieces.extend(_pack(WORD_BOUNDARY.split(sentence), max_chars))
+    return _pack(pieces, max_chars)
+
+
+def _strip_id3(data):
+    """Drop a leading ID3v2 tag so appended MP3 chunks play as one stream"""
+    if len(data) < 10 or data[:3] != b"ID3":
+        return data
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return data[10 + size + footer:]
+
+
+def concatenate_audio(paths, output_path, ffmpeg_path=None):
+    """Join audio files in order without re-encoding"""
+    if all(path.lower().endswith(".mp3") for path in paths):
+        with open(output_path, "wb") as output:
+            for index, path in enumerate(paths):
+                with open(path, "rb") as chunk:
+                    data = chunk.read()
+                output.write(data if index == 0 else _strip_id3(data))
+        return output_path
+
+    if not ffmpeg_path:
+        raise RuntimeError("ffmpeg is required to concatenate non-MP3 narration chunks")
+    list_path = f"{os.path.splitext(output_path)[0]}_chunks.txt"
+    with open(list_path, "w", encoding="utf-8") as list_file:
+        for path in paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            list_file.write(f"file '{escaped}'\n")
+    try:
+        result = subprocess.run(
+            [ffmpeg_path, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_path, "-c", "copy", output_path],
+            capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg concat failed with return code {result.returncode}: {result.stderr}")
+    finally:
+        os.remove(list_path)
+    return output_path
+
+
+def synthesize_narration(text, synthesize_chunk, output_path, max_workers=4, max_chunk_chars=250, ffmpeg_path=None):
+    """Voice text into output_path by synthesizing sentence chunks in parallel.
+
+    synthesize_chunk(chunk_text, chunk_path) must write one chunk to chunk_path. Narration that
+    fits in a single chunk is written straight to output_path.
+    """
+    chunks = split_sentences(text, max_chunk_chars)
+    if len(chunks) <= 1:
+        synthesize_chunk(text, output_path)
+        return output_path
+
+    stem, extension = os.path.splitext(output_path)
+    chunk_paths = [f"{stem}_part{index:03d}{extension}" for index in range(len(chunks))]
+    started = time.perf_counter()
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts") as executor:
+            # list() surfaces the first chunk failure; the pool waits for the rest before exiting
+            list(executor.map(synthesize_chunk, chunks, chunk_paths))
+        logger.info(f"Synthesized {len(chunks)} narration chunks with {max_workers} workers "
+                    f"in {time.perf_counter() - started:.2f}s")
+        return concatenate_audio(chunk_paths, output_path, ffmpeg_path)
+    finally:
+        for chunk_path in chunk_paths:
+            try:
+                os.remove(chunk_path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,143 @@
+"""Write-behind queue for progress updates.
+
+UI handlers hand their update_progress events to a ProgressWriter and return
+immediately. A background thread commits the queued events to the store in one
+transaction once flush_interval_ms has passed since the oldest queued event or
+batch_size events are waiting, whichever comes first. Pending events can be
+flushed on demand (reads do this for their user so they always see their own
+writes) and are flushed when the writer is closed at shutdown.
+"""
+import collections
+import logging
+import threading
+import time
+import traceback
+
+logger = logging.getLogger("NeoAITutor")
+
+
+class ProgressWriter:
+    """Batches progress events into periodic store transactions on a background thread"""
+
+    def __init__(self, store, flush_interval_ms=250, batch_size=50):
+        self.store = store
+        self.flush_interval = flush_interval_ms / 1000
+        self.batch_size = max(1, batch_size)
+        self.batches = 0
+        self.events_written = 0
+        self.failures = 0
+        self._pending = []
+        self._pending_users = collections.Counter()
+        self._oldest_pending = None
+        self._enqueued = 0
+        self._written = 0
+        self._flush_requested = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="progress-writer", daemon=True)
+        self._thread.start()
+        logger.info(f"Progress writer started (flush every {flush_interval_ms}ms or {self.batch_size} events)")
+
+    def submit(self, username, topic, score=None, practice_set=None, answers=None):
+        """Queue a progress event; it is committed by the background thread"""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Progress writer has been closed")
+            if not self._pending:
+                self._oldest_pending = time.monotonic()
+            self._pending.append({
+                "username": username,
+                "topic": topic,
+                "score": score,
+                "practice_set": practice_set,
+                "answers": answers,
+                "at": time.time(),
+            })
+            self._pending_users[username] += 1
+            self._enqueued += 1
+            # Wake the writer to start the flush timer on the first event, or to write a full batch now
+            if len(self._pending) == 1 or len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+
+    def has_pending(self, username):
+        """Tell whether events for username are queued or being written"""
+        with self._cond:
+            return self._pending_users[username] > 0
+
+    def flush(self, timeout=None):
+        """Block until every event submitted before this call is committed; returns False on timeout"""
+        with self._cond:
+            target = self._enqueued
+            if self._written >= target:
+                return True
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._written >= target, timeout)
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            while self._pending and not (self._closed or self._flush_requested or len(self._pending) >= self.batch_size):
+                remaining = self._oldest_pending + self.flush_interval - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            batch, self._pending = self._pending, []
+            self._flush_requested = False
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            self._write(batch)
+            with self._cond:
+                for event in batch:
+                    self._pending_users[event["username"]] -= 1
+                    if self._pending_users[event["username"]] <= 0:
+                        del self._pending_users[event["username"]]
+                self._written += len(batch)
+                if not self._pending:
+                    self._flush_requested = False
+                self._cond.notify_all()
+
+    def _write(self, batch):
+        try:
+            self.store.apply_progress_events(batch)
+            self.batches += 1
+            self.events_written += len(batch)
+            logger.debug(f"Progress writer committed {len(batch)} event(s)")
+            return
+        except Exception as e:
+            logger.warning(f"Progress batch of {len(batch)} event(s) failed, retrying one by one: {str(e)}")
+
+        # One bad event (e.g. a deleted user) must not take the rest of the batch down with it
+        for event in batch:
+            try:
+                self.store.apply_progress_events([event])
+                self.events_written += 1
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Dropping progress event for user '{event['username']}': {str(e)}")
+                logger.error(f"Traceback: {traceback.format_exc()}")
+
+    def stats(self):
+        """Return queue depth and write counters"""
+        with self._cond:
+            return {
+                "pending": len(self._pending),
+                "batches": self.batches,
+                "events_written": self.events_written,
+                "failures": self.failures,
+            }
+
+    def close(self):
+        """Flush everything still queued and stop the background thread"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        logger.info(f"Progress writer closed after {self.events_written} event(s) in {self.batches} batch(es)")
@@ -0,0 +1,154 @@
+"""Admission control and fair queuing for Manim renders.
+
+A render saturates a CPU core for tens of seconds, so the scheduler caps how
+many run at once. Waiting renders are queued per user and dispatched round-robin
+across users, so one user queuing several videos cannot starve everyone else.
+Wait times are estimated from an exponential moving average of recent render
+durations. When the queue is full, a new render is rejected with
+QueueFullError instead of piling up.
+"""
+import collections
+import contextlib
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+logger = logging.getLogger("NeoAITutor")
+
+
+class QueueFullError(Exception):
+    """Raised when a render cannot be queued because the queue (or the user's share of it) is full"""
+
+
+class RenderScheduler:
+    """Limits concurrent renders and queues the rest fairly across users"""
+
+    def __init__(self, max_concurrent=2, max_queued=10, max_queued_per_user=2, initial_estimate=60.0, alpha=0.3):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queued = max_queued
+        self.max_queued_per_user = max_queued_per_user
+        self.alpha = alpha
+        self.avg_duration = initial_estimate
+        self.completed = 0
+        self.rejected = 0
+        self._tickets = itertools.count(1)
+        # owner -> deque of waiting tickets; dict order is the round-robin order
+        self._queues = collections.OrderedDict()
+        self._running = {}
+        self._cond = threading.Condition()
+        logger.info(f"Render scheduler allows {self.max_concurrent} concurrent render(s), "
+                    f"{self.max_queued} queued ({self.max_queued_per_user} per user)")
+
+    def _queued_count(self):
+        return sum(len(tickets) for tickets in self._queues.values())
+
+    def _admission_error(self, owner):
+        if self._queued_count() >= self.max_queued:
+            return f"The render queue is full ({self.max_queued} videos waiting). Please try again in a few minutes."
+        if len(self._queues.get(owner, ())) >= self.max_queued_per_user:
+            return f"You already have {self.max_queued_per_user} videos waiting to render. Please wait for them to finish."
+        return None
+
+    def check_admission(self, owner):
+        """Raise QueueFullError if a render submitted now by owner would be rejected"""
+        with self._cond:
+            error = self._admission_error(owner)
+        if error:
+            raise QueueFullError(error)
+
+    def _order(self):
+        """Waiting tickets in dispatch order: each user's oldest ticket in turn, then their next ones"""
+        queues = list(self._queues.values())
+        order = []
+        for depth in range(max((len(tickets) for tickets in queues), default=0)):
+            order.extend(tickets[depth] for tickets in queues if depth < len(tickets))
+        return order
+
+    def _try_dispatch(self, owner, ticket):
+        if len(self._running) >= self.max_concurrent or self._order()[0] != ticket:
+            return False
+        self._remove(owner, ticket)
+        # The user just served goes to the back of the rotation
+        if owner in self._queues:
+            self._queues.move_to_end(owner)
+        self._running[ticket] = time.monotonic()
+        return True
+
+    def _remove(self, owner, ticket):
+        tickets = self._queues.get(owner)
+        if tickets is None or ticket not in tickets:
+            return
+        tickets.remove(ticket)
+        if not tickets:
+            del self._queues[owner]
+
+    def _estimate(self, position):
+        """Seconds until the render at this queue position finishes, assuming every render takes the average"""
+        now = time.monotonic()
+        slots = [max(self.avg_duration - (now - started), 0.0) for started in self._running.values()]
+        slots += [0.0] * (self.max_concurrent - len(slots))
+        heapq.heapify(slots)
+        for _ in range(position - 1):
+            heapq.heapreplace(slots, slots[0] + self.avg_duration)
+        return slots[0] + self.avg_duration
+
+    @contextlib.contextmanager
+    def slot(self, owner, on_wait=None, poll_interval=0.5):
+        """Wait for a render slot, then hold it for the duration of the with block.
+
+        on_wait(position, eta_seconds) is called while queued; it may raise to abandon the
+        wait (e.g. when the job is cancelled). Raises QueueFullError if the render is rejected.
+        """
+        with self._cond:
+            error = self._admission_error(owner)
+            if error:
+                self.rejected += 1
+                logger.warning(f"Rejected render for '{owner}': {error}")
+                raise QueueFullError(error)
+            ticket = next(self._tickets)
+            self._queues.setdefault(owner, collections.deque()).append(ticket)
+
+        waited = time.monotonic()
+        try:
+            while True:
+                with self._cond:
+                    if self._try_dispatch(owner, ticket):
+                        break
+                    position = self._order().index(ticket) + 1
+                    eta = self._estimate(position)
+                if on_wait:
+                    on_wait(position, eta)
+                with self._cond:
+                    self._cond.wait(poll_interval)
+        except BaseException:
+            with self._cond:
+                self._remove(owner, ticket)
+                self._cond.notify_all()
+            raise
+
+        logger.info(f"Render slot granted to '{owner}' after {time.monotonic() - waited:.1f}s in the queue")
+        succeeded = False
+        try:
+            yield
+            succeeded = True
+        finally:
+            with self._cond:
+                duration = time.monotonic() - self._running.pop(ticket)
+                # Failed renders usually stop early and would drag the estimate down
+                if succeeded:
+                    self.avg_duration = self.alpha * duration + (1 - self.alpha) * self.avg_duration
+                    self.completed += 1
+                self._cond.notify_all()
+
+    def stats(self):
+        """Return the current load and the render time estimate"""
+        with self._cond:
+            return {
+                "running": len(self._running),
+                "queued": self._queued_count(),
+                "avg_duration": self.avg_duration,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
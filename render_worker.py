@@ -0,0 +1,345 @@
+"""Warm Manim render workers.
+
+Each worker is a long-lived process that imports manim once at start-up and
+then renders submitted scene scripts in-process through manim's config and
+scene classes, so the interpreter start-up and the manim/cairo/numpy import
+cost is paid once per worker instead of once per video.
+
+The scripts are written by an LLM, so every render is sandboxed. A worker
+leads its own process group, which also holds the LaTeX and ffmpeg children it
+spawns. Each render has a CPU-time budget (RLIMIT_CPU) and the worker has an
+address-space cap (RLIMIT_AS). A render runs in its script's directory with its
+media under that directory. The parent enforces a wall-clock timeout by killing
+the whole process group, and the pool then replaces the worker. A cancelled
+render is stopped the same way. Failures are
+raised as RenderWorkerError with a reason from FAILURE_REASONS.
+"""
+import importlib.util
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; renders then run without rlimits
+    resource = None
+
+logger = logging.getLogger("NeoAITutor")
+
+# Manim CLI quality flags (-ql, -qm, ...) mapped to manim's config presets
+QUALITY_PRESETS = {
+    "l": "low_quality",
+    "m": "medium_quality",
+    "h": "high_quality",
+    "p": "production_quality",
+    "k": "fourk_quality",
+}
+
+
+# Why a render failed, as logged and shown to the user
+FAILURE_REASONS = {
+    "timeout": "Rendering took too long and was stopped",
+    "cpu_limit": "Rendering used up its CPU time budget and was stopped",
+    "memory_limit": "Rendering ran out of its memory allowance",
+    "crashed": "The render process crashed",
+    "script_error": "The animation script failed",
+    "cancelled": "Rendering was cancelled",
+}
+
+# How often a render waiting on its worker checks whether it was cancelled
+CANCEL_POLL_SECONDS = 0.5
+
+
+class RenderWorkerError(Exception):
+    """Raised when a worker fails to render a scene or dies while rendering"""
+
+    def __init__(self, message, reason="crashed"):
+        super().__init__(f"{FAILURE_REASONS[reason]}: {message}")
+        self.reason = reason
+
+
+def manim_quality_preset(quality_flag):
+    """Translate a CLI quality flag such as 'ql' or 'l' into a manim quality preset"""
+    flag = quality_flag.strip().lstrip("-")
+    if flag.startswith("q"):
+        flag = flag[1:]
+    if flag not in QUALITY_PRESETS:
+        logger.warning(f"Unknown Manim quality '{quality_flag}', defaulting to low quality")
+        return QUALITY_PRESETS["l"]
+    return QUALITY_PRESETS[flag]
+
+
+def _render_scene(manim, script_path, class_name, quality):
+    """Render one scene from a script file using the already imported manim"""
+    script_path = os.path.abspath(script_path)
+    workdir = os.path.dirname(script_path)
+    module_name = Path(script_path).stem
+    spec = importlib.util.spec_from_file_location(module_name, script_path)
+    module = importlib.util.module_from_spec(spec)
+
+    # input_file drives the media/videos/<script name>/ layout, same as the CLI;
+    # relative paths in the script resolve inside the script's own directory
+    overrides = {"quality": quality, "input_file": script_path, "media_dir": os.path.join(workdir, "media")}
+    previous_cwd = os.getcwd()
+    os.chdir(workdir)
+    sys.modules[module_name] = module
+    try:
+        with manim.tempconfig(overrides):
+            spec.loader.exec_module(module)
+            scene_class = getattr(module, class_name, None)
+            if scene_class is None:
+                raise AttributeError(f"Scene class '{class_name}' not found in {script_path}")
+            scene = scene_class()
+            scene.render()
+            return os.path.abspath(scene.renderer.file_writer.movie_file_path)
+    finally:
+        sys.modules.pop(module_name, None)
+        # The worker is reused, so the next render must not start inside this job's workspace
+        os.chdir(previous_cwd)
+
+
+def _limit_cpu_time(seconds):
+    """Let the next render use `seconds` of CPU time on top of what the worker has used so far"""
+    if resource is None or not seconds:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    # Exceeding the soft limit delivers SIGXCPU, which terminates the worker
+    soft = int(usage.ru_utime + usage.ru_stime + seconds) + 1
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _worker_main(conn, log_level, memory_limit_mb):
+    """Entry point of a render worker process"""
+    logging.basicConfig(
+        level=log_level,
+        format='%(asctime)s - %(name)s - %(levelname)s - [render worker %(process)d] %(message)s'
+    )
+
+    # Lead a new process group so a timeout can kill LaTeX/ffmpeg children along with the worker
+    if hasattr(os, "setsid"):
+        os.setsid()
+
+    # The expensive import, paid once for the lifetime of the worker
+    import manim
+
+    if resource is not None and memory_limit_mb:
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    conn.send(("ready", os.getpid()))
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+
+        try:
+            _limit_cpu_time(task.pop("cpu_limit"))
+            video_path = _render_scene(manim, **task)
+            conn.send(("ok", video_path))
+        except MemoryError:
+            conn.send(("error", "memory_limit", "MemoryError", traceback.format_exc()))
+        except Exception as e:
+            conn.send(("error", "script_error", f"{type(e).__name__}: {e}", traceback.format_exc()))
+
+
+class RenderWorker:
+    """A single warm render process and the pipe used to talk to it"""
+
+    def __init__(self, context, log_level, memory_limit_mb=0):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, log_level, memory_limit_mb),
+            name="manim-render-worker",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+        self.renders = 0
+        logger.info(f"Started Manim render worker (pid {self.process.pid})")
+
+    def _receive(self):
+        try:
+            return self.conn.recv()
+        except (EOFError, OSError):
+            self.process.join(timeout=5)
+            exitcode = self.process.exitcode
+            if hasattr(signal, "SIGXCPU") and exitcode == -signal.SIGXCPU:
+                raise RenderWorkerError(f"worker {self.process.pid} exceeded its CPU time limit", "cpu_limit")
+            raise RenderWorkerError(
+                f"worker {self.process.pid} exited unexpectedly (exit code {exitcode})", "crashed"
+            )
+
+    def _receive_within(self, timeout, waiting_for, cancelled=None):
+        """Receive the worker's next message, killing the worker on timeout or once cancelled() is true"""
+        deadline = time.monotonic() + timeout if timeout else None
+        while True:
+            wait = None if deadline is None else max(0, deadline - time.monotonic())
+            if cancelled is not None:
+                wait = CANCEL_POLL_SECONDS if wait is None else min(wait, CANCEL_POLL_SECONDS)
+            if self.conn.poll(wait):
+                return self._receive()
+            if cancelled is not None and cancelled():
+                self.kill()
+                raise RenderWorkerError(f"stopped while waiting for the {waiting_for}", "cancelled")
+            if deadline is not None and time.monotonic() >= deadline:
+                self.kill()
+                raise RenderWorkerError(f"no {waiting_for} after {timeout:.0f}s", "timeout")
+
+    def render(self, script_path, class_name, quality, timeout=None, cpu_limit=None, cancelled=None):
+        """Render a scene and return the path of the written mp4; cancelled() returning True kills the render"""
+        if not self.ready:
+            # A worker stuck importing manim must not hold its pool slot forever
+            self._receive_within(timeout, "ready message from the worker", cancelled)
+            self.ready = True
+
+        self.conn.send({"script_path": script_path, "class_name": class_name, "quality": quality, "cpu_limit": cpu_limit})
+        message = self._receive_within(timeout, "result", cancelled)
+        self.renders += 1
+
+        if message[0] == "ok":
+            return message[1]
+
+        _, reason, error, worker_traceback = message
+        logger.error(f"Render worker traceback: {worker_traceback}")
+        raise RenderWorkerError(error, reason)
+
+    def is_alive(self):
+        return self.process.is_alive()
+
+    def kill(self):
+        """Kill the worker and every process it started"""
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except (AttributeError, ProcessLookupError, PermissionError):
+            self.process.kill()
+        self.process.join()
+
+    def stop(self):
+        """Ask the worker to exit, killing it if it does not"""
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.kill()
+        self.conn.close()
+
+
+class RenderWorkerPool:
+    """A small pool of warm render workers shared by every session in the process"""
+
+    def __init__(self, size=2, max_renders_per_worker=20, log_level=logging.INFO,
+                 timeout=300, cpu_limit=240, memory_limit_mb=4096):
+        self.size = max(1, size)
+        self.max_renders_per_worker = max_renders_per_worker
+        self.log_level = log_level
+        self.timeout = timeout
+        self.cpu_limit = cpu_limit
+        self.memory_limit_mb = memory_limit_mb
+        self._context = multiprocessing.get_context("spawn")
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+
+        # Start every worker up front so manim is imported before the first request
+        for _ in range(self.size):
+            self._idle.put(RenderWorker(self._context, self.log_level, self.memory_limit_mb))
+        logger.info(f"Manim render pool started with {self.size} worker(s) "
+                    f"(timeout {self.timeout}s, CPU limit {self.cpu_limit}s, memory limit {self.memory_limit_mb} MB)")
+
+    def _replace(self, worker):
+        """Stop worker and start a new one; returns None if the new one fails to start"""
+        if worker is not None:
+            try:
+                worker.stop()
+            except Exception as e:
+                logger.warning(f"Could not stop render worker {worker.process.pid}: {str(e)}")
+        try:
+            return RenderWorker(self._context, self.log_level, self.memory_limit_mb)
+        except Exception as e:
+            # The empty slot stays in the pool and the next render tries to start a worker again
+            logger.error(f"Could not start a render worker: {str(e)}")
+            return None
+
+    def _acquire(self):
+        """Take the next free worker slot, waiting at most as long as one render may take"""
+        try:
+            return self._idle.get(timeout=self.timeout or None)
+        except queue.Empty:
+            raise RenderWorkerError(f"no render worker became free within {self.timeout:.0f}s", "timeout")
+
+    def render(self, script_path, class_name, quality, cancelled=None):
+        """Render a scene on the next free worker, blocking while all workers are busy.
+
+        If cancelled() becomes true mid-render the worker is killed, replaced, and
+        RenderWorkerError("cancelled") is raised.
+        """
+        if self._closed:
+            raise RenderWorkerError("Render pool has been shut down")
+
+        worker = self._acquire()
+        try:
+            if worker is None or not worker.is_alive():
+                if worker is not None:
+                    logger.warning(f"Render worker {worker.process.pid} is not running, replacing it")
+                worker = self._replace(worker)
+                if worker is None:
+                    raise RenderWorkerError("no render worker could be started")
+            return worker.render(script_path, class_name, quality, self.timeout, self.cpu_limit, cancelled)
+        except RenderWorkerError as e:
+            if worker is not None:
+                logger.warning(f"Render of {script_path} failed ({e.reason}) on worker {worker.process.pid}")
+                # A worker that hit its memory cap may be left in a bad state, so it is recycled too
+                if not worker.is_alive() or e.reason == "memory_limit":
+                    worker = self._replace(worker)
+            raise
+        finally:
+            try:
+                if worker is not None and worker.renders >= self.max_renders_per_worker:
+                    logger.info(f"Recycling render worker {worker.process.pid} after {worker.renders} renders")
+                    worker = self._replace(worker)
+            finally:
+                # Always give the slot back, even empty, so a failed restart never shrinks the pool
+                self._idle.put(worker)
+
+    def shutdown(self):
+        """Stop every idle worker"""
+        self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if worker is not None:
+                worker.stop()
+        logger.info("Manim render pool shut down")
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_render_pool(size=2, max_renders_per_worker=20, log_level=logging.INFO,
+                    timeout=300, cpu_limit=240, memory_limit_mb=4096):
+    """Return the process-wide render pool, starting it on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = RenderWorkerPool(size, max_renders_per_worker, log_level, timeout, cpu_limit, memory_limit_mb)
+        return _pool
@@ -0,0 +1,640 @@
+"""Data access layer for user accounts and learning progress.
+
+ProgressStore holds the queries; SQLiteStore and PostgresStore supply pooled
+connections for a local SQLite file or a shared PostgreSQL database, and
+create_store() picks one from configuration. With PostgreSQL every app instance
+sees the same users, so the service can scale out without sticky sessions.
+
+Streamlit serves every session from its own thread, so instead of one shared
+cursor the stores hand out connections from a small pool. SQLite connections
+run in WAL mode (readers never block the writer) with a busy timeout,
+statements are issued as constant SQL so the drivers can reuse prepared
+statements, and every write is a short explicit transaction.
+
+Progress lives in normalized tables (completed_topics, quiz_attempts,
+practice_sets) keyed by username and topic, so recording activity is a
+single-row insert or upsert. Databases created before that layout carry a JSON
+progress blob per user; it is migrated once, tracked by PRAGMA user_version.
+
+Every quiz submission is kept as a timestamped attempt with per-question
+answers, and the per-user (user_quiz_stats) and per-topic (topic_mastery)
+aggregates are updated in the same transaction, so analytics read a handful of
+precomputed rows rather than scanning the attempt history.
+
+Each user also has a progress_versions counter, bumped in the same transaction
+as every progress write. Sessions stamp cached reads with it, so a write made on
+any instance invalidates the cached progress and analytics on every other one.
+"""
+import abc
+import contextlib
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger("NeoAITutor")
+
+# Bumped whenever _migrate() learns a new step
+SCHEMA_VERSION = 2
+
+# PRAGMA synchronous levels; in WAL mode NORMAL may lose the last commits on power loss but never corrupts
+SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+# Key of the advisory lock serializing PostgreSQL schema creation across instances
+SCHEMA_LOCK_ID = 7152031
+
+# Smoothing factors of the exponential moving averages behind the trend (average change in
+# score between consecutive attempts) and per-topic mastery (recency-weighted score)
+TREND_ALPHA = 0.3
+MASTERY_ALPHA = 0.5
+
+
+def default_progress():
+    """Return the progress structure of a user with no activity yet"""
+    return {"completed_topics": [], "quiz_scores": {}, "practice_sets": {}}
+
+
+class ProgressStore(abc.ABC):
+    """Backend-independent user and progress queries.
+
+    Subclasses implement connection(), transaction() and close(), and may override
+    integrity_errors and topic_order.
+    """
+
+    integrity_errors = ()
+    # Tie-breaker for topics completed in the same instant (e.g. by a migration)
+    topic_order = "completed_at, topic"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @abc.abstractmethod
+    def connection(self):
+        """Context manager yielding a connection with an sqlite3-style execute(sql, params) using '?' placeholders"""
+
+    @abc.abstractmethod
+    def transaction(self, immediate=False):
+        """Context manager running the block in one transaction on a connection like connection()'s"""
+
+    def check_user(self, username, password_hash):
+        """Return True if a user with this username and password hash exists"""
+        with self.connection() as db_conn:
+            row = db_conn.execute(
+                "SELECT 1 FROM users WHERE username=? AND password=?", (username, password_hash)
+            ).fetchone()
+        return row is not None
+
+    def create_user(self, username, password_hash):
+        """Insert a new user; returns False if the username is already taken"""
+        try:
+            with self.transaction() as db_conn:
+                db_conn.execute(
+                    "INSERT INTO users (username, password) VALUES (?, ?)", (username, password_hash)
+                )
+            return True
+        except self.integrity_errors:
+            return False
+
+    def progress_version(self, username):
+        """Return a stamp that changes whenever any instance writes the user's progress"""
+        with self.connection() as db_conn:
+            row = db_conn.execute(
+                "SELECT version FROM progress_versions WHERE username=?", (username,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def get_progress(self, username):
+        """Return the user's progress in the dict shape the UI uses"""
+        progress = default_progress()
+        # One read transaction gives the three queries a consistent snapshot
+        with self.transaction() as db_conn:
+            progress["completed_topics"] = [
+                row[0] for row in db_conn.execute(
+                    f"SELECT topic FROM completed_topics WHERE username=? ORDER BY {self.topic_order}", (username,)
+                )
+            ]
+            progress["quiz_scores"] = {
+                topic: score for topic, score in db_conn.execute(
+                    "SELECT topic, last_score FROM topic_mastery WHERE username=? ORDER BY last_attempt_at", (username,)
+                )
+            }
+            progress["practice_sets"] = {
+                topic: json.loads(payload) for topic, payload in db_conn.execute(
+                    "SELECT topic, payload FROM practice_sets WHERE username=? ORDER BY updated_at", (username,)
+                )
+            }
+        return progress
+
+    def update_progress(self, username, topic, score=None, practice_set=None, answers=None):
+        """Record a topic visit, quiz attempt or practice set as single-row inserts and upserts.
+
+        answers is an optional list of per-question dicts with at least a boolean "correct" key.
+        """
+        self.apply_progress_events([{
+            "username": username,
+            "topic": topic,
+            "score": score,
+            "practice_set": practice_set,
+            "answers": answers,
+            "at": time.time(),
+        }])
+
+    def apply_progress_events(self, events):
+        """Write a batch of update_progress events in a single transaction"""
+        with self.transaction() as db_conn:
+            for event in events:
+                self._write_progress_event(db_conn, **event)
+            # Committed together with the writes, so no reader sees new data under an old stamp
+            for username in sorted({event["username"] for event in events}):
+                db_conn.execute(
+                    "INSERT INTO progress_versions AS v (username, version) VALUES (?, 1) "
+                    "ON CONFLICT(username) DO UPDATE SET version = v.version + 1",
+                    (username,)
+                )
+
+    def _write_progress_event(self, db_conn, username, topic, score, practice_set, answers, at):
+        db_conn.execute(
+            "INSERT INTO completed_topics (username, topic, completed_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(username, topic) DO NOTHING",
+            (username, topic, at)
+        )
+        if score is not None:
+            correct = sum(1 for answer in answers if answer.get("correct")) if answers else None
+            total = len(answers) if answers else None
+            db_conn.execute(
+                "INSERT INTO quiz_attempts (username, topic, score, attempted_at, correct, total, answers) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (username, topic, score, at, correct, total, json.dumps(answers) if answers else None)
+            )
+            self._update_quiz_aggregates(db_conn, username, topic, score, correct, total, at)
+        if practice_set is not None:
+            db_conn.execute(
+                "INSERT INTO practice_sets (username, topic, payload, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(username, topic) DO UPDATE SET payload=excluded.payload, updated_at=excluded.updated_at",
+                (username, topic, json.dumps(practice_set), at)
+            )
+
+    @staticmethod
+    def _update_quiz_aggregates(db_conn, username, topic, score, correct, total, attempted_at):
+        """Fold one attempt into the user's running totals.
+
+        SET expressions see the pre-update row; target columns are qualified because
+        PostgreSQL treats bare names as ambiguous with the excluded row.
+        """
+        db_conn.execute(
+            "INSERT INTO user_quiz_stats AS s (username, attempts, score_sum, avg_score, best_score, last_score, trend, last_attempt_at) "
+            "VALUES (?, 1, ?, ?, ?, ?, 0, ?) "
+            "ON CONFLICT(username) DO UPDATE SET "
+            "attempts = s.attempts + 1, "
+            "score_sum = s.score_sum + excluded.score_sum, "
+            "avg_score = (s.score_sum + excluded.score_sum) / (s.attempts + 1), "
+            "best_score = CASE WHEN excluded.best_score > s.best_score THEN excluded.best_score ELSE s.best_score END, "
+            "last_score = excluded.last_score, "
+            "trend = s.trend + ? * ((excluded.last_score - s.last_score) - s.trend), "
+            "last_attempt_at = excluded.last_attempt_at",
+            (username, score, score, score, score, attempted_at, TREND_ALPHA)
+        )
+        db_conn.execute(
+            "INSERT INTO topic_mastery AS m (username, topic, attempts, score_sum, avg_score, best_score, last_score, mastery, "
+            "questions_correct, questions_total, last_attempt_at) "
+            "VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(username, topic) DO UPDATE SET "
+            "attempts = m.attempts + 1, "
+            "score_sum = m.score_sum + excluded.score_sum, "
+            "avg_score = (m.score_sum + excluded.score_sum) / (m.attempts + 1), "
+            "best_score = CASE WHEN excluded.best_score > m.best_score THEN excluded.best_score ELSE m.best_score END, "
+            "last_score = excluded.last_score, "
+            "mastery = m.mastery + ? * (excluded.last_score - m.mastery), "
+            "questions_correct = m.questions_correct + excluded.questions_correct, "
+            "questions_total = m.questions_total + excluded.questions_total, "
+            "last_attempt_at = excluded.last_attempt_at",
+            (username, topic, score, score, score, score, score, correct or 0, total or 0, attempted_at, MASTERY_ALPHA)
+        )
+
+    def get_quiz_stats(self, username):
+        """Return the user's precomputed quiz aggregates, or None before the first attempt"""
+        with self.connection() as db_conn:
+            row = db_conn.execute(
+                "SELECT attempts, avg_score, best_score, last_score, trend, last_attempt_at "
+                "FROM user_quiz_stats WHERE username=?", (username,)
+            ).fetchone()
+        if row is None:
+            return None
+        columns = ("attempts", "avg_score", "best_score", "last_score", "trend", "last_attempt_at")
+        return dict(zip(columns, row))
+
+    def get_topic_mastery(self, username):
+        """Return per-topic aggregates, most recently practised first"""
+        with self.connection() as db_conn:
+            rows = db_conn.execute(
+                "SELECT topic, attempts, avg_score, best_score, last_score, mastery, questions_correct, questions_total, "
+                "last_attempt_at FROM topic_mastery WHERE username=? ORDER BY last_attempt_at DESC", (username,)
+            ).fetchall()
+        columns = ("topic", "attempts", "avg_score", "best_score", "last_score", "mastery",
+                   "questions_correct", "questions_total", "last_attempt_at")
+        return [dict(zip(columns, row)) for row in rows]
+
+    def get_quiz_history(self, username, limit=50):
+        """Return the user's most recent attempts, oldest first"""
+        with self.connection() as db_conn:
+            rows = db_conn.execute(
+                "SELECT topic, score, correct, total, answers, attempted_at FROM quiz_attempts "
+                "WHERE username=? ORDER BY id DESC LIMIT ?", (username, limit)
+            ).fetchall()
+        return [
+            {
+                "topic": topic,
+                "score": score,
+                "correct": correct,
+                "total": total,
+                "answers": json.loads(answers) if answers else None,
+                "attempted_at": attempted_at,
+            }
+            for topic, score, correct, total, answers, attempted_at in reversed(rows)
+        ]
+
+    @abc.abstractmethod
+    def close(self):
+        """Release the backend's connections"""
+
+
+class SQLiteStore(ProgressStore):
+    """Pooled, thread-safe SQLite access to users and their progress"""
+
+    integrity_errors = (sqlite3.IntegrityError,)
+    topic_order = "completed_at, rowid"
+
+    def __init__(self, db_path, pool_size=8, busy_timeout_ms=5000, synchronous="NORMAL"):
+        super().__init__()
+        self.db_path = db_path
+        self.pool_size = max(1, pool_size)
+        self.busy_timeout_ms = busy_timeout_ms
+        self.synchronous = synchronous.upper()
+        if self.synchronous not in SYNCHRONOUS_MODES:
+            logger.warning(f"Unknown SQLite synchronous mode '{synchronous}', defaulting to NORMAL")
+            self.synchronous = "NORMAL"
+        self._idle = queue.LifoQueue()
+        self._all = []
+        self._closed = False
+        self._init_schema()
+        logger.info(f"SQLite store ready at {db_path} (pool_size={self.pool_size}, busy_timeout={busy_timeout_ms}ms)")
+
+    def _connect(self):
+        # isolation_level=None leaves transaction control to transaction() below
+        db_conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=64
+        )
+        db_conn.execute("PRAGMA journal_mode=WAL")
+        db_conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        db_conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        db_conn.execute("PRAGMA foreign_keys=ON")
+        return db_conn
+
+    @contextlib.contextmanager
+    def connection(self):
+        """Borrow a pooled connection for the duration of the block"""
+        if self._closed:
+            raise sqlite3.ProgrammingError("SQLite store has been closed")
+
+        try:
+            db_conn = self._idle.get_nowait()
+        except queue.Empty:
+            db_conn = None
+            with self._lock:
+                if len(self._all) < self.pool_size:
+                    db_conn = self._connect()
+                    self._all.append(db_conn)
+            if db_conn is None:
+                db_conn = self._idle.get(timeout=self.busy_timeout_ms / 1000)
+
+        try:
+            yield db_conn
+        finally:
+            self._idle.put(db_conn)
+
+    @contextlib.contextmanager
+    def transaction(self, immediate=False):
+        """Run the block in one short transaction; immediate=True takes the write lock up front"""
+        with self.connection() as db_conn:
+            db_conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            try:
+                yield db_conn
+            except BaseException:
+                db_conn.execute("ROLLBACK")
+                raise
+            db_conn.execute("COMMIT")
+
+    def _init_schema(self):
+        with self.transaction(immediate=True) as db_conn:
+            db_conn.execute("""
+                CREATE TABLE IF NOT EXISTS users (
+                    username TEXT PRIMARY KEY,
+                    password TEXT,
+                    progress TEXT
+                )
+            """)
+            columns = [column[1] for column in db_conn.execute("PRAGMA table_info(users)").fetchall()]
+            if 'progress' not in columns:
+                logger.info("Adding progress column to users table")
+                db_conn.execute("ALTER TABLE users ADD COLUMN progress TEXT")
+
+            db_conn.execute("""
+                CREATE TABLE IF NOT EXISTS completed_topics (
+                    username TEXT NOT NULL REFERENCES users(username) ON DELETE CASCADE,
+                    topic TEXT NOT NULL,
+                    completed_at REAL NOT NULL,
+                    PRIMARY KEY (username, topic)
+                )
+            """)
+            db_conn.execute("""
+                CREATE TABLE IF NOT EXISTS quiz_attempts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    username TEXT NOT NULL REFERENCES users(username) ON DELETE CASCADE,
+                    topic TEXT NOT NULL,
+                    score NUMERIC NOT NULL,
+                    attempted_at REAL NOT NULL,
+                    correct INTEGER,
+                    total INTEGER,
+                    answers TEXT
+                )
+            """)
+            db_conn.execute("CREATE INDEX IF NOT EXISTS idx_quiz_attempts_user_topic ON quiz_attempts (username, topic, id)")
+            db_conn.execute("CREATE INDEX IF NOT EXISTS idx_quiz_attempts_user ON quiz_attempts (username, id)")
+            db_conn.execute("""
+                CREATE TABLE IF NOT EXISTS practice_sets (
+                    username TEXT NOT NULL REFERENCES users(username) ON DELETE CASCADE,
+                    topic TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (username, topic)
+                )
+            """)
+            db_conn.execute("""
+                CREATE TABLE IF NOT EXISTS user_quiz_stats (
+                    username TEXT PRIMARY KEY REFERENCES users(username) ON DELETE CASCADE,
+                    attempts INTEGER NOT NULL,
+                    score_sum REAL NOT NULL,
+                    avg_score REAL NOT NULL,
+                    best_score REAL NOT NULL,
+                    last_score REAL NOT NULL,
+                    trend REAL NOT NULL,
+                    last_attempt_at REAL NOT NULL
+                )
+            """)
+            db_conn.execute("""
+                CREATE TABLE IF NOT EXISTS topic_mastery (
+                    username TEXT NOT NULL REFERENCES users(username) ON DELETE CASCADE,
+                    topic TEXT NOT NULL,
+                    attempts INTEGER NOT NULL,
+                    score_sum REAL NOT NULL,
+                    avg_score REAL NOT NULL,
+                    best_score REAL NOT NULL,
+                    last_score NUMERIC NOT NULL,
+                    mastery REAL NOT NULL,
+                    questions_correct INTEGER NOT NULL DEFAULT 0,
+                    questions_total INTEGER NOT NULL DEFAULT 0,
+                    last_attempt_at REAL NOT NULL,
+                    PRIMARY KEY (username, topic)
+                )
+            """)
+            db_conn.execute("""
+                CREATE TABLE IF NOT EXISTS progress_versions (
+                    username TEXT PRIMARY KEY REFERENCES users(username) ON DELETE CASCADE,
+                    version BIGINT NOT NULL
+                )
+            """)
+            self._migrate(db_conn)
+
+    def _migrate(self, db_conn):
+        """Bring an older database up to SCHEMA_VERSION"""
+        version = db_conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+
+        if version < 1:
+            # Copy every JSON progress blob into the normalized tables. The blob column is left
+            # in place (and no longer written) so a rollback to an older build still finds it.
+            now = time.time()
+            migrated = 0
+            for username, blob in db_conn.execute(
+                "SELECT username, progress FROM users WHERE progress IS NOT NULL AND progress != ''"
+            ).fetchall():
+                try:
+                    progress = json.loads(blob)
+                except ValueError:
+                    logger.warning(f"Skipping unreadable progress blob for user '{username}'")
+                    continue
+                for topic in progress.get("completed_topics", []):
+                    db_conn.execute(
+                        "INSERT OR IGNORE INTO completed_topics (username, topic, completed_at) VALUES (?, ?, ?)",
+                        (username, topic, now)
+                    )
+                for topic, score in progress.get("quiz_scores", {}).items():
+                    db_conn.execute(
+                        "INSERT INTO quiz_attempts (username, topic, score, attempted_at) VALUES (?, ?, ?, ?)",
+                        (username, topic, score, now)
+                    )
+                for topic, practice_set in progress.get("practice_sets", {}).items():
+                    db_conn.execute(
+                        "INSERT OR REPLACE INTO practice_sets (username, topic, payload, updated_at) VALUES (?, ?, ?, ?)",
+                        (username, topic, json.dumps(practice_set), now)
+                    )
+                migrated += 1
+            logger.info(f"Migrated progress of {migrated} user(s) to normalized tables")
+
+        if version < 2:
+            # Attempts gained per-question columns; rebuild the aggregates from the history
+            columns = [column[1] for column in db_conn.execute("PRAGMA table_info(quiz_attempts)").fetchall()]
+            for column, column_type in (("correct", "INTEGER"), ("total", "INTEGER"), ("answers", "TEXT")):
+                if column not in columns:
+                    db_conn.execute(f"ALTER TABLE quiz_attempts ADD COLUMN {column} {column_type}")
+            db_conn.execute("DELETE FROM user_quiz_stats")
+            db_conn.execute("DELETE FROM topic_mastery")
+            attempts = db_conn.execute(
+                "SELECT username, topic, score, correct, total, attempted_at FROM quiz_attempts ORDER BY id"
+            ).fetchall()
+            for username, topic, score, correct, total, attempted_at in attempts:
+                self._update_quiz_aggregates(db_conn, username, topic, score, correct, total, attempted_at)
+            logger.info(f"Rebuilt quiz aggregates from {len(attempts)} attempt(s)")
+
+        db_conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def close(self):
+        """Close every pooled connection"""
+        self._closed = True
+        with self._lock:
+            for db_conn in self._all:
+                try:
+                    db_conn.close()
+                except sqlite3.Error:
+                    pass
+            self._all.clear()
+        logger.info(f"SQLite store at {self.db_path} closed")
+
+
+class _PostgresConnection:
+    """Adapts a psycopg2 connection to the sqlite3-style execute() the queries use"""
+
+    def __init__(self, raw_conn):
+        self.raw_conn = raw_conn
+
+    def execute(self, sql, params=()):
+        cursor = self.raw_conn.cursor()
+        cursor.execute(sql.replace("?", "%s"), params)
+        return cursor
+
+
+class PostgresStore(ProgressStore):
+    """Pooled PostgreSQL access to users and their progress, shared by every app instance"""
+
+    def __init__(self, database_url, pool_size=8, lock_timeout_ms=5000, connect_timeout=10):
+        super().__init__()
+        # Optional dependency, only needed when STORAGE_BACKEND=postgres
+        import psycopg2
+        import psycopg2.pool
+
+        self.integrity_errors = (psycopg2.IntegrityError,)
+        self.pool_size = max(1, pool_size)
+        self.lock_timeout_ms = lock_timeout_ms
+        self._closed = False
+        # ThreadedConnectionPool raises instead of waiting when exhausted, so callers queue here
+        self._slots = threading.BoundedSemaphore(self.pool_size)
+        self._pool = psycopg2.pool.ThreadedConnectionPool(
+            1, self.pool_size,
+            dsn=database_url,
+            connect_timeout=connect_timeout,
+            options=f"-c lock_timeout={int(lock_timeout_ms)}"
+        )
+        self._init_schema()
+        logger.info(f"PostgreSQL store ready (pool_size={self.pool_size}, lock_timeout={lock_timeout_ms}ms)")
+
+    @contextlib.contextmanager
+    def connection(self):
+        """Borrow a pooled connection in autocommit mode for the duration of the block"""
+        if self._closed:
+            raise RuntimeError("PostgreSQL store has been closed")
+        if not self._slots.acquire(timeout=self.lock_timeout_ms / 1000):
+            raise TimeoutError("Timed out waiting for a PostgreSQL connection")
+
+        raw_conn = None
+        try:
+            raw_conn = self._pool.getconn()
+            raw_conn.autocommit = True
+            yield _PostgresConnection(raw_conn)
+        finally:
+            if raw_conn is not None:
+                self._pool.putconn(raw_conn, close=bool(raw_conn.closed))
+            self._slots.release()
+
+    @contextlib.contextmanager
+    def transaction(self, immediate=False):
+        """Run the block in one short transaction (immediate is accepted for SQLite parity)"""
+        with self.connection() as db_conn:
+            db_conn.execute("BEGIN")
+            try:
+                yield db_conn
+            except BaseException:
+                if not db_conn.raw_conn.closed:
+                    db_conn.execute("ROLLBACK")
+                raise
+            db_conn.execute("COMMIT")
+
+    def _init_schema(self):
+        with self.transaction() as db_conn:
+            # Instances starting together would otherwise race on CREATE TABLE IF NOT EXISTS
+            db_conn.execute("SELECT pg_advisory_xact_lock(?)", (SCHEMA_LOCK_ID,))
+            db_conn.execute("""
+                CREATE TABLE IF NOT EXISTS users (
+                    username TEXT PRIMARY KEY,
+                    password TEXT
+                )
+            """)
+            db_conn.execute("""
+                CREATE TABLE IF NOT EXISTS completed_topics (
+                    username TEXT NOT NULL REFERENCES users(username) ON DELETE CASCADE,
+                    topic TEXT NOT NULL,
+                    completed_at DOUBLE PRECISION NOT NULL,
+                    PRIMARY KEY (username, topic)
+                )
+            """)
+            db_conn.execute("""
+                CREATE TABLE IF NOT EXISTS quiz_attempts (
+                    id BIGSERIAL PRIMARY KEY,
+                    username TEXT NOT NULL REFERENCES users(username) ON DELETE CASCADE,
+                    topic TEXT NOT NULL,
+                    score DOUBLE PRECISION NOT NULL,
+                    attempted_at DOUBLE PRECISION NOT NULL,
+                    correct INTEGER,
+                    total INTEGER,
+                    answers TEXT
+                )
+            """)
+            db_conn.execute("CREATE INDEX IF NOT EXISTS idx_quiz_attempts_user_topic ON quiz_attempts (username, topic, id)")
+            db_conn.execute("CREATE INDEX IF NOT EXISTS idx_quiz_attempts_user ON quiz_attempts (username, id)")
+            db_conn.execute("""
+                CREATE TABLE IF NOT EXISTS practice_sets (
+                    username TEXT NOT NULL REFERENCES users(username) ON DELETE CASCADE,
+                    topic TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    updated_at DOUBLE PRECISION NOT NULL,
+                    PRIMARY KEY (username, topic)
+                )
+            """)
+            db_conn.execute("""
+                CREATE TABLE IF NOT EXISTS user_quiz_stats (
+                    username TEXT PRIMARY KEY REFERENCES users(username) ON DELETE CASCADE,
+                    attempts INTEGER NOT NULL,
+                    score_sum DOUBLE PRECISION NOT NULL,
+                    avg_score DOUBLE PRECISION NOT NULL,
+                    best_score DOUBLE PRECISION NOT NULL,
+                    last_score DOUBLE PRECISION NOT NULL,
+                    trend DOUBLE PRECISION NOT NULL,
+                    last_attempt_at DOUBLE PRECISION NOT NULL
+                )
+            """)
+            db_conn.execute("""
+                CREATE TABLE IF NOT EXISTS topic_mastery (
+                    username TEXT NOT NULL REFERENCES users(username) ON DELETE CASCADE,
+                    topic TEXT NOT NULL,
+                    attempts INTEGER NOT NULL,
+                    score_sum DOUBLE PRECISION NOT NULL,
+                    avg_score DOUBLE PRECISION NOT NULL,
+                    best_score DOUBLE PRECISION NOT NULL,
+                    last_score DOUBLE PRECISION NOT NULL,
+                    mastery DOUBLE PRECISION NOT NULL,
+                    questions_correct INTEGER NOT NULL DEFAULT 0,
+                    questions_total INTEGER NOT NULL DEFAULT 0,
+                    last_attempt_at DOUBLE PRECISION NOT NULL,
+                    PRIMARY KEY (username, topic)
+                )
+            """)
+            db_conn.execute("""
+                CREATE TABLE IF NOT EXISTS progress_versions (
+                    username TEXT PRIMARY KEY REFERENCES users(username) ON DELETE CASCADE,
+                    version BIGINT NOT NULL
+                )
+            """)
+
+    def close(self):
+        """Close every pooled connection"""
+        self._closed = True
+        self._pool.closeall()
+        logger.info("PostgreSQL store closed")
+
+
+def create_store(backend, database_name, database_url=None, pool_size=8, busy_timeout_ms=5000, synchronous="NORMAL"):
+    """Create the configured store: "sqlite" (local file) or "postgres" (shared, needs database_url)"""
+    backend = backend.lower()
+    if backend == "sqlite":
+        return SQLiteStore(database_name, pool_size, busy_timeout_ms, synchronous)
+    if backend in ("postgres", "postgresql"):
+        if not database_url:
+            raise ValueError("DATABASE_URL must be set when STORAGE_BACKEND is postgres")
+        return PostgresStore(database_url, pool_size, busy_timeout_ms)
+    raise ValueError(f"Unknown storage backend '{backend}'")
@@ -0,0 +1,159 @@
+import sqlite3
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from jobs import JobRunner
+
+
+def wait_until(predicate, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached in time"
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def runners(tmp_path):
+    created = []
+
+    def factory(**kwargs):
+        runner = JobRunner(str(tmp_path / "jobs.db"), **kwargs)
+        created.append(runner)
+        return runner
+
+    yield factory
+    for runner in created:
+        runner.shutdown()
+
+
+def statuses(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return dict(conn.execute("SELECT id, status FROM jobs"))
+
+
+def run_until_cancelled(context):
+    while True:
+        context.check_cancelled()
+        time.sleep(0.01)
+
+
+def test_successful_job_records_its_result_and_progress(runners):
+    runner = runners()
+
+    def solve(context, problem):
+        context.update(progress=50, stage="solving", message="Working on it")
+        return {"answer": problem.upper()}
+
+    job_id = runner.submit("solve", "alice", solve, "x + 1 = 3")
+    wait_until(lambda: runner.get(job_id)["status"] == "succeeded")
+    job = runner.get(job_id)
+    assert job["result"] == {"answer": "X + 1 = 3"}
+    assert (job["progress"], job["stage"], job["message"]) == (100, "solving", "Working on it")
+    assert job["started_at"] <= job["finished_at"]
+    assert runner.get("unknown") is None
+
+
+def test_running_job_can_be_cancelled(runners):
+    runner = runners()
+    started = threading.Event()
+
+    def block(context):
+        context.set_partial("text", "Step 1")
+        started.set()
+        run_until_cancelled(context)
+
+    job_id = runner.submit("solve", "alice", block)
+    assert started.wait(2)
+    assert runner.get(job_id)["partial"] == {"text": "Step 1"}
+    assert runner.cancel(job_id)
+
+    wait_until(lambda: runner.get(job_id)["status"] == "cancelled")
+    # Partial output goes away once the job has finished unwinding, and it cannot be cancelled again
+    wait_until(lambda: runner.get(job_id)["partial"] == {})
+    assert not runner.cancel(job_id)
+
+
+def test_exception_marks_the_job_failed(runners):
+    runner = runners()
+
+    def broken(context):
+        raise RuntimeError("render crashed")
+
+    job_id = runner.submit("video", "alice", broken)
+    wait_until(lambda: runner.get(job_id)["status"] == "failed")
+    job = runner.get(job_id)
+    assert (job["error"], job["result"]) == ("render crashed", None)
+
+
+def test_latest_for_returns_the_owners_newest_job_of_that_kind(runners):
+    runner = runners(max_workers=1)
+    first = runner.submit("solve", "alice", lambda context: 1)
+    runner.submit("video", "alice", lambda context: 2)
+    runner.submit("solve", "bob", lambda context: 3)
+    time.sleep(0.01)
+    latest = runner.submit("solve", "alice", lambda context: 4)
+
+    assert runner.latest_for("alice", "solve")["id"] == latest
+    wait_until(lambda: runner.get(latest)["status"] == "succeeded")
+    assert runner.get(first)["result"] == 1
+    assert runner.latest_for("alice", "solve")["result"] == 4
+    assert runner.latest_for("carol", "solve") is None
+
+
+def test_jobs_left_running_by_a_previous_process_are_marked_interrupted(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+    runner = JobRunner(db_path)
+    runner.shutdown()
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("INSERT INTO jobs (id, kind, owner, status, created_at) VALUES ('old', 'video', 'alice', 'running', ?)",
+                     (time.time(),))
+
+    runner = JobRunner(db_path)
+    assert runner.get("old")["status"] == "interrupted"
+    runner.shutdown()
+
+
+def test_shutdown_with_queued_jobs_returns_promptly_and_cancels_them(runners, tmp_path):
+    runner = runners(max_workers=1)
+    started = threading.Event()
+
+    def block(context):
+        started.set()
+        run_until_cancelled(context)
+
+    running = runner.submit("video", "alice", block)
+    assert started.wait(2)
+    queued = [runner.submit("video", "alice", block) for _ in range(3)]
+
+    began = time.monotonic()
+    runner.shutdown()
+    assert time.monotonic() - began < 0.5
+    assert statuses(str(tmp_path / "jobs.db")) == {job_id: "cancelled" for job_id in [running, *queued]}
+
+
+def test_process_exit_cancels_running_jobs_instead_of_waiting_for_them(tmp_path):
+    script = textwrap.dedent(f"""
+        import threading, time
+        from jobs import JobRunner
+
+        started = threading.Event()
+
+        def forever(context):
+            started.set()
+            while True:
+                context.check_cancelled()
+                time.sleep(0.01)
+
+        runner = JobRunner({str(tmp_path / "jobs.db")!r}, max_workers=1)
+        runner.submit("video", "alice", forever)
+        runner.submit("video", "alice", forever)
+        started.wait(5)
+    """)
+    subprocess.run([sys.executable, "-c", script], cwd=Path(__file__).resolve().parent.parent, timeout=20, check=True)
+    assert set(statuses(str(tmp_path / "jobs.db")).values()) == {"cancelled"}
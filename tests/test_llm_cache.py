@@ -0,0 +1,238 @@
+import enum
+from types import SimpleNamespace
+
+import pytest
+
+import llm_cache
+from llm_cache import CachedChatClient, CachedGenerativeModel, LLMResponseCache
+
+
+class FinishReason(enum.IntEnum):
+    FINISH_REASON_UNSPECIFIED = 0
+    STOP = 1
+    MAX_TOKENS = 2
+    SAFETY = 3
+
+
+class Chunk:
+    """Mimics a Gemini stream chunk: .text raises ValueError when the chunk has no parts"""
+
+    def __init__(self, text=None, finish_reason=FinishReason.FINISH_REASON_UNSPECIFIED):
+        self._text = text
+        self.candidates = [SimpleNamespace(finish_reason=finish_reason)]
+
+    @property
+    def text(self):
+        if self._text is None:
+            raise ValueError("The `response.text` quick accessor only works when the response contains a valid `Part`")
+        return self._text
+
+
+class Response:
+    """Mimics a Gemini response: .text raises ValueError when the prompt or answer was blocked"""
+
+    def __init__(self, text=None):
+        self._text = text
+
+    @property
+    def text(self):
+        if self._text is None:
+            raise ValueError("The `response.text` quick accessor only works when the response contains a valid `Part`")
+        return self._text
+
+
+class Model:
+    def __init__(self, text="x = 2"):
+        self.text = text
+        self.calls = 0
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls += 1
+        return Response(self.text)
+
+
+class StreamingModel:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.calls = 0
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        self.calls += 1
+        return iter(self.chunks)
+
+
+class ChatClient:
+    """Mimics an OpenAI-compatible client answering every request with `text` and `finish_reason`"""
+
+    def __init__(self, text, finish_reason):
+        self.text = text
+        self.finish_reason = finish_reason
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, stream=False, **kwargs):
+        self.calls += 1
+        if not stream:
+            message = SimpleNamespace(content=self.text)
+            return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason=self.finish_reason)])
+        words = self.text.split(" ")
+        chunks = [SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=word + " "), finish_reason=None)])
+                  for word in words]
+        # OpenRouter sends the finish reason on a final chunk with an empty delta, then a usage chunk without choices
+        chunks.append(SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=""),
+                                                               finish_reason=self.finish_reason)]))
+        chunks.append(SimpleNamespace(choices=[]))
+        return iter(chunks)
+
+
+MESSAGES = [{"role": "user", "content": "solve"}]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replaces the cache's wall clock with one the test moves by hand"""
+    now = [1_000_000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm.db"), ttl_seconds=3600, max_entries=100)
+    yield cache
+    cache.close()
+
+
+def test_stream_skips_chunks_without_parts_and_caches_complete_output(cache):
+    upstream = StreamingModel([Chunk("Step 1. "), Chunk(None), Chunk("Step 2."), Chunk(None, FinishReason.STOP)])
+    model = CachedGenerativeModel(upstream, cache, "gemini-test")
+
+    assert list(model.stream_content("solve", feature="concept_explorer")) == ["Step 1. ", "Step 2."]
+    assert list(model.stream_content("solve", feature="concept_explorer")) == ["Step 1. Step 2."]
+    assert upstream.calls == 1
+
+
+@pytest.mark.parametrize("finish_reason", [FinishReason.SAFETY, FinishReason.MAX_TOKENS])
+def test_stream_cut_short_is_not_cached(cache, finish_reason):
+    upstream = StreamingModel([Chunk("Step 1. "), Chunk(None, finish_reason)])
+    model = CachedGenerativeModel(upstream, cache, "gemini-test")
+
+    assert list(model.stream_content("solve", feature="concept_explorer")) == ["Step 1. "]
+    list(model.stream_content("solve", feature="concept_explorer"))
+    assert upstream.calls == 2
+
+
+def test_abandoned_stream_is_not_cached(cache):
+    upstream = StreamingModel([Chunk("Step 1. "), Chunk("Step 2.", FinishReason.STOP)])
+    model = CachedGenerativeModel(upstream, cache, "gemini-test")
+
+    stream = model.stream_content("solve", feature="concept_explorer")
+    assert next(stream) == "Step 1. "
+    stream.close()
+    list(model.stream_content("solve", feature="concept_explorer"))
+    assert upstream.calls == 2
+
+
+def test_chat_completion_that_stopped_is_cached(cache):
+    upstream = ChatClient("x = 2", "stop")
+    client = CachedChatClient(upstream, cache)
+
+    for _ in range(2):
+        completion = client.chat.completions.create(model="m", messages=MESSAGES, feature="concept_explorer")
+        assert completion.choices[0].message.content == "x = 2"
+    assert upstream.calls == 1
+
+
+@pytest.mark.parametrize("finish_reason", ["length", "content_filter"])
+def test_chat_completion_cut_short_is_not_cached(cache, finish_reason):
+    upstream = ChatClient("x =", finish_reason)
+    client = CachedChatClient(upstream, cache)
+
+    for _ in range(2):
+        completion = client.chat.completions.create(model="m", messages=MESSAGES, feature="concept_explorer")
+        assert completion.choices[0].finish_reason == finish_reason
+    assert upstream.calls == 2
+
+
+def test_chat_stream_that_stopped_is_cached(cache):
+    upstream = ChatClient("x = 2", "stop")
+    client = CachedChatClient(upstream, cache)
+
+    assert list(client.stream_chat_completion(model="m", messages=MESSAGES, feature="concept_explorer")) == [
+        "x ", "= ", "2 "]
+    assert list(client.stream_chat_completion(model="m", messages=MESSAGES, feature="concept_explorer")) == ["x = 2 "]
+    assert upstream.calls == 1
+
+
+def test_chat_stream_cut_short_is_not_cached(cache):
+    upstream = ChatClient("x =", "length")
+    client = CachedChatClient(upstream, cache)
+
+    assert "".join(client.stream_chat_completion(model="m", messages=MESSAGES, feature="concept_explorer")) == "x = "
+    list(client.stream_chat_completion(model="m", messages=MESSAGES, feature="concept_explorer"))
+    assert upstream.calls == 2
+
+
+def test_entries_expire_after_the_ttl(tmp_path, clock):
+    cache = LLMResponseCache(str(tmp_path / "llm.db"), ttl_seconds=60, max_entries=100)
+    cache.put("k", "m", "solver", "x = 2")
+
+    clock[0] += 60
+    assert cache.get("k") == "x = 2"
+    clock[0] += 1
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+    cache.close()
+
+
+def test_least_recently_used_entries_are_evicted_past_max_entries(tmp_path, clock):
+    cache = LLMResponseCache(str(tmp_path / "llm.db"), ttl_seconds=3600, max_entries=2)
+    cache.put("a", "m", "solver", "A")
+    clock[0] += 1
+    cache.put("b", "m", "solver", "B")
+    clock[0] += 1
+    # Reading "a" makes "b" the least recently used
+    assert cache.get("a") == "A"
+    clock[0] += 1
+    cache.put("c", "m", "solver", "C")
+
+    assert [cache.get(key) for key in ("a", "b", "c")] == ["A", None, "C"]
+    assert cache.stats()["entries"] == 2
+    cache.close()
+
+
+def test_bypassed_features_always_call_the_model(cache):
+    upstream = Model()
+    model = CachedGenerativeModel(upstream, cache, "gemini-test", bypass_features=["quiz"])
+
+    for _ in range(2):
+        assert model.generate_content("make a quiz", feature="quiz").text == "x = 2"
+        assert model.generate_content("solve", feature="concept_explorer").text == "x = 2"
+    assert upstream.calls == 3
+    assert cache.stats()["entries"] == 1
+    assert "quiz" not in cache.stats()["features"]
+
+
+def test_stats_count_hits_and_misses_per_feature(cache):
+    model = CachedGenerativeModel(Model(), cache, "gemini-test")
+    model.generate_content("solve", feature="concept_explorer")
+    model.generate_content("solve", feature="concept_explorer")
+    model.generate_content("solve", feature="concept_explorer")
+    model.generate_content("explain", feature="diagram")
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 2, 2)
+    assert stats["hit_rate"] == pytest.approx(0.5)
+    assert stats["features"] == {"concept_explorer": {"hits": 2, "misses": 1}, "diagram": {"hits": 0, "misses": 1}}
+
+
+def test_blocked_response_is_returned_but_not_cached(cache):
+    upstream = Model(text=None)
+    model = CachedGenerativeModel(upstream, cache, "gemini-test")
+
+    for _ in range(2):
+        response = model.generate_content("solve", feature="concept_explorer")
+        with pytest.raises(ValueError):
+            response.text
+    assert upstream.calls == 2
+    assert cache.stats()["entries"] == 0
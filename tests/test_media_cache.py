@@ -0,0 +1,83 @@
+import os
+import time
+
+import pytest
+
+import media_cache
+from media_cache import DiskLRUCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DiskLRUCache(str(tmp_path / "cache"), max_bytes=250, suffix=".mp4")
+
+
+def render(tmp_path, name, size=100):
+    path = tmp_path / name
+    path.write_bytes(name.encode().ljust(size, b"\0"))
+    return str(path)
+
+
+def touch(path, age_seconds):
+    stamp = time.time() - age_seconds
+    os.utime(path, (stamp, stamp))
+
+
+def test_put_then_get_round_trip(cache, tmp_path):
+    key = DiskLRUCache.make_key("scene", {"quality": "l"})
+    assert key == DiskLRUCache.make_key("scene", {"quality": "l"})
+    assert cache.get(key) is None
+
+    stored = cache.put(key, render(tmp_path, "video"))
+    assert stored == os.path.join(cache.root, f"{key}.mp4")
+    assert cache.get(key) == stored
+    with open(stored, "rb") as cached:
+        assert cached.read().startswith(b"video")
+
+
+def test_put_hard_links_the_source_when_it_can(cache, tmp_path):
+    source = render(tmp_path, "video")
+    stored = cache.put("k", source)
+    assert os.stat(stored).st_ino == os.stat(source).st_ino
+
+
+def test_put_copies_when_hard_links_fail(cache, tmp_path, monkeypatch):
+    def cross_device_link(source, destination):
+        raise OSError(18, "Invalid cross-device link")
+
+    monkeypatch.setattr(media_cache.os, "link", cross_device_link)
+    source = render(tmp_path, "video")
+    stored = cache.put("k", source)
+    assert os.stat(stored).st_ino != os.stat(source).st_ino
+    with open(stored, "rb") as cached, open(source, "rb") as original:
+        assert cached.read() == original.read()
+    assert [name for name in os.listdir(cache.root) if name.endswith(".tmp")] == []
+
+
+def test_least_recently_used_entries_are_evicted_first(cache, tmp_path):
+    for age, key in [(30, "a"), (20, "b")]:
+        touch(cache.put(key, render(tmp_path, key)), age)
+    # A hit makes "a" the most recently used entry
+    assert cache.get("a") is not None
+
+    cache.put("c", render(tmp_path, "c"))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_stats(cache, tmp_path):
+    for age, key in [(30, "a"), (20, "b"), (10, "c")]:
+        touch(cache.put(key, render(tmp_path, key)), age)
+    cache.get("c")
+    cache.get("missing")
+
+    assert cache.stats() == {
+        "hits": 1,
+        "misses": 1,
+        "hit_rate": 0.5,
+        "evictions": 1,
+        "entries": 2,
+        "bytes": 200,
+        "max_bytes": 250,
+    }
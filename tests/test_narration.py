@@ -0,0 +1,92 @@
+import random
+import time
+
+import pytest
+
+from narration import _strip_id3, concatenate_audio, split_sentences, synthesize_narration
+
+
+def id3_tag(payload_size, footer=False):
+    """An ID3v2.4 header declaring payload_size bytes of frames (syncsafe size), followed by those bytes"""
+    size = bytes([(payload_size >> shift) & 0x7F for shift in (21, 14, 7, 0)])
+    flags = 0x10 if footer else 0
+    return b"ID3\x04\x00" + bytes([flags]) + size + b"T" * payload_size + (b"3DI" + b"\x00" * 7 if footer else b"")
+
+
+def test_splits_at_sentence_ends_but_not_inside_decimals_or_abbreviations():
+    text = "The area is 3.14 times r squared. Dr. Smith uses e.g. a circle! Is that right? Yes."
+    assert split_sentences(text, max_chars=40) == [
+        "The area is 3.14 times r squared.",
+        "Dr. Smith uses e.g. a circle!",
+        "Is that right? Yes.",
+    ]
+
+
+def test_short_narration_is_one_chunk():
+    text = "Two plus two is four. Four minus one is three."
+    assert split_sentences(text, max_chars=250) == [text]
+    assert split_sentences("   ", max_chars=250) == []
+
+
+def test_chunks_fill_up_to_the_limit():
+    sentences = ["a" * 9 + ".", "b" * 9 + ".", "c" * 9 + "."]
+    text = " ".join(sentences)
+    # Two ten-character sentences and their separator fit in exactly 21 characters, not in 20
+    assert split_sentences(text, max_chars=21) == [" ".join(sentences[:2]), sentences[2]]
+    assert split_sentences(text, max_chars=20) == sentences
+
+
+def test_run_on_sentence_is_packed_word_by_word():
+    words = [f"word{index:02d}" for index in range(30)]
+    text = " ".join(words) + "."
+    chunks = split_sentences(text, max_chars=50)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 50 for chunk in chunks)
+    assert " ".join(chunks) == text
+
+
+def test_strip_id3():
+    frames = b"\xff\xfb\x90\x00" * 4
+    assert _strip_id3(id3_tag(20) + frames) == frames
+    assert _strip_id3(id3_tag(300) + frames) == frames
+    assert _strip_id3(id3_tag(20, footer=True) + frames) == frames
+    assert _strip_id3(frames) == frames
+    assert _strip_id3(b"ID3") == b"ID3"
+
+
+def test_concatenated_mp3_keeps_chunk_order(tmp_path):
+    paths = []
+    for index in range(3):
+        path = tmp_path / f"part{index}.mp3"
+        path.write_bytes(id3_tag(10) + bytes([index]) * 8)
+        paths.append(str(path))
+
+    output = tmp_path / "narration.mp3"
+    concatenate_audio(paths, str(output))
+    # Only the first chunk keeps its tag
+    assert output.read_bytes() == id3_tag(10) + b"\x00" * 8 + b"\x01" * 8 + b"\x02" * 8
+
+
+def test_other_formats_need_ffmpeg(tmp_path):
+    paths = [str(tmp_path / "part0.wav"), str(tmp_path / "part1.wav")]
+    with pytest.raises(RuntimeError):
+        concatenate_audio(paths, str(tmp_path / "narration.wav"))
+
+
+def test_parallel_synthesis_keeps_sentence_order(tmp_path):
+    sentences = [f"Sentence number {index} of the narration." for index in range(12)]
+    rng = random.Random(0)
+
+    def synthesize_chunk(chunk_text, chunk_path):
+        # Finish out of order
+        time.sleep(rng.uniform(0, 0.02))
+        with open(chunk_path, "wb") as output:
+            output.write(chunk_text.encode() + b"|")
+
+    output = tmp_path / "narration.mp3"
+    synthesize_narration(" ".join(sentences), synthesize_chunk, str(output), max_workers=4, max_chunk_chars=60)
+    chunks = output.read_bytes().decode().rstrip("|").split("|")
+    assert len(chunks) > 1
+    assert " ".join(chunks) == " ".join(sentences)
+    # Chunk files are cleaned up
+    assert [path.name for path in tmp_path.iterdir()] == ["narration.mp3"]
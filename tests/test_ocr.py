@@ -0,0 +1,73 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+import ocr  # noqa: E402
+
+
+def text_block(height=1200, width=1600, top=400, left=300, lines=5):
+    """A white page with a few lines of "words" made of 3 px vertical strokes, like writing"""
+    page = np.full((height, width), 255, np.uint8)
+    for line in range(lines):
+        y = top + line * 60
+        x = left
+        for word_width in (80, 40, 120, 60, 90, 50):
+            for stroke in range(0, word_width, 8):
+                page[y:y + 25, x + stroke:x + min(stroke + 3, word_width)] = 0
+            x += word_width + 25
+    return page
+
+
+def test_binarize_is_strictly_black_and_white_under_uneven_lighting():
+    page = text_block().astype(np.float64)
+    # Ink at 20% of the local brightness on paper that darkens from left to right
+    shading = np.linspace(1.0, 0.5, page.shape[1])[None, :]
+    gray = np.where(page == 0, 0.2, 0.9) * 255 * shading
+
+    binary = ocr.adaptive_binarize(gray.astype(np.uint8))
+    assert binary.dtype == np.uint8
+    assert set(np.unique(binary)) <= {0, 255}
+    ink = binary == 0
+    expected = text_block() == 0
+    assert (ink & expected).sum() > 0.9 * expected.sum()
+    assert (ink & ~expected).sum() < 0.01 * expected.sum()
+
+
+@pytest.mark.parametrize("angle", [-3.0, 2.5])
+def test_estimate_skew_recovers_rotation(angle):
+    rotated = Image.fromarray(text_block()).rotate(angle, resample=Image.Resampling.NEAREST, fillcolor=255)
+    assert ocr.estimate_skew(np.asarray(rotated)) == pytest.approx(-angle, abs=0.5)
+
+
+def test_crop_keeps_the_text_block_and_drops_page_edges():
+    page = text_block()
+    ink_in_text = (page == 0).sum()
+    # Dark photo edges and a ruled line across the page are not text
+    page[:15, :] = 0
+    page[:, -10:] = 0
+    page[1000:1003, 50:1550] = 0
+
+    cropped = ocr.crop_to_text(page, margin=20)
+    # The text spans rows 400-664 and columns 300-864
+    assert cropped.shape == (265 + 2 * 20, 565 + 2 * 20)
+    assert (cropped == 0).sum() == ink_in_text
+
+
+def test_crop_leaves_a_blank_page_alone():
+    page = np.full((300, 400), 255, np.uint8)
+    assert ocr.crop_to_text(page).shape == page.shape
+
+
+def test_preprocess_image_returns_grayscale_page_and_timings():
+    photo = Image.fromarray(text_block(height=2400, width=3200, top=800, left=600)).convert("RGB").rotate(
+        3, expand=True, fillcolor=(90, 90, 90))
+    image, timings = ocr.preprocess_image(photo, target_dpi=150)
+    assert image.mode == "L"
+    assert max(image.size) < 800
+    assert set(timings) == {"downscale", "grayscale", "binarize", "deskew", "crop"}
+
+
+def test_tesseract_config():
+    assert ocr.tesseract_config() == "--oem 3 --psm 6"
+    assert ocr.tesseract_config(11, 1, "-c preserve_interword_spaces=1") == "--oem 1 --psm 11 -c preserve_interword_spaces=1"
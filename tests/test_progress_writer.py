@@ -0,0 +1,119 @@
+import threading
+import time
+
+import pytest
+
+from progress_writer import ProgressWriter
+
+
+class RecordingStore:
+    """Records committed batches; events for users in `reject` fail the whole batch, like a foreign key"""
+
+    def __init__(self, reject=()):
+        self.reject = set(reject)
+        self.batches = []
+        self.committed = threading.Event()
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def apply_progress_events(self, events):
+        self.gate.wait()
+        if any(event["username"] in self.reject for event in events):
+            raise ValueError("unknown user")
+        self.batches.append([event["topic"] for event in events])
+        self.committed.set()
+
+    @property
+    def topics(self):
+        return [topic for batch in self.batches for topic in batch]
+
+
+@pytest.fixture
+def writers():
+    created = []
+
+    def factory(store, **kwargs):
+        writer = ProgressWriter(store, **kwargs)
+        created.append(writer)
+        return writer
+
+    yield factory
+    for writer in created:
+        if not writer._closed:
+            writer.close()
+
+
+def test_full_batch_is_written_without_waiting_for_the_interval(writers):
+    store = RecordingStore()
+    writer = writers(store, flush_interval_ms=60_000, batch_size=3)
+    for index in range(3):
+        writer.submit("alice", f"t{index}")
+
+    assert store.committed.wait(2)
+    assert store.batches == [["t0", "t1", "t2"]]
+
+
+def test_events_are_batched_until_the_interval_passes(writers):
+    store = RecordingStore()
+    writer = writers(store, flush_interval_ms=200, batch_size=100)
+    started = time.monotonic()
+    writer.submit("alice", "t0")
+    writer.submit("bob", "t1")
+    assert store.batches == []
+
+    assert store.committed.wait(2)
+    assert time.monotonic() - started >= 0.15
+    assert store.batches == [["t0", "t1"]]
+    assert not writer.has_pending("alice")
+
+
+def test_flush_commits_everything_submitted_before_it(writers):
+    store = RecordingStore()
+    writer = writers(store, flush_interval_ms=60_000, batch_size=100)
+    writer.submit("alice", "t0")
+    assert writer.has_pending("alice")
+    assert not writer.has_pending("bob")
+
+    assert writer.flush(timeout=2)
+    assert store.topics == ["t0"]
+    assert not writer.has_pending("alice")
+    assert writer.flush(timeout=0)
+
+
+def test_flush_times_out_while_the_store_is_stuck(writers):
+    store = RecordingStore()
+    store.gate.clear()
+    writer = writers(store, flush_interval_ms=60_000, batch_size=100)
+    writer.submit("alice", "t0")
+
+    assert not writer.flush(timeout=0.2)
+    assert writer.has_pending("alice")
+    store.gate.set()
+    assert writer.flush(timeout=2)
+    assert store.topics == ["t0"]
+
+
+def test_failed_batch_is_retried_one_by_one_dropping_only_the_bad_event(writers):
+    store = RecordingStore(reject={"ghost"})
+    writer = writers(store, flush_interval_ms=60_000, batch_size=100)
+    writer.submit("alice", "t0")
+    writer.submit("ghost", "t1")
+    writer.submit("bob", "t2")
+
+    assert writer.flush(timeout=2)
+    assert store.batches == [["t0"], ["t2"]]
+    stats = writer.stats()
+    assert (stats["events_written"], stats["failures"], stats["pending"]) == (2, 1, 0)
+    assert not writer.has_pending("ghost")
+
+
+def test_close_drains_the_queue(writers):
+    store = RecordingStore()
+    writer = writers(store, flush_interval_ms=60_000, batch_size=100)
+    for index in range(5):
+        writer.submit("alice", f"t{index}")
+
+    writer.close()
+    assert store.topics == [f"t{index}" for index in range(5)]
+    with pytest.raises(RuntimeError):
+        writer.submit("alice", "late")
@@ -0,0 +1,144 @@
+import threading
+import time
+
+import pytest
+
+from render_scheduler import QueueFullError, RenderScheduler
+
+
+class Abandon(Exception):
+    pass
+
+
+def wait_until(predicate, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached in time"
+        time.sleep(0.005)
+
+
+def test_round_robin_across_owners():
+    scheduler = RenderScheduler(max_concurrent=1, max_queued=10, max_queued_per_user=3)
+    dispatched = []
+
+    def render(owner, name):
+        with scheduler.slot(owner, poll_interval=0.01):
+            dispatched.append(name)
+
+    # Hold the only slot so every request below queues, in a known order
+    running = scheduler.slot("z")
+    running.__enter__()
+    threads = []
+    for owner, name in [("a", "a1"), ("a", "a2"), ("a", "a3"), ("b", "b1"), ("c", "c1")]:
+        thread = threading.Thread(target=render, args=(owner, name))
+        thread.start()
+        threads.append(thread)
+        wait_until(lambda: scheduler.stats()["queued"] == len(threads))
+
+    running.__exit__(None, None, None)
+    for thread in threads:
+        thread.join(timeout=5)
+    assert dispatched == ["a1", "b1", "c1", "a2", "a3"]
+    stats = scheduler.stats()
+    assert (stats["running"], stats["queued"], stats["completed"], stats["rejected"]) == (0, 0, 6, 0)
+
+
+def test_admission_limits():
+    scheduler = RenderScheduler(max_concurrent=1, max_queued=2, max_queued_per_user=1)
+    running = scheduler.slot("z")
+    running.__enter__()
+    release = threading.Event()
+
+    def queue_render(owner):
+        def on_wait(position, eta):
+            if release.is_set():
+                raise Abandon()
+        try:
+            with scheduler.slot(owner, on_wait=on_wait, poll_interval=0.01):
+                pass
+        except Abandon:
+            pass
+
+    threads = [threading.Thread(target=queue_render, args=("a",))]
+    threads[0].start()
+    wait_until(lambda: scheduler.stats()["queued"] == 1)
+
+    # a already has its one queued render
+    with pytest.raises(QueueFullError):
+        scheduler.check_admission("a")
+    with pytest.raises(QueueFullError):
+        with scheduler.slot("a"):
+            pass
+    scheduler.check_admission("b")
+
+    threads.append(threading.Thread(target=queue_render, args=("b",)))
+    threads[1].start()
+    wait_until(lambda: scheduler.stats()["queued"] == 2)
+
+    # The whole queue is full now, even for a user with nothing queued
+    with pytest.raises(QueueFullError):
+        scheduler.check_admission("c")
+    with pytest.raises(QueueFullError):
+        with scheduler.slot("c"):
+            pass
+    assert scheduler.stats()["rejected"] == 2
+
+    # Abandoned waits give their places back
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert scheduler.stats()["queued"] == 0
+    scheduler.check_admission("c")
+    running.__exit__(None, None, None)
+
+
+@pytest.mark.parametrize("max_concurrent, expected", [(1, [120, 180]), (2, [120, 120])])
+def test_eta_from_average_duration(max_concurrent, expected):
+    # Every slot is busy with a render that just started and is expected to take 60s
+    scheduler = RenderScheduler(max_concurrent=max_concurrent, max_queued=10, max_queued_per_user=10,
+                                initial_estimate=60.0)
+    holders = [scheduler.slot(f"holder{index}") for index in range(max_concurrent)]
+    for holder in holders:
+        holder.__enter__()
+
+    estimates = {}
+    release = threading.Event()
+
+    def queue_render(owner):
+        def on_wait(position, eta):
+            estimates.setdefault(owner, (position, eta))
+            if release.is_set():
+                raise Abandon()
+        try:
+            with scheduler.slot(owner, on_wait=on_wait, poll_interval=0.01):
+                pass
+        except Abandon:
+            pass
+
+    threads = []
+    for owner in ("first", "second"):
+        threads.append(threading.Thread(target=queue_render, args=(owner,)))
+        threads[-1].start()
+        wait_until(lambda: owner in estimates)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+    for holder in holders:
+        holder.__exit__(None, None, None)
+
+    assert [estimates[owner][0] for owner in ("first", "second")] == [1, 2]
+    assert [estimates[owner][1] for owner in ("first", "second")] == [pytest.approx(eta, abs=1) for eta in expected]
+
+
+def test_average_duration_only_learns_from_successful_renders():
+    scheduler = RenderScheduler(initial_estimate=10.0, alpha=0.5)
+    with pytest.raises(RuntimeError):
+        with scheduler.slot("a"):
+            raise RuntimeError("render failed")
+    assert scheduler.avg_duration == 10.0
+    assert scheduler.stats()["completed"] == 0
+
+    with scheduler.slot("a"):
+        pass
+    assert scheduler.avg_duration == pytest.approx(5.0, abs=0.1)
+    assert scheduler.stats()["completed"] == 1
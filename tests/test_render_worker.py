@@ -0,0 +1,184 @@
+import itertools
+import threading
+import time
+
+import pytest
+
+import render_worker
+from render_worker import RenderWorkerError, RenderWorkerPool, manim_quality_preset
+
+
+class FakeWorker:
+    """Stands in for a warm render process; `behaviour` decides what each render does"""
+
+    pids = itertools.count(1000)
+    behaviour = None
+    fail_to_start = False
+    started = []
+
+    def __init__(self, context, log_level, memory_limit_mb=0):
+        if FakeWorker.fail_to_start:
+            raise OSError("fork failed")
+        self.process = type("Process", (), {"pid": next(FakeWorker.pids)})()
+        self.alive = True
+        self.stopped = False
+        self.renders = 0
+        FakeWorker.started.append(self)
+
+    def render(self, script_path, class_name, quality, timeout=None, cpu_limit=None, cancelled=None):
+        self.renders += 1
+        self.cancelled = cancelled
+        return FakeWorker.behaviour(self, script_path)
+
+    def is_alive(self):
+        return self.alive
+
+    def stop(self):
+        self.stopped = True
+        self.alive = False
+
+
+def finishes(worker, script_path):
+    return f"{script_path}.mp4"
+
+
+def times_out(worker, script_path):
+    # What RenderWorker._receive_within does when no result arrives in time
+    worker.alive = False
+    raise RenderWorkerError("no result after 1s", "timeout")
+
+
+@pytest.fixture
+def fake_workers(monkeypatch):
+    monkeypatch.setattr(render_worker, "RenderWorker", FakeWorker)
+    monkeypatch.setattr(FakeWorker, "behaviour", staticmethod(finishes))
+    monkeypatch.setattr(FakeWorker, "fail_to_start", False)
+    monkeypatch.setattr(FakeWorker, "started", [])
+    return FakeWorker
+
+
+def test_timed_out_worker_is_killed_and_replaced(fake_workers):
+    pool = RenderWorkerPool(size=1, timeout=1)
+    first = fake_workers.started[0]
+
+    fake_workers.behaviour = staticmethod(times_out)
+    with pytest.raises(RenderWorkerError) as failure:
+        pool.render("scene.py", "Scene", "low_quality")
+    assert failure.value.reason == "timeout"
+    assert first.stopped
+    assert len(fake_workers.started) == 2
+
+    fake_workers.behaviour = staticmethod(finishes)
+    assert pool.render("scene.py", "Scene", "low_quality") == "scene.py.mp4"
+    assert fake_workers.started[1].renders == 1
+
+
+def test_failed_replacement_keeps_the_slot_and_retries_on_the_next_render(fake_workers):
+    pool = RenderWorkerPool(size=1, timeout=1)
+
+    fake_workers.behaviour = staticmethod(times_out)
+    fake_workers.fail_to_start = True
+    with pytest.raises(RenderWorkerError):
+        pool.render("scene.py", "Scene", "low_quality")
+    # Still no worker can start, which is reported instead of blocking forever
+    fake_workers.behaviour = staticmethod(finishes)
+    with pytest.raises(RenderWorkerError) as failure:
+        pool.render("scene.py", "Scene", "low_quality")
+    assert failure.value.reason == "crashed"
+
+    fake_workers.fail_to_start = False
+    assert pool.render("scene.py", "Scene", "low_quality") == "scene.py.mp4"
+    assert len(fake_workers.started) == 2
+
+
+def test_worker_is_recycled_after_max_renders(fake_workers):
+    pool = RenderWorkerPool(size=1, max_renders_per_worker=2, timeout=1)
+    for _ in range(3):
+        pool.render("scene.py", "Scene", "low_quality")
+    assert [worker.renders for worker in fake_workers.started] == [2, 1]
+    assert fake_workers.started[0].stopped
+
+
+def test_waiting_for_a_busy_pool_times_out(fake_workers):
+    pool = RenderWorkerPool(size=1, timeout=0.2)
+    started, release = threading.Event(), threading.Event()
+
+    def blocks(worker, script_path):
+        started.set()
+        release.wait(5)
+        return f"{script_path}.mp4"
+
+    fake_workers.behaviour = staticmethod(blocks)
+    thread = threading.Thread(target=pool.render, args=("first.py", "Scene", "low_quality"))
+    thread.start()
+    assert started.wait(2)
+    with pytest.raises(RenderWorkerError) as failure:
+        pool.render("second.py", "Scene", "low_quality")
+    assert failure.value.reason == "timeout"
+
+    release.set()
+    thread.join(timeout=5)
+    assert pool.render("third.py", "Scene", "low_quality") == "third.py.mp4"
+
+
+class SilentConnection:
+    """A pipe to a worker that never answers"""
+
+    def __init__(self):
+        self.polls = 0
+
+    def poll(self, timeout=None):
+        self.polls += 1
+        time.sleep(min(timeout, 0.01))
+        return False
+
+
+def silent_worker():
+    worker = object.__new__(render_worker.RenderWorker)
+    worker.conn = SilentConnection()
+    worker.process = type("Process", (), {"pid": 1})()
+    worker.killed = False
+
+    def kill():
+        worker.killed = True
+    worker.kill = kill
+    return worker
+
+
+def test_cancelled_wait_kills_the_worker(monkeypatch):
+    monkeypatch.setattr(render_worker, "CANCEL_POLL_SECONDS", 0.01)
+    worker = silent_worker()
+    with pytest.raises(RenderWorkerError) as failure:
+        worker._receive_within(60, "result", cancelled=lambda: worker.conn.polls >= 3)
+    assert failure.value.reason == "cancelled"
+    assert worker.killed
+    assert worker.conn.polls == 3
+
+
+def test_silent_worker_is_killed_after_the_timeout():
+    worker = silent_worker()
+    with pytest.raises(RenderWorkerError) as failure:
+        worker._receive_within(0.05, "result", cancelled=lambda: False)
+    assert failure.value.reason == "timeout"
+    assert worker.killed
+
+
+def test_cancelled_render_replaces_its_worker(fake_workers):
+    pool = RenderWorkerPool(size=1, timeout=1)
+
+    def cancelled_midway(worker, script_path):
+        assert worker.cancelled()
+        worker.alive = False
+        raise RenderWorkerError("stopped while waiting for the result", "cancelled")
+
+    fake_workers.behaviour = staticmethod(cancelled_midway)
+    with pytest.raises(RenderWorkerError) as failure:
+        pool.render("scene.py", "Scene", "low_quality", cancelled=lambda: True)
+    assert failure.value.reason == "cancelled"
+    assert fake_workers.started[0].stopped
+    assert len(fake_workers.started) == 2
+
+
+def test_manim_quality_preset():
+    assert manim_quality_preset("-ql") == "low_quality"
+    assert manim_quality_preset("k") == "fourk_quality"
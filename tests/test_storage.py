@@ -0,0 +1,249 @@
+"""ProgressStore contract, run against SQLite and, when TEST_DATABASE_URL is set, PostgreSQL.
+
+    TEST_DATABASE_URL=postgresql://postgres@localhost/neo_test python -m pytest tests/test_storage.py
+
+The PostgreSQL database is wiped before each test, so point it at a scratch database.
+"""
+import json
+import os
+import sqlite3
+import threading
+
+import pytest
+
+import storage
+
+BACKENDS = ["sqlite", "postgres"]
+TABLES = ("progress_versions", "topic_mastery", "user_quiz_stats", "practice_sets", "quiz_attempts",
+          "completed_topics", "users")
+
+
+def _reset_postgres(database_url):
+    psycopg2 = pytest.importorskip("psycopg2")
+    raw_conn = psycopg2.connect(database_url)
+    try:
+        raw_conn.autocommit = True
+        with raw_conn.cursor() as cursor:
+            for table in TABLES:
+                cursor.execute(f"DROP TABLE IF EXISTS {table} CASCADE")
+    finally:
+        raw_conn.close()
+
+
+@pytest.fixture(params=BACKENDS)
+def open_store(request, tmp_path):
+    """Return a factory for stores sharing one fresh database of the parametrized backend"""
+    if request.param == "sqlite":
+        database_name, database_url = str(tmp_path / "users.db"), None
+    else:
+        database_url = os.getenv("TEST_DATABASE_URL")
+        if not database_url:
+            pytest.skip("TEST_DATABASE_URL is not set")
+        _reset_postgres(database_url)
+        database_name = None
+
+    stores = []
+
+    def factory():
+        store = storage.create_store(request.param, database_name, database_url, pool_size=4)
+        stores.append(store)
+        return store
+
+    yield factory
+    for store in stores:
+        store.close()
+
+
+@pytest.fixture
+def store(open_store):
+    store = open_store()
+    for username in ("alice", "bob"):
+        assert store.create_user(username, f"hash-{username}")
+    return store
+
+
+def event(username, topic, score=None, practice_set=None, answers=None, at=1000.0):
+    return {"username": username, "topic": topic, "score": score, "practice_set": practice_set,
+            "answers": answers, "at": at}
+
+
+def test_create_and_check_user(open_store):
+    store = open_store()
+    assert store.create_user("alice", "hash-1")
+    assert not store.create_user("alice", "hash-2")
+    assert store.check_user("alice", "hash-1")
+    assert not store.check_user("alice", "hash-2")
+    assert not store.check_user("bob", "hash-1")
+
+
+def test_new_user_has_default_progress(store):
+    assert store.get_progress("alice") == storage.default_progress()
+    assert store.get_quiz_stats("alice") is None
+    assert store.get_topic_mastery("alice") == []
+    assert store.get_quiz_history("alice") == []
+
+
+def test_apply_progress_events_in_one_batch(store):
+    store.apply_progress_events([
+        event("alice", "Algebra", at=1.0),
+        event("alice", "Geometry", score=60, at=2.0),
+        event("alice", "Algebra", practice_set={"questions": ["q1"]}, at=3.0),
+        event("alice", "Geometry", score=80, at=4.0),
+        event("bob", "Calculus", at=5.0),
+    ])
+
+    progress = store.get_progress("alice")
+    assert progress["completed_topics"] == ["Algebra", "Geometry"]
+    assert progress["quiz_scores"] == {"Geometry": 80}
+    assert progress["practice_sets"] == {"Algebra": {"questions": ["q1"]}}
+    assert store.get_progress("bob")["completed_topics"] == ["Calculus"]
+
+
+def test_practice_set_upsert_keeps_latest(store):
+    store.update_progress("alice", "Algebra", practice_set={"version": 1})
+    store.update_progress("alice", "Algebra", practice_set={"version": 2})
+    assert store.get_progress("alice")["practice_sets"] == {"Algebra": {"version": 2}}
+
+
+def test_failed_batch_writes_nothing(store):
+    version = store.progress_version("alice")
+    with pytest.raises(Exception):
+        # An unknown user violates the foreign key and must roll back alice's event too
+        store.apply_progress_events([event("alice", "Algebra"), event("nobody", "Algebra")])
+    assert store.get_progress("alice") == storage.default_progress()
+    assert store.progress_version("alice") == version
+
+
+def test_progress_version_changes_only_for_written_users(store):
+    alice, bob = store.progress_version("alice"), store.progress_version("bob")
+    store.update_progress("alice", "Algebra")
+    assert store.progress_version("alice") != alice
+    assert store.progress_version("bob") == bob
+
+
+def test_progress_version_is_shared_between_instances(open_store, store):
+    # Two app instances over one database: a write on either must invalidate the other's cached reads
+    other = open_store()
+    before = other.progress_version("alice")
+    store.update_progress("alice", "Algebra")
+    assert other.progress_version("alice") != before
+    assert other.progress_version("alice") == store.progress_version("alice")
+
+
+def test_quiz_aggregates(store):
+    answers = [{"correct": True}, {"correct": False}, {"correct": True}, {"correct": True}]
+    store.apply_progress_events([
+        event("alice", "Algebra", score=50, answers=answers[:2], at=1.0),
+        event("alice", "Algebra", score=100, answers=answers, at=2.0),
+        event("alice", "Geometry", score=75, at=3.0),
+    ])
+
+    stats = store.get_quiz_stats("alice")
+    assert stats["attempts"] == 3
+    assert stats["avg_score"] == pytest.approx(75)
+    assert stats["best_score"] == 100
+    assert stats["last_score"] == 75
+    # trend: 0 -> 0.3 * (50 - 0) = 15 -> 15 + 0.3 * (-25 - 15) = 3
+    assert stats["trend"] == pytest.approx(3)
+    assert stats["last_attempt_at"] == 3.0
+
+    mastery = {row["topic"]: row for row in store.get_topic_mastery("alice")}
+    assert [row["topic"] for row in store.get_topic_mastery("alice")] == ["Geometry", "Algebra"]
+    algebra = mastery["Algebra"]
+    assert algebra["attempts"] == 2
+    assert algebra["avg_score"] == pytest.approx(75)
+    assert algebra["best_score"] == 100
+    assert algebra["last_score"] == 100
+    assert algebra["mastery"] == pytest.approx(75)
+    assert (algebra["questions_correct"], algebra["questions_total"]) == (4, 6)
+    assert (mastery["Geometry"]["questions_correct"], mastery["Geometry"]["questions_total"]) == (0, 0)
+    assert store.get_quiz_stats("bob") is None
+
+
+def test_quiz_history_oldest_first_with_limit(store):
+    answers = [{"question": "2 + 2", "correct": True}]
+    for index, score in enumerate([10, 20, 30]):
+        store.update_progress("alice", f"Topic {index}", score=score, answers=answers if index == 2 else None)
+
+    history = store.get_quiz_history("alice")
+    assert [attempt["score"] for attempt in history] == [10, 20, 30]
+    assert history[0]["answers"] is None and history[0]["correct"] is None
+    assert history[-1]["answers"] == answers
+    assert (history[-1]["correct"], history[-1]["total"]) == (1, 1)
+    assert [attempt["score"] for attempt in store.get_quiz_history("alice", limit=2)] == [20, 30]
+
+
+def test_concurrent_writers(store):
+    def record(username):
+        for index in range(20):
+            store.update_progress(username, f"Topic {index % 5}", score=index)
+
+    threads = [threading.Thread(target=record, args=(username,)) for username in ("alice", "bob") * 2]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store.get_quiz_stats("alice")["attempts"] == 40
+    assert len(store.get_quiz_history("bob", limit=100)) == 40
+
+
+def test_schema_creation_is_idempotent_across_instances(open_store):
+    # PostgreSQL instances starting together serialize on the advisory lock
+    stores, errors = [], []
+
+    def start():
+        try:
+            stores.append(open_store())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=start) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert stores[0].create_user("carol", "hash")
+    assert stores[-1].check_user("carol", "hash")
+
+
+def test_sqlite_migrates_json_progress_blobs(tmp_path):
+    db_path = str(tmp_path / "legacy.db")
+    legacy = sqlite3.connect(db_path)
+    legacy.execute("CREATE TABLE users (username TEXT PRIMARY KEY, password TEXT, progress TEXT)")
+    legacy.execute("INSERT INTO users VALUES (?, ?, ?)", ("alice", "hash", json.dumps({
+        "completed_topics": ["Algebra", "Geometry"],
+        "quiz_scores": {"Algebra": 90},
+        "practice_sets": {"Geometry": ["q1", "q2"]},
+    })))
+    legacy.execute("INSERT INTO users VALUES (?, ?, ?)", ("bob", "hash", "not json"))
+    legacy.commit()
+    legacy.close()
+
+    store = storage.SQLiteStore(db_path)
+    try:
+        assert store.get_progress("alice") == {
+            "completed_topics": ["Algebra", "Geometry"],
+            "quiz_scores": {"Algebra": 90},
+            "practice_sets": {"Geometry": ["q1", "q2"]},
+        }
+        assert store.get_quiz_stats("alice")["attempts"] == 1
+        assert store.get_progress("bob") == storage.default_progress()
+    finally:
+        store.close()
+
+    # Reopening must not migrate the blobs a second time
+    store = storage.SQLiteStore(db_path)
+    try:
+        assert store.get_quiz_stats("alice")["attempts"] == 1
+    finally:
+        store.close()
+
+
+def test_a_backend_must_implement_the_connection_methods():
+    class Incomplete(storage.ProgressStore):
+        def connection(self):
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
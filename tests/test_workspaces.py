@@ -0,0 +1,73 @@
+import os
+import time
+
+import pytest
+
+from workspaces import WorkspaceManager
+
+
+@pytest.fixture
+def manager_factory(tmp_path):
+    def factory(**kwargs):
+        manager = WorkspaceManager(str(tmp_path / "workspaces"), **kwargs)
+        # Stop the background collector so each test drives gc() itself
+        manager.close()
+        return manager
+    return factory
+
+
+def make_workspace(manager, name, age_hours, size=100):
+    """A finished workspace holding `size` bytes, last modified `age_hours` ago"""
+    path = os.path.join(manager.root, name)
+    os.makedirs(os.path.join(path, "media"))
+    with open(os.path.join(path, "media", "scene.mp4"), "wb") as output:
+        output.write(b"\0" * size)
+    backdate(path, age_hours)
+    return path
+
+
+def backdate(path, age_hours):
+    stamp = time.time() - age_hours * 3600
+    os.utime(path, (stamp, stamp))
+
+
+def remaining(manager):
+    return sorted(os.listdir(manager.root))
+
+
+def test_expired_workspaces_are_removed(manager_factory):
+    manager = manager_factory(max_age_hours=24)
+    make_workspace(manager, "old", age_hours=25)
+    make_workspace(manager, "recent", age_hours=23)
+
+    assert manager.gc() == 100
+    assert remaining(manager) == ["recent"]
+    stats = manager.stats()
+    assert (stats["workspaces"], stats["removed"], stats["reclaimed_bytes"], stats["bytes"]) == (1, 1, 100, 100)
+
+
+def test_oldest_workspaces_are_removed_until_the_quota_fits(manager_factory):
+    manager = manager_factory(max_age_hours=24, max_bytes=250)
+    for name, age_hours in [("c", 1), ("a", 3), ("b", 2)]:
+        make_workspace(manager, name, age_hours)
+
+    assert manager.gc() == 200
+    assert remaining(manager) == ["b", "c"]
+
+
+def test_active_workspaces_are_never_removed(manager_factory):
+    manager = manager_factory(max_age_hours=24, max_bytes=150)
+    active = manager.create()
+    with open(os.path.join(active, "scene.py"), "wb") as output:
+        output.write(b"\0" * 100)
+    backdate(active, 48)
+    make_workspace(manager, "finished", age_hours=1)
+
+    # The running job's workspace counts towards the quota, so the finished one goes instead
+    assert manager.gc() == 100
+    assert remaining(manager) == [os.path.basename(active)]
+    assert manager.stats()["active"] == 1
+
+    manager.release(active)
+    assert manager.gc() == 0
+    assert remaining(manager) == []
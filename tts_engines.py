@@ -0,0 +1,104 @@
+"""Text-to-speech engines behind one interface.
+
+Every engine has a name, which is also part of the narration cache key, and a
+synthesize(text, path, lang) method that writes one audio file. The app tries
+the configured engines in order and falls back to the next one when an engine
+fails. That way narration keeps working when gTTS is rate-limited or the network
+is down. EspeakEngine runs locally on the CPU, needs no network and gives
+repeatable timings, which suits benchmarks.
+"""
+import abc
+import logging
+import os
+import subprocess
+import tempfile
+
+logger = logging.getLogger("NeoAITutor")
+
+
+class TTSEngineError(Exception):
+    """Raised when an engine cannot synthesize speech"""
+
+
+class TTSEngine(abc.ABC):
+    """Base class for speech synthesizers"""
+
+    name = None
+
+    @abc.abstractmethod
+    def synthesize(self, text, path, lang):
+        """Write speech for text to path"""
+
+
+class GTTSEngine(TTSEngine):
+    """Google Translate's text-to-speech endpoint through gTTS (network, MP3 output)"""
+
+    name = "gtts"
+
+    def __init__(self, gtts_module):
+        # The app hands in its lazily imported gtts module so gTTS loads on first use
+        self.gtts = gtts_module
+
+    def synthesize(self, text, path, lang):
+        self.gtts.gTTS(text=text, lang=lang).save(path)
+
+
+class ElevenLabsEngine(TTSEngine):
+    """ElevenLabs API voices (network, MP3 output)"""
+
+    name = "elevenlabs"
+
+    def __init__(self, client, voice_id, model_id="eleven_multilingual_v2", output_format="mp3_44100_128"):
+        self.client = client
+        self.voice_id = voice_id
+        self.model_id = model_id
+        self.output_format = output_format
+
+    def synthesize(self, text, path, lang):
+        # The multilingual model infers the language from the text itself
+        audio = self.client.text_to_speech.convert(
+            text=text,
+            voice_id=self.voice_id,
+            model_id=self.model_id,
+            output_format=self.output_format,
+        )
+        with open(path, "wb") as output:
+            for chunk in audio:
+                output.write(chunk)
+
+
+class EspeakEngine(TTSEngine):
+    """Offline espeak-ng synthesis; WAV output is encoded with ffmpeg when another format is requested"""
+
+    name = "espeak"
+
+    def __init__(self, binary, ffmpeg_path=None, voice=None, words_per_minute=160, timeout=120):
+        self.binary = binary
+        self.ffmpeg_path = ffmpeg_path
+        self.voice = voice
+        self.words_per_minute = words_per_minute
+        self.timeout = timeout
+
+    def _run(self, command, input=None):
+        result = subprocess.run(command, input=input, capture_output=True, text=True, timeout=self.timeout)
+        if result.returncode != 0:
+            raise TTSEngineError(f"{os.path.basename(command[0])} failed with return code {result.returncode}: {result.stderr}")
+
+    def _speak(self, text, wav_path, voice):
+        # Text goes in on stdin: as an argument, a chunk starting with "-" would be parsed as an option
+        self._run([self.binary, "-v", voice, "-s", str(self.words_per_minute), "-w", wav_path, "--stdin"], input=text)
+
+    def synthesize(self, text, path, lang):
+        voice = self.voice or lang
+        if path.lower().endswith(".wav"):
+            self._speak(text, path, voice)
+            return
+        if not self.ffmpeg_path:
+            raise TTSEngineError("ffmpeg is required to encode espeak output to anything but WAV")
+
+        with tempfile.TemporaryDirectory() as workdir:
+            wav_path = os.path.join(workdir, "speech.wav")
+            self._speak(text, wav_path, voice)
+            # Chunks are appended as raw MP3 frames, so skip the Xing/ID3 headers that only describe one file
+            mp3_args = ["-write_xing", "0", "-id3v2_version", "0"] if path.lower().endswith(".mp3") else []
+            self._run([self.ffmpeg_path, "-y", "-loglevel", "error", "-i", wav_path, *mp3_args, path])
@@ -0,0 +1,128 @@
+"""Per-job working directories for render artifacts.
+
+Each video job gets its own directory under a common root. The scene script,
+manim's media tree (videos, Tex, images, partial movie files), the narration and
+the final video all live there, so concurrent jobs never share a filename. A
+background thread reclaims space: it removes workspaces older than the maximum
+age, then the oldest remaining ones until the root fits its disk quota. It never
+touches a workspace whose job is still running.
+"""
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+
+logger = logging.getLogger("NeoAITutor")
+
+
+def _directory_size(path):
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, filename)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class WorkspaceManager:
+    """Creates job workspaces and garbage-collects them by age and disk quota"""
+
+    def __init__(self, root, max_age_hours=24, max_bytes=2 * 1024 ** 3, gc_interval=600):
+        self.root = os.path.abspath(root)
+        self.max_age = max_age_hours * 3600
+        self.max_bytes = max_bytes
+        self.gc_interval = gc_interval
+        self.removed = 0
+        self.reclaimed_bytes = 0
+        self.last_bytes = 0
+        self._active = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        os.makedirs(self.root, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="workspace-gc", daemon=True)
+        self._thread.start()
+
+    def create(self, prefix="job"):
+        """Create a fresh workspace directory, marked in use until release() is called"""
+        path = os.path.join(self.root, f"{prefix}-{int(time.time())}-{uuid.uuid4().hex[:8]}")
+        os.makedirs(path)
+        with self._lock:
+            self._active.add(path)
+        logger.debug(f"Created workspace {path}")
+        return path
+
+    def release(self, path):
+        """Mark a workspace as finished so garbage collection may reclaim it"""
+        with self._lock:
+            self._active.discard(path)
+
+    def _workspaces(self):
+        workspaces = []
+        with os.scandir(self.root) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    workspaces.append((entry.stat().st_mtime, entry.path))
+        return sorted(workspaces)
+
+    def _remove(self, path, size, why):
+        shutil.rmtree(path, ignore_errors=True)
+        self.removed += 1
+        self.reclaimed_bytes += size
+        logger.info(f"Removed workspace {path} ({why}, {size} bytes)")
+
+    def gc(self):
+        """Remove expired workspaces, then the oldest ones until the root fits its quota"""
+        with self._lock:
+            active = set(self._active)
+        now = time.time()
+        remaining = []
+        total = 0
+        for mtime, path in self._workspaces():
+            if path in active:
+                total += _directory_size(path)
+                continue
+            size = _directory_size(path)
+            if now - mtime > self.max_age:
+                self._remove(path, size, "expired")
+            else:
+                remaining.append((path, size))
+                total += size
+
+        for path, size in remaining:
+            if total <= self.max_bytes:
+                break
+            self._remove(path, size, "over quota")
+            total -= size
+        self.last_bytes = total
+        return total
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.gc()
+            except Exception as e:
+                logger.warning(f"Workspace garbage collection failed: {str(e)}")
+            self._stop.wait(self.gc_interval)
+
+    def stats(self):
+        """Return workspace counts and the disk usage measured by the last collection"""
+        workspaces = self._workspaces()
+        with self._lock:
+            active = len(self._active)
+        return {
+            "workspaces": len(workspaces),
+            "active": active,
+            "bytes": self.last_bytes,
+            "max_bytes": self.max_bytes,
+            "removed": self.removed,
+            "reclaimed_bytes": self.reclaimed_bytes,
+        }
+
+    def close(self):
+        """Stop the background garbage collector"""
+        self._stop.set()
+        self._thread.join()